@@ -0,0 +1,169 @@
+"""
+ASGI serving mode for the cipher routes.
+
+Serves the same /encrypt, /decrypt and /crack routes as main.py over the same controller
+registry, with any ASGI server, from the backend src folder:
+
+    uvicorn asgi:app --port 5000
+
+Cheap cipher calls run inline on the event loop. Crack requests and payloads larger than
+OFFLOAD_BYTES are sent to a process pool, so a long search no longer blocks every other
+request and CPU-bound work spreads across cores. Offloaded encrypt and decrypt requests go
+through the same result cache, and the stages timed in the worker are recorded with the
+request. The pool size is read from the CIPHER_WORKERS environment variable (default: one
+worker per core); work running in the pool does not start pools of its own.
+"""
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
+import anyio
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from controllers.pool_controller import run_operation, to_parts
+from main import app as flask_app, cached_response, cipher_controllers, dispatch, result_key, store_result
+from services.log_service import get_logger, replay_logs
+from services.metrics_service import (
+    JSON_PARSE, add_stages, begin_request, current_stages, end_request, record_request, render, stage_end, stage_start,
+)
+from services.parallel_service import init_worker
+
+# Payloads larger than this many bytes are handled in the process pool
+OFFLOAD_BYTES = 64 * 1024
+
+# Operations that always run in the process pool
+OFFLOADED_OPERATIONS = {'crack'}
+
+
+def run_inline(cipher, operation, data):
+    """
+    Run one controller operation in the serving process, through the result cache.
+    """
+    with flask_app.app_context():
+        if operation in ('encrypt', 'decrypt'):
+            result = dispatch(cipher, operation, data)
+        else:
+            result = getattr(cipher_controllers[cipher], operation)(data)
+        return to_parts(result)
+
+
+def create_app(workers=None, offload_bytes=OFFLOAD_BYTES):
+    """
+    Build the ASGI application.
+
+    Parameters:
+    - workers (int): The number of worker processes (default: one per core).
+    - offload_bytes (int): Payloads larger than this are handled in the process pool.
+
+    Returns:
+    - starlette.applications.Starlette: the application.
+    """
+    state = {'executor': None}
+    # Bounds the requests waiting on the pool, so a burst of cracks cannot use every thread
+    limiter = anyio.CapacityLimiter((workers or os.cpu_count() or 1) * 4)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        state['executor'] = ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+        try:
+            yield
+        finally:
+            state['executor'].shutdown(wait=True, cancel_futures=True)
+            get_logger().flush(timeout=5.0)
+
+    async def offload(cipher, operation, data):
+        executor = state['executor']
+        if executor is None:
+            # Served without the lifespan protocol: fall back to a worker thread
+            return await anyio.to_thread.run_sync(run_inline, cipher, operation, data, limiter=limiter)
+
+        try:
+            key = result_key(cipher, operation, data) if operation in ('encrypt', 'decrypt') else None
+        except ValueError as e:
+            return json.dumps({'error': str(e)}).encode('utf-8'), 400, 'application/json', {}
+        if key is not None:
+            cached = cached_response(key)
+            if cached is not None:
+                return to_parts(cached)
+
+        # The worker times its stages when this request is sampled
+        future = executor.submit(run_operation, cipher, operation, data, current_stages() is not None)
+        try:
+            content, status, mimetype, headers, entries, stages = await anyio.to_thread.run_sync(
+                future.result, abandon_on_cancel=True, limiter=limiter)
+        finally:
+            future.cancel()
+        add_stages(stages)
+        replay_logs(entries)
+        if key is not None and status == 200:
+            store_result(key, content, entries)
+            headers = {**headers, 'X-Cache': 'MISS'}
+        return content, status, mimetype, headers
+
+    async def respond(request, cipher, operation):
+        controller = cipher_controllers.get(cipher)
+        if controller is None or not hasattr(controller, operation):
+            return JSONResponse({'error': f'{operation.capitalize()} method for {cipher} not found.'}, status_code=400)
+
+        body = await request.body()
+        start = stage_start()
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            data = None
+        stage_end(JSON_PARSE, start)
+        if not isinstance(data, dict) or not data:
+            return JSONResponse({'error': 'Request body must be a JSON object.'}, status_code=400)
+
+        try:
+            if operation in OFFLOADED_OPERATIONS or len(body) > offload_bytes:
+                content, status, mimetype, headers = await offload(cipher, operation, data)
+            else:
+                content, status, mimetype, headers = run_inline(cipher, operation, data)
+        except Exception as e:
+            return JSONResponse({'error': str(e)}, status_code=500)
+        return Response(content, status_code=status, media_type=mimetype, headers=headers)
+
+    async def handle(request, operation):
+        cipher = request.path_params['cipher']
+        start = time.perf_counter()
+        stages = begin_request()
+        status = 500
+        try:
+            response = await respond(request, cipher, operation)
+            status = response.status_code
+            return response
+        finally:
+            end_request()
+            record_request(cipher, operation, status, time.perf_counter() - start, stages)
+
+    async def encrypt_route(request):
+        return await handle(request, 'encrypt')
+
+    async def decrypt_route(request):
+        return await handle(request, 'decrypt')
+
+    async def crack_route(request):
+        return await handle(request, 'crack')
+
+    async def metrics_route(request):
+        return Response(render(), media_type='text/plain; version=0.0.4')
+
+    return Starlette(
+        routes=[
+            Route('/encrypt/{cipher}', encrypt_route, methods=['POST']),
+            Route('/decrypt/{cipher}', decrypt_route, methods=['POST']),
+            Route('/crack/{cipher}', crack_route, methods=['POST']),
+            Route('/metrics', metrics_route, methods=['GET']),
+        ],
+        middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+        lifespan=lifespan,
+    )
+
+app = create_app(workers=int(os.environ.get('CIPHER_WORKERS', 0)) or None)
@@ -1,28 +1,15 @@
-import sqlite3
-import os
-from flask import jsonify
-from services.affine_service import encrypt_text, decrypt_text, crack_text
+from flask import Response, jsonify
+from services.log_service import log_operation
+from services.metrics_service import KEY_PARSE, KERNEL, SERIALIZE, stage_end, stage_start
+from services.parallel_service import transform
+from services.affine_service import crack_text, brute_force, encrypt_bytes, decrypt_bytes
 
 def log_affine_operation(operation, input_text, output_text, a, b, alphabet):
-    try:
-        # Connect to SQLite database
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        db_path = os.path.join(current_dir, '../..', 'encryption_log.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # Insert log into affine_log table
-        cursor.execute('''
-            INSERT INTO affine_log (operation, input_text, output_text, a, b, alphabet)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (operation, input_text, output_text, a, b, alphabet))
-
-        # Commit and close connection
-        conn.commit()
-        conn.close()
-
-    except Exception as e:
-        print(f"Error logging affine operation: {e}")
+    # Queue the row for the background writer; no disk I/O happens in the request
+    log_operation('''
+        INSERT INTO affine_log (operation, input_text, output_text, a, b, alphabet)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (operation, input_text, output_text, a, b, alphabet))
 
 def encrypt(data):
     """
@@ -33,6 +20,7 @@ def encrypt(data):
     - keyString: str, the key in the format "a,b".
     - alphabet: str, the alphabet to use for encryption.
     - cipher: str, should be 'affine' for Affine cipher.
+    - output: str, optional layout of the result: 'preserve' (default), 'preserve_case', 'strip' or 'blocks'.
 
     Returns:
     - JSON response with the encrypted text or an error message with a 400 status code.
@@ -41,6 +29,7 @@ def encrypt(data):
     key_string = data.get('keyString', '')
     alphabet = data.get('alphabet', '')
     cipher = data.get('cipher', '').lower()
+    output = data.get('output', 'preserve')
 
     try:
         # Validate the cipher type
@@ -50,12 +39,19 @@ def encrypt(data):
             raise ValueError("Alphabet cannot be empty.")
 
         # Parse the key string
+        start = stage_start()
         a, b = map(int, key_string.split(','))
-        encrypted_text = encrypt_text(input_text, a, b, alphabet)
+        stage_end(KEY_PARSE, start)
+        start = stage_start()
+        encrypted_text = transform('affine', 'encrypt', input_text, (a, b), alphabet, output=output)
+        stage_end(KERNEL, start)
 
         log_affine_operation('encrypt', input_text, encrypted_text, a, b, alphabet)
         
-        return jsonify({'encrypted_text': encrypted_text})
+        start = stage_start()
+        response = jsonify({'encrypted_text': encrypted_text})
+        stage_end(SERIALIZE, start)
+        return response
     except (ValueError, SyntaxError) as e:
         return jsonify({'error': f'Invalid input: {str(e)}'}), 400
 
@@ -68,6 +64,7 @@ def decrypt(data):
     - keyString: str, the key in the format "a,b".
     - alphabet: str, the alphabet to use for decryption.
     - cipher: str, should be 'affine' for Affine cipher.
+    - output: str, optional layout of the result: 'preserve' (default), 'preserve_case', 'strip' or 'blocks'.
 
     Returns:
     - JSON response with the decrypted text or an error message with a 400 status code.
@@ -76,6 +73,7 @@ def decrypt(data):
     key_string = data.get('keyString', '')
     alphabet = data.get('alphabet', '')
     cipher = data.get('cipher', '').lower()
+    output = data.get('output', 'preserve')
 
     try:
         # Validate the cipher type
@@ -85,34 +83,85 @@ def decrypt(data):
             raise ValueError("Alphabet cannot be empty.")
 
         # Parse the key string
+        start = stage_start()
         a, b = map(int, key_string.split(','))
-        decrypted_text = decrypt_text(input_text, a, b, alphabet)
+        stage_end(KEY_PARSE, start)
+        start = stage_start()
+        decrypted_text = transform('affine', 'decrypt', input_text, (a, b), alphabet, output=output)
+        stage_end(KERNEL, start)
 
         log_affine_operation('decrypt', input_text, decrypted_text, a, b, alphabet)
 
-        return jsonify({'decrypted_text': decrypted_text})
+        start = stage_start()
+        response = jsonify({'decrypted_text': decrypted_text})
+        stage_end(SERIALIZE, start)
+        return response
     except (ValueError, SyntaxError) as e:
         return jsonify({'error': f'Invalid input: {str(e)}'}), 400
 
 
+def transform_bytes(body, args, operation):
+    """
+    Encrypts or decrypts a raw binary body with the Affine cipher over Z_256.
+
+    Parameters:
+    - body: bytes, the application/octet-stream request body.
+    - args: the query string, with keyString in the format "a,b" (a must be odd).
+    - operation: str, 'encrypt' or 'decrypt'.
+
+    Returns:
+    - application/octet-stream response with the transformed bytes, or an error message with a 400 status code.
+    """
+    try:
+        start = stage_start()
+        a, b = map(int, args.get('keyString', '').split(','))
+        stage_end(KEY_PARSE, start)
+        start = stage_start()
+        result = encrypt_bytes(body, a, b) if operation == 'encrypt' else decrypt_bytes(body, a, b)
+        stage_end(KERNEL, start)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid input: {str(e)}'}), 400
+
+    # Binary bodies are logged by size only
+    log_affine_operation(operation, f'<{len(body)} bytes>', f'<{len(result)} bytes>', a, b, 'bytes')
+
+    return Response(result, mimetype='application/octet-stream')
+
+def encrypt_bytes_body(body, args):
+    return transform_bytes(body, args, 'encrypt')
+
+def decrypt_bytes_body(body, args):
+    return transform_bytes(body, args, 'decrypt')
+
 def crack(data):
     """
     Determines 'a' and 'b' values based on the two most frequent letters
     in the ciphertext, mapped to 'E' and 'T' in plaintext.
 
+    With mode 'bruteforce', the ciphertext alone is used instead: every valid key
+    is scored against English letter frequencies and the best candidates are returned.
+
     Parameters (JSON payload):
-    - inputText: str, the ciphertext (not directly used in this function).
-    - keyString: str, the two most frequent letters in the ciphertext (e.g., "J,X").
-    - alphabet: str, the custom alphabet to use.
+    - inputText: str, the two most frequent letters in the ciphertext (e.g., "J,X"),
+      or the ciphertext itself in 'bruteforce' mode.
+    - alphabet: str, the custom alphabet to use ('bruteforce' mode only).
+    - mode: str, 'frequency' (default) or 'bruteforce'.
+    - topK: int, the number of candidates to return in 'bruteforce' mode (default 5).
     - cipher: str, should be 'affine'.
 
     Returns:
     - A string in the format "a=..., b=..." or an error message.
+      In 'bruteforce' mode, the best key as "a=..., b=..." plus a 'candidates' list
+      of {a, b, score, preview}, best first.
     """
     input_text = data.get('inputText', '')
+    mode = data.get('mode', 'frequency').lower()
     alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
     #alphabet = data.get('alphabet', '')
 
+    if mode == 'bruteforce':
+        return crack_bruteforce(data)
+
     if not input_text or not alphabet:
         return "Error: Missing required parameters: inputText or alphabet.", 400
 
@@ -130,4 +179,32 @@ def crack(data):
     except ValueError as e:
         return str(e), 400
     except Exception as e:
-        return "An unexpected error occurred.", 500
\ No newline at end of file
+        return "An unexpected error occurred.", 500
+
+def crack_bruteforce(data):
+    """
+    Cracks the Affine cipher from the ciphertext alone by scoring every valid (a, b) key.
+
+    Parameters (JSON payload):
+    - inputText: str, the ciphertext to crack.
+    - alphabet: str, the alphabet to use (default "ABCDEFGHIJKLMNOPQRSTUVWXYZ").
+    - topK: int, the number of candidates to return (default 5).
+
+    Returns:
+    - JSON response with the best key and the ranked candidates, or an error message with a 400 status code.
+    """
+    input_text = data.get('inputText', '')
+    alphabet = data.get('alphabet') or "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+    try:
+        if not input_text:
+            raise ValueError("Missing required parameter: inputText.")
+        top_k = int(data.get('topK', 5))
+        candidates = brute_force(input_text, alphabet, top_k=top_k)
+        a, b = candidates[0]['a'], candidates[0]['b']
+
+        log_affine_operation('crack', input_text, f"a={a}, b={b}", a, b, alphabet)
+
+        return jsonify({'encrypted_text': f"a={a}, b={b}", 'candidates': candidates})
+    except ValueError as e:
+        return jsonify({'error': f'Invalid input: {str(e)}'}), 400
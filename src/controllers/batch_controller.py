@@ -0,0 +1,124 @@
+from flask import jsonify
+from services.log_service import log_transaction
+from services import affine_service, vigenere_service, hill_service, playfair_service, mono_alphabetic_service
+from controllers.affine_controller import log_affine_operation
+from controllers.vigenere_controller import log_vigenere_operation
+from controllers.hill_controller import log_hill_operation, parse_key_string
+from controllers.playfair_controller import is_valid_key, log_playfair_operation
+from controllers.mono_alphabetic_controller import log_mono_alphabetic_operation
+
+DEFAULT_ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# Largest number of jobs accepted in one batch
+MAX_BATCH_JOBS = 10000
+
+RESULT_KEYS = {'encrypt': 'encrypted_text', 'decrypt': 'decrypted_text'}
+
+
+def compile_group(cipher, key_string, alphabet):
+    """
+    Parse and validate a key once for a whole group of jobs.
+
+    Returns:
+    - tuple:
+        - function(texts, op): the bulk kernel of the cipher for this key.
+        - function(op, input_text, result_text): writes the operation log row of one job.
+
+    Raises:
+    - ValueError: if the cipher or the key is invalid.
+    """
+    if not alphabet:
+        raise ValueError("Alphabet cannot be empty.")
+
+    if cipher == 'affine':
+        a, b = map(int, key_string.split(','))
+        affine_service.compile_key(a, b, alphabet)
+        return (lambda texts, op: affine_service.transform_many(texts, a, b, alphabet, op),
+                lambda op, text, result: log_affine_operation(op, text, result, a, b, alphabet))
+    if cipher == 'vigenere':
+        if not key_string.isalpha():
+            raise ValueError("Key must be an alphabetic string.")
+        vigenere_service.validate_alphabet(alphabet)
+        return (lambda texts, op: vigenere_service.transform_many(texts, key_string, alphabet, op),
+                lambda op, text, result: log_vigenere_operation(op, text, key_string, result, alphabet))
+    if cipher == 'hill':
+        matrix = parse_key_string(key_string)
+        return (lambda texts, op: hill_service.transform_many(texts, matrix, alphabet, op),
+                lambda op, text, result: log_hill_operation(op, text, key_string, alphabet, result))
+    if cipher == 'playfair':
+        if not is_valid_key(key_string):
+            raise ValueError("Invalid key. Key must be a string of alphabetic characters only.")
+        return (lambda texts, op: playfair_service.transform_many(texts, key_string, op),
+                lambda op, text, result: log_playfair_operation(op, text, key_string, result))
+    if cipher == 'mono_alphabetic':
+        if len(key_string) != 26 or not key_string.isalpha():
+            raise ValueError("Key must be a 26-character alphabetic string.")
+        return (lambda texts, op: mono_alphabetic_service.transform_many(texts, key_string, op),
+                lambda op, text, result: log_mono_alphabetic_operation(op, text, key_string, result))
+    raise ValueError(f"Batch method for {cipher} not found.")
+
+def run(data):
+    """
+    Runs many encrypt and decrypt jobs in one request.
+
+    Jobs are grouped by (cipher, op, keyString, alphabet): each key is parsed and compiled
+    once and all the texts of a group go through the cipher's bulk kernel together. If a
+    group fails as a whole, its jobs are retried one by one so each gets its own error.
+    The log rows of the whole batch are written in a single transaction.
+
+    Parameters (JSON payload):
+    - jobs: list of {cipher, op, inputText, keyString, alphabet}, where op is 'encrypt'
+      or 'decrypt' and alphabet is optional (default A-Z).
+
+    Returns:
+    - JSON response with 'results', one per job in order: {'encrypted_text'} or
+      {'decrypted_text'} on success, {'error'} otherwise.
+    """
+    jobs = data.get('jobs') if isinstance(data, dict) else data
+    if not isinstance(jobs, list):
+        return jsonify({'error': 'Jobs must be a list.'}), 400
+    if len(jobs) > MAX_BATCH_JOBS:
+        return jsonify({'error': f'A batch holds at most {MAX_BATCH_JOBS} jobs.'}), 400
+
+    results = [None] * len(jobs)
+    groups = {}
+    for position, job in enumerate(jobs):
+        if not isinstance(job, dict):
+            results[position] = {'error': 'Job must be an object.'}
+            continue
+        op = str(job.get('op', '')).lower()
+        if op not in RESULT_KEYS:
+            results[position] = {'error': 'Invalid op. Use "encrypt" or "decrypt".'}
+            continue
+        group = (str(job.get('cipher', '')).lower(), op, str(job.get('keyString', '')),
+                 str(job.get('alphabet', DEFAULT_ALPHABET)))
+        groups.setdefault(group, []).append(position)
+
+    with log_transaction():
+        for (cipher, op, key_string, alphabet), positions in groups.items():
+            try:
+                kernel, log = compile_group(cipher, key_string, alphabet)
+            except (ValueError, SyntaxError) as e:
+                for position in positions:
+                    results[position] = {'error': f'Invalid input: {str(e)}'}
+                continue
+
+            texts = [str(jobs[position].get('inputText', '')) for position in positions]
+            try:
+                outputs = kernel(texts, op)
+            except ValueError:
+                outputs = []
+                for text in texts:
+                    try:
+                        outputs.append(kernel([text], op)[0])
+                    except ValueError as e:
+                        outputs.append(e)
+
+            for position, text, output in zip(positions, texts, outputs):
+                if isinstance(output, Exception):
+                    results[position] = {'error': str(output)}
+                    continue
+                log(op, text, output)
+                results[position] = {RESULT_KEYS[op]: output}
+
+    return jsonify({'results': results})
@@ -1,35 +1,97 @@
 from flask import request, jsonify
-from services.euclid_service import modular_inverse, format_table
+from services.euclid_service import modular_inverse, batch_modular_inverse, format_table
 
-def encrypt():
+# Largest number of values inverted in one request
+MAX_BATCH_VALUES = 1_000_000
+
+TRUE_VALUES = {'true', '1', 'yes', 'on'}
+FALSE_VALUES = {'false', '0', 'no', 'off', ''}
+
+def parse_flag(value, name):
+    """
+    Reads a boolean parameter given as a JSON boolean or as a string such as 'true' or '0'.
+
+    Raises:
+    - ValueError: if the value is not a recognised boolean.
+    """
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f'Parameter "{name}" must be true or false.')
+
+def encrypt(data=None):
     """
     Calculates the modular inverse of a given number using the Euclidean algorithm.
 
-    Parameters:
-    - a (int): The number to find the inverse of, provided in the request arguments.
-    - mod (int): The modulus under which to calculate the inverse, provided in the request arguments.
-    - cipher (str): Cipher type, expected to be 'euclid', provided in the request arguments.
+    A list of values can be given instead of a single number; they are inverted together
+    with Montgomery's batch inversion trick.
+
+    Parameters (JSON payload, or request arguments when there is no payload):
+    - a (int): The number to find the inverse of.
+    - values (list of int): The numbers to find the inverses of, instead of 'a'.
+    - mod (int): The modulus under which to calculate the inverse.
+    - table (bool): Whether to return the step tables of a list of values (default False);
+      strings such as 'true', '1', 'yes' or 'false', '0', 'no' are accepted.
+    - cipher (str): Cipher type, expected to be 'euclid'.
 
     Returns:
     - JSON response containing:
         - 'inverse' (int): The modular inverse if it exists.
         - 'table' (str): A formatted string representing each step in the Euclidean algorithm.
       If an inverse does not exist, returns an error message and status code 400.
+      For a list of values:
+        - 'inverses' (list): The inverse of each value, null where it does not exist.
+        - 'nonInvertible' (list of int): The positions of the values without an inverse.
+        - 'tables' (list of str): The formatted step table of each value, if requested.
     """
-    a = request.args.get('a', type=int)
-    mod = request.args.get('mod', type=int)
-    cipher = request.args.get('cipher', '').lower()
+    source = data if data else request.args
+    cipher = str(source.get('cipher', '')).lower()
 
     if cipher != 'euclid':
         return jsonify({'error': 'Invalid cipher type. Use "cipher=euclid".'}), 400
 
+    if 'values' in source:
+        return encrypt_batch(source)
+
+    try:
+        a = int(source.get('a'))
+        mod = int(source.get('mod'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Parameters "a" and "mod" must be integers.'}), 400
+
     inverse, table = modular_inverse(a, mod)
     if inverse is None:
         return jsonify({'error': f'No modular inverse for {a} mod {mod}', 'table': format_table(table)}), 400
 
     return jsonify({'inverse': inverse, 'table': format_table(table)})
 
-def decrypt():
+def encrypt_batch(source):
+    """
+    Calculates the modular inverses of a list of values under one modulus.
+    """
+    values = source.get('values')
+    try:
+        if not isinstance(values, list):
+            raise ValueError('Parameter "values" must be a list of integers.')
+        if len(values) > MAX_BATCH_VALUES:
+            raise ValueError(f'At most {MAX_BATCH_VALUES} values can be inverted at once.')
+        values = [int(value) for value in values]
+        mod = int(source.get('mod'))
+        with_tables = parse_flag(source.get('table', False), 'table')
+        inverses, non_invertible, tables = batch_modular_inverse(values, mod, with_tables)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    result = {'inverses': inverses, 'nonInvertible': non_invertible}
+    if tables is not None:
+        result['tables'] = [format_table(table) for table in tables]
+    return jsonify(result)
+
+def decrypt(data=None):
     """
     Returns an error response indicating that decryption is unsupported for the Euclidean cipher.
 
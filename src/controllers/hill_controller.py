@@ -1,31 +1,18 @@
-import sqlite3
-import os
 from flask import jsonify
-from services.hill_service import encrypt_text, decrypt_text
+from services.log_service import log_operation
+from services.metrics_service import KEY_PARSE, KERNEL, SERIALIZE, stage_end, stage_start
+from services.parallel_service import transform
+from services.hill_service import crack_text
 import numpy as np
 
 
 # Helper function to log data into the database
 def log_hill_operation(operation, input_text, key_string, alphabet, result_text):
-    try:
-        # Connect to SQLite database
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        db_path = os.path.join(current_dir, '../..', 'encryption_log.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # Insert log into hill_log table
-        cursor.execute('''
-            INSERT INTO hill_log (operation, input_text, matrix, alphabet, output_text)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (operation, input_text, key_string, alphabet, result_text))
-
-        # Commit and close connection
-        conn.commit()
-        conn.close()
-
-    except Exception as e:
-        print(f"Error logging Hill operation: {e}")
+    # Queue the row for the background writer; no disk I/O happens in the request
+    log_operation('''
+        INSERT INTO hill_log (operation, input_text, matrix, alphabet, output_text)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (operation, input_text, key_string, alphabet, result_text))
 
 def parse_key_string(key_string):
     """
@@ -56,6 +43,7 @@ def encrypt(data):
     - keyString: str, the key string in the format "1,2,3,4".
     - alphabet: str, the alphabet to use for encryption.
     - cipher: str, the cipher type, expected to be 'hill'.
+    - output: str, optional layout of the result: 'preserve' (default), 'preserve_case', 'strip' or 'blocks'.
 
     Returns:
     - JSON response with:
@@ -65,6 +53,7 @@ def encrypt(data):
     key_string = data.get ( 'keyString', '' )
     alphabet = data.get ( 'alphabet', '' )
     cipher = data.get ( 'cipher', '' ).lower ()
+    output = data.get ( 'output', 'preserve' )
 
     try:
         if cipher != 'hill':
@@ -73,12 +62,19 @@ def encrypt(data):
             raise ValueError ( "Alphabet cannot be empty." )
 
         # Parse the key string into a matrix
+        start = stage_start ( )
         key_matrix = parse_key_string ( key_string )
-        encrypted_text = encrypt_text ( input_text, key_matrix, alphabet )
+        stage_end ( KEY_PARSE, start )
+        start = stage_start ( )
+        encrypted_text = transform ( 'hill', 'encrypt', input_text, key_matrix, alphabet, output=output )
+        stage_end ( KERNEL, start )
 
         log_hill_operation('encrypt', input_text, key_string, alphabet, encrypted_text)
 
-        return jsonify ( {'encrypted_text': encrypted_text} )
+        start = stage_start ( )
+        response = jsonify ( {'encrypted_text': encrypted_text} )
+        stage_end ( SERIALIZE, start )
+        return response
     except ValueError as e:
         return jsonify ( {'error': str ( e )} ), 400
 
@@ -92,6 +88,7 @@ def decrypt(data):
     - keyString: str, the key string in the format "1,2,3,4".
     - alphabet: str, the alphabet to use for decryption.
     - cipher: str, the cipher type, expected to be 'hill'.
+    - output: str, optional layout of the result: 'preserve' (default), 'preserve_case', 'strip' or 'blocks'.
 
     Returns:
     - JSON response with:
@@ -101,6 +98,7 @@ def decrypt(data):
     key_string = data.get ( 'keyString', '' )
     alphabet = data.get ( 'alphabet', '' )
     cipher = data.get ( 'cipher', '' ).lower ()
+    output = data.get ( 'output', 'preserve' )
 
     try:
         if cipher != 'hill':
@@ -109,11 +107,59 @@ def decrypt(data):
             raise ValueError ( "Alphabet cannot be empty." )
 
         # Parse the key string into a matrix
+        start = stage_start ( )
         key_matrix = parse_key_string ( key_string )
-        decrypted_text, _ = decrypt_text ( input_text, key_matrix, alphabet )
+        stage_end ( KEY_PARSE, start )
+        start = stage_start ( )
+        decrypted_text = transform ( 'hill', 'decrypt', input_text, key_matrix, alphabet, output=output )
+        stage_end ( KERNEL, start )
 
         log_hill_operation('decrypt', input_text, key_string, alphabet, decrypted_text)
 
-        return jsonify ( {'decrypted_text': decrypted_text} )
+        start = stage_start ( )
+        response = jsonify ( {'decrypted_text': decrypted_text} )
+        stage_end ( SERIALIZE, start )
+        return response
+    except ValueError as e:
+        return jsonify ( {'error': str ( e )} ), 400
+
+
+def crack(data):
+    """
+    Recovers the Hill key matrix from a ciphertext and a known plaintext fragment (crib).
+
+    Parameters (JSON payload):
+    - inputText: str, the ciphertext to crack.
+    - crib: str, known plaintext contained in the message, at an unknown position.
+    - alphabet: str, the alphabet used for encryption.
+    - matrixSize: int, 2 or 3 (optional, both are tried by default).
+    - topK: int, the number of key candidates to return (optional, default 5).
+    - cipher: str, the cipher type, expected to be 'hill'.
+
+    Returns:
+    - JSON response with:
+        - encrypted_text: str, the most likely key string in the format "1,2,3,4".
+        - candidates: list, the consistent key candidates ranked by plaintext fitness.
+    """
+    input_text = data.get ( 'inputText', '' )
+    crib = data.get ( 'crib', '' )
+    alphabet = data.get ( 'alphabet', '' )
+    cipher = data.get ( 'cipher', '' ).lower ()
+
+    try:
+        if cipher != 'hill':
+            raise ValueError ( "Invalid cipher type. Only 'hill' is supported." )
+        if not alphabet:
+            raise ValueError ( "Alphabet cannot be empty." )
+        if not input_text or not crib:
+            raise ValueError ( "Ciphertext and crib cannot be empty." )
+
+        matrix_size = data.get ( 'matrixSize' )
+        top_k = int ( data.get ( 'topK', 5 ) )
+        candidates = crack_text ( input_text, crib, alphabet, size=matrix_size, top_k=top_k )
+        if not candidates:
+            raise ValueError ( "No key matrix is consistent with the crib." )
+
+        return jsonify ( {'encrypted_text': candidates[0]['keyString'], 'candidates': candidates} )
     except ValueError as e:
         return jsonify ( {'error': str ( e )} ), 400
@@ -0,0 +1,72 @@
+from flask import Response, jsonify
+from services.job_service import QueueFullError, get_job_queue
+from controllers.pool_controller import run_operation
+
+def run_crack(cipher, data):
+    """
+    Runs one crack job in a worker process.
+
+    Returns:
+    - tuple: (body, status, mimetype, log_entries)
+    """
+    body, status, mimetype, _, entries, _ = run_operation(cipher, 'crack', data)
+    return body, status, mimetype, entries
+
+def submit(cipher, data):
+    """
+    Queues a crack request and returns at once.
+
+    Parameters:
+    - cipher (str): The cipher to crack, as in /crack/<cipher>.
+    - data (dict): The JSON payload of the crack request.
+
+    Returns:
+    - JSON response with 'jobId' and 'status' and a 202 status code, an error message with
+      a 400 status code for a missing payload, or with a 429 status code when too many
+      jobs are already queued or running.
+    """
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object.'}), 400
+    try:
+        job_id = get_job_queue(run_crack).submit(cipher, data)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 429
+    return jsonify({'jobId': job_id, 'status': 'queued'}), 202
+
+def status(job_id):
+    """
+    Returns the state of a job: jobId, cipher, status ('queued', 'running', 'done',
+    'failed' or 'cancelled'), createdAt, finishedAt and expiresAt.
+    Unknown and expired jobs give a 404 status code.
+    """
+    job = get_job_queue(run_crack).get(job_id)
+    if job is None:
+        return jsonify({'error': f'Job {job_id} not found.'}), 404
+    return jsonify(job)
+
+def result(job_id):
+    """
+    Returns the response of a finished job, exactly as /crack/<cipher> would have.
+    Jobs that are not done give a 409 status code with their status, unknown and
+    expired jobs a 404 status code.
+    """
+    found = get_job_queue(run_crack).result(job_id)
+    if found is None:
+        return jsonify({'error': f'Job {job_id} not found.'}), 404
+    job_status, body, status_code, mimetype = found
+    if job_status not in ('done', 'failed'):
+        return jsonify({'error': f'Job {job_id} has no result.', 'status': job_status}), 409
+    return Response(body, status=status_code, mimetype=mimetype)
+
+def cancel(job_id):
+    """
+    Cancels a job that has not finished. A running job is marked cancelled and its
+    result is discarded. Finished jobs give a 409 status code, unknown ones a 404.
+    """
+    jobs = get_job_queue(run_crack)
+    if jobs.cancel(job_id):
+        return jsonify({'jobId': job_id, 'status': 'cancelled'})
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Job {job_id} not found.'}), 404
+    return jsonify({'error': f'Job {job_id} has already finished.', 'status': job['status']}), 409
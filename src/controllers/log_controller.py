@@ -0,0 +1,32 @@
+from flask import Response, jsonify, stream_with_context
+from services.log_service import query_logs, stream_logs
+
+def query(cipher, args):
+    """
+    Streams the operation log of a cipher as JSON lines.
+
+    Parameters (query string):
+    - operation: str, only return rows of this operation, e.g. 'encrypt' (optional).
+    - since: str, only return rows at or after this timestamp, "YYYY-MM-DD HH:MM:SS" (optional).
+    - until: str, only return rows before this timestamp (optional).
+    - after: str, the 'next_cursor' returned by the previous page (optional).
+    - limit: int, the page size (optional, default 100).
+
+    Returns:
+    - application/x-ndjson response with one log row per line, followed by a line holding
+      'next_cursor' (null on the last page), or an error message with a 400 status code.
+    """
+    limit = args.get('limit', 100)
+    try:
+        rows = query_logs(
+            cipher,
+            operation=args.get('operation'),
+            since=args.get('since'),
+            until=args.get('until'),
+            after=args.get('after'),
+            limit=limit,
+        )
+    except ValueError as e:
+        return jsonify({'error': f'Invalid input: {str(e)}'}), 400
+
+    return Response(stream_with_context(stream_logs(rows, limit)), mimetype='application/x-ndjson')
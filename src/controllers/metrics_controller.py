@@ -0,0 +1,37 @@
+import time
+
+from flask import Response, g, request
+from services.metrics_service import begin_request, end_request, record_request, render
+
+def install(app):
+    """
+    Registers the request hooks that time every request.
+
+    Each request is labelled with its route, the first segment of the matched URL rule
+    (e.g. 'encrypt', 'decrypt' or 'crack'), and its cipher when the URL has one. The stages
+    timed inside a sampled request with stage_start and stage_end are recorded under the same labels.
+    """
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_stages = begin_request()
+
+    @app.after_request
+    def record_latency(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            rule = request.url_rule.rule if request.url_rule is not None else ''
+            route = rule.strip('/').split('/', 1)[0] or 'unmatched'
+            cipher = (request.view_args or {}).get('cipher', '')
+            record_request(cipher, route, response.status_code, time.perf_counter() - start, g.metrics_stages)
+        return response
+
+    @app.teardown_request
+    def stop_timer(exc):
+        end_request()
+
+def export():
+    """
+    Returns the request metrics in the Prometheus text exposition format.
+    """
+    return Response(render(), mimetype='text/plain; version=0.0.4')
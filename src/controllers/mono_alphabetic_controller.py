@@ -1,30 +1,17 @@
-import sqlite3
-import os
 from flask import jsonify
-from services.mono_alphabetic_service import encrypt_text, decrypt_text
+from services.log_service import log_operation
+from services.metrics_service import KERNEL, SERIALIZE, stage_end, stage_start
+from services.parallel_service import pool_size, transform
+from services.mono_alphabetic_service import crack_text
 
 
 # Helper function to log data into the database
 def log_mono_alphabetic_operation(operation, input_text, key, result_text):
-    try:
-        # Connect to SQLite database
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        db_path = os.path.join(current_dir, '../..', 'encryption_log.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # Insert log into mono_alphabetic_log table
-        cursor.execute('''
-            INSERT INTO mono_alphabetic_log (operation, input_text, key, output_text)
-            VALUES (?, ?, ?, ?)
-        ''', (operation, input_text, key, result_text))
-
-        # Commit and close connection
-        conn.commit()
-        conn.close()
-
-    except Exception as e:
-        print(f"Error logging Mono-Alphabetic operation: {e}")
+    # Queue the row for the background writer; no disk I/O happens in the request
+    log_operation('''
+        INSERT INTO mono_alphabetic_log (operation, input_text, key, output_text)
+        VALUES (?, ?, ?, ?)
+    ''', (operation, input_text, key, result_text))
 
 def encrypt(request):
     """
@@ -51,11 +38,16 @@ def encrypt(request):
     if len(key) != 26 or not key.isalpha():
         return jsonify({'error': 'Key must be a 26-character alphabetic string.'}), 400
 
-    encrypted_text = encrypt_text(text, key)
+    start = stage_start()
+    encrypted_text = transform('mono_alphabetic', 'encrypt', text, key)
+    stage_end(KERNEL, start)
 
     log_mono_alphabetic_operation('encrypt', text, key, encrypted_text)
 
-    return jsonify({'encrypted_text': encrypted_text})
+    start = stage_start()
+    response = jsonify({'encrypted_text': encrypted_text})
+    stage_end(SERIALIZE, start)
+    return response
 
 def decrypt(request):
     """
@@ -81,8 +73,53 @@ def decrypt(request):
     if len(key) != 26 or not key.isalpha():
         return jsonify({'error': 'Key must be a 26-character alphabetic string.'}), 400
 
-    decrypted_text = decrypt_text(text, key)
+    start = stage_start()
+    decrypted_text = transform('mono_alphabetic', 'decrypt', text, key)
+    stage_end(KERNEL, start)
 
     log_mono_alphabetic_operation('decrypt', text, key, decrypted_text)
 
-    return jsonify({'decrypted_text': decrypted_text})
\ No newline at end of file
+    start = stage_start()
+    response = jsonify({'decrypted_text': decrypted_text})
+    stage_end(SERIALIZE, start)
+    return response
+
+def crack(request):
+    """
+    Recovers the key of a mono-alphabetic ciphertext without knowing it.
+
+    Parameters:
+    - text (str): Encrypted text to crack, provided in the request arguments.
+    - cipher (str): Cipher type, expected to be 'mono_alphabetic', provided in the request arguments.
+    - restarts (int): Number of hill-climbing restarts (optional, default 40).
+    - workers (int): Number of pool workers the restarts are spread over (optional, default and
+      at most one per core of the shared pool).
+
+    Returns:
+    - JSON response containing:
+        - 'encrypted_text' (str): The recovered 26-character key.
+        - 'decrypted_text' (str): The ciphertext decrypted with that key.
+        - 'confidence' (float): How close the decryption is to English, from 0 to 1.
+      In case of errors, returns a JSON response with an error message and status code 400.
+    """
+    text = request.get('inputText', '')
+    cipher = request.get('cipher', '').lower()
+
+    if cipher != 'mono_alphabetic':
+        return jsonify({'error': 'Invalid cipher type. Use "cipher=mono_alphabetic".'}), 400
+
+    try:
+        restarts = int(request.get('restarts', 40))
+        workers = int(request.get('workers', pool_size()))
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+        result = crack_text(text, restarts=restarts, workers=min(workers, pool_size()))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'encrypted_text': result['key'],
+        'decrypted_text': result['decrypted_text'],
+        'score': result['score'],
+        'confidence': result['confidence'],
+    })
@@ -1,7 +1,10 @@
-import sqlite3
-import os
 from flask import request, jsonify
-from services.playfair_service import playfair_encryption, playfair_decryption, create_playfair_key_matrix
+from services.log_service import log_operation
+from services.metrics_service import KERNEL, SERIALIZE, stage_end, stage_start
+from services.playfair_service import playfair_encryption, playfair_decryption, create_playfair_key_matrix, crack_playfair
+
+# Layouts of the result; the digrams change the number of letters, so the case cannot be kept in place
+PLAYFAIR_OUTPUT_MODES = ('preserve', 'strip', 'blocks')
 
 # Define a helper function to validate the key
 def is_valid_key(key):
@@ -10,56 +13,54 @@ def is_valid_key(key):
 
 # Helper function to log Playfair operations
 def log_playfair_operation(operation, input_text, key, result_text):
-    try:
-        # Connect to SQLite database
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        db_path = os.path.join(current_dir, '../..', 'encryption_log.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # Insert log into playfair_log table
-        cursor.execute('''
-            INSERT INTO playfair_log (operation, input_text, key, output_text)
-            VALUES (?, ?, ?, ?)
-        ''', (operation, input_text, key, result_text))
-
-        # Commit and close connection
-        conn.commit()
-        conn.close()
-
-    except Exception as e:
-        print(f"Error logging Playfair operation: {e}")
+    # Queue the row for the background writer; no disk I/O happens in the request
+    log_operation('''
+        INSERT INTO playfair_log (operation, input_text, key, output_text)
+        VALUES (?, ?, ?, ?)
+    ''', (operation, input_text, key, result_text))
 
 def encrypt(request):
     '''Encrypts plaintext using Playfair cipher after getting the necessary input parameters from the user.
     parameters:
     text = plaintext obtained from the user
     key = key obtained from the user 
+    output = optional layout of the result: 'preserve' (default), 'strip' or 'blocks'
     '''
     text = request.get('inputText', '')
     key = request.get('keyString', '')
     cipher = request.get('cipher', '').lower()
+    output = request.get('output', 'preserve')
     if cipher != 'playfair':
         return jsonify({'error': 'Invalid cipher type. Use "cipher=playfair".'}), 400
     if not is_valid_key(key):
      return jsonify({"error": "Invalid key. Key must be a string of alphabetic characters only."}), 400
 
     # Call the Playfair encryption function
-    encrypted_text = playfair_encryption(text, key)
+    if output not in PLAYFAIR_OUTPUT_MODES:
+        return jsonify({"error": "Invalid output. Use 'preserve', 'strip' or 'blocks'."}), 400
+
+    start = stage_start()
+    encrypted_text = playfair_encryption(text, key, output)
+    stage_end(KERNEL, start)
 
     log_playfair_operation('encrypt', text, key, encrypted_text)
 
-    return jsonify({"encrypted_text": encrypted_text})
+    start = stage_start()
+    response = jsonify({"encrypted_text": encrypted_text})
+    stage_end(SERIALIZE, start)
+    return response
 
 def decrypt(request):
     '''Decrypts ciphertext using Playfair cipher after getting the necessary input parameters from the user.
     parameters:
     text = ciphertext obtained from the user
     key = key obtained from the user 
+    output = optional layout of the result: 'preserve' (default), 'strip' or 'blocks'
     '''
     text = request.get('inputText', '')
     key = request.get('keyString', '')
     cipher = request.get('cipher', '').lower()
+    output = request.get('output', 'preserve')
 
     if cipher != 'playfair':
         return jsonify({'error': 'Invalid cipher type. Use "cipher=playfair".'}), 400
@@ -68,9 +69,40 @@ def decrypt(request):
         return jsonify({"error": "Invalid key. Key must be a string of alphabetic characters only."}), 400
 
     # Call the Playfair decryption function
-    decrypted_text = playfair_decryption(text, key)
+    if output not in PLAYFAIR_OUTPUT_MODES:
+        return jsonify({"error": "Invalid output. Use 'preserve', 'strip' or 'blocks'."}), 400
+
+    start = stage_start()
+    decrypted_text = playfair_decryption(text, key, output)
+    stage_end(KERNEL, start)
 
     log_playfair_operation('decrypt', text, key, decrypted_text)
 
-    return jsonify({'decrypted_text': decrypted_text})
-  
+    start = stage_start()
+    response = jsonify({'decrypted_text': decrypted_text})
+    stage_end(SERIALIZE, start)
+    return response
+
+# Search time of a crack request, in seconds; longer searches belong on the /jobs queue
+DEFAULT_CRACK_TIME_BUDGET = 30.0
+MAX_CRACK_TIME_BUDGET = 120.0
+
+def crack(request):
+    '''Recovers the Playfair key square of a ciphertext with simulated annealing.
+    parameters:
+    text = ciphertext obtained from the user
+    timeBudget = search time in seconds (optional, default 30, at most 120)
+    '''
+    text = request.get('inputText', '')
+    cipher = request.get('cipher', '').lower()
+
+    if cipher != 'playfair':
+        return jsonify({'error': 'Invalid cipher type. Use "cipher=playfair".'}), 400
+
+    try:
+        time_budget = min(float(request.get('timeBudget', DEFAULT_CRACK_TIME_BUDGET)), MAX_CRACK_TIME_BUDGET)
+        result = crack_playfair(text, time_budget=time_budget)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({'encrypted_text': result['key'], 'score': result['score'], 'decrypted_text': result['plaintext']})
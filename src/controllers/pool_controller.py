@@ -0,0 +1,46 @@
+from flask import Response
+from services.log_service import capture_logs
+from services.metrics_service import begin_request, end_request
+
+def to_parts(result):
+    """
+    Converts a controller result to (body, status, mimetype, headers).
+
+    Controllers return a Flask response, a (response, status) tuple or a (str, status) tuple.
+    """
+    status = None
+    if isinstance(result, tuple):
+        result, status = result[0], result[1]
+    if isinstance(result, Response):
+        headers = {'X-Cache': result.headers['X-Cache']} if 'X-Cache' in result.headers else {}
+        return result.get_data(), status or result.status_code, result.mimetype, headers
+    return str(result).encode('utf-8'), status or 200, 'text/plain', {}
+
+def run_operation(cipher, operation, data, sampled=False):
+    """
+    Runs one controller operation in a worker process.
+
+    Rows logged by the controller are not written from the worker; they are returned and
+    queued on the audit logger of the serving process, which stays the only writer. The
+    stage timings are returned the same way, to be recorded with the serving request.
+
+    Parameters:
+    - cipher (str): The cipher name, a key of main.cipher_controllers.
+    - operation (str): 'encrypt', 'decrypt' or 'crack'.
+    - data (dict): The JSON payload.
+    - sampled (bool): Whether to time the stages of the operation.
+
+    Returns:
+    - tuple: (body, status, mimetype, headers, log_entries, stages); stages is None unless sampled.
+    """
+    # Imported here because main imports the controllers
+    from main import app, cipher_controllers
+
+    stages = begin_request(sampled)
+    try:
+        with app.app_context(), capture_logs() as entries:
+            result = getattr(cipher_controllers[cipher], operation)(data)
+            parts = to_parts(result)
+    finally:
+        end_request()
+    return (*parts, entries, stages)
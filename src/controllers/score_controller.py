@@ -0,0 +1,38 @@
+from flask import jsonify
+from services.ngram_service import score_batch
+
+# Largest number of texts scored in one request
+MAX_SCORE_TEXTS = 10000
+
+def score(data):
+    """
+    Scores how close texts are to English with the n-gram language model.
+
+    Parameters (JSON payload):
+    - texts: list of str, the candidate plaintexts to score (or inputText for a single one).
+    - order: int, the n-gram order from 1 (letters) to 4 (quadgrams), default 4.
+
+    Returns:
+    - JSON response with 'scores', one per text in order, each with:
+        - 'score': float, the sum of the n-gram log10 probabilities.
+        - 'ngrams': int, the number of n-grams scored.
+        - 'perNgram': float, the mean log10 probability (None for texts that are too short).
+      Higher scores are closer to English. Errors return a 400 status code.
+    """
+    texts = data.get('texts')
+    if texts is None:
+        texts = [data.get('inputText', '')]
+
+    try:
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            raise ValueError("Texts must be a list of strings.")
+        if len(texts) > MAX_SCORE_TEXTS:
+            raise ValueError(f"At most {MAX_SCORE_TEXTS} texts can be scored at once.")
+        scores, counts = score_batch(texts, int(data.get('order', 4)))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid input: {str(e)}'}), 400
+
+    return jsonify({'scores': [
+        {'score': float(score), 'ngrams': int(count), 'perNgram': float(score) / int(count) if count else None}
+        for score, count in zip(scores, counts)
+    ]})
@@ -0,0 +1,124 @@
+import json
+
+from flask import Response, jsonify, stream_with_context
+from controllers.affine_controller import log_affine_operation
+from controllers.hill_controller import log_hill_operation, parse_key_string
+from controllers.mono_alphabetic_controller import log_mono_alphabetic_operation
+from controllers.playfair_controller import log_playfair_operation
+from controllers.vigenere_controller import log_vigenere_operation
+from services.stream_service import (
+    AffineStage,
+    VigenereStage,
+    MonoAlphabeticStage,
+    HillStage,
+    PlayfairStage,
+    decode_chunks,
+    transform_stream,
+)
+
+DEFAULT_ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# Starts the error record ending a stream that fails after its first chunk was sent
+RECORD_SEPARATOR = '\x1e'
+
+
+def create_stage(cipher, operation, key_string, alphabet):
+    """
+    Build the streaming stage of a cipher from its key parameters.
+
+    Raises:
+    - ValueError: if the cipher, the operation or the key is invalid.
+    """
+    if operation not in ('encrypt', 'decrypt'):
+        raise ValueError(f"Invalid operation: {operation}.")
+    if not alphabet:
+        raise ValueError("Alphabet cannot be empty.")
+
+    if cipher == 'affine':
+        a, b = map(int, key_string.split(','))
+        return AffineStage(a, b, alphabet, operation)
+    if cipher == 'vigenere':
+        if not key_string.isalpha():
+            raise ValueError("Key must be an alphabetic string.")
+        return VigenereStage(key_string, alphabet, operation)
+    if cipher == 'mono_alphabetic':
+        if len(key_string) != 26 or not key_string.isalpha():
+            raise ValueError("Key must be a 26-character alphabetic string.")
+        return MonoAlphabeticStage(key_string, operation)
+    if cipher == 'hill':
+        return HillStage(parse_key_string(key_string), alphabet, operation)
+    if cipher == 'playfair':
+        if not key_string.isalpha():
+            raise ValueError("Invalid key. Key must be a string of alphabetic characters only.")
+        return PlayfairStage(key_string, operation)
+    raise ValueError(f"Streaming method for {cipher} not found.")
+
+def log_stream(cipher, operation, key_string, alphabet, read, written):
+    """
+    Logs a finished streamed operation in the cipher's operation log.
+    Streamed texts are logged by size only, as binary bodies are.
+    """
+    input_text, output_text = f'<{read} characters>', f'<{written} characters>'
+    if cipher == 'affine':
+        a, b = map(int, key_string.split(','))
+        log_affine_operation(operation, input_text, output_text, a, b, alphabet)
+    elif cipher == 'vigenere':
+        log_vigenere_operation(operation, input_text, key_string, output_text, alphabet)
+    elif cipher == 'mono_alphabetic':
+        log_mono_alphabetic_operation(operation, input_text, key_string, output_text)
+    elif cipher == 'hill':
+        log_hill_operation(operation, input_text, key_string, alphabet, output_text)
+    elif cipher == 'playfair':
+        log_playfair_operation(operation, input_text, key_string, output_text)
+
+def checked_chunks(chunks, totals):
+    # Counts the characters read, and keeps the record separator out of the output
+    for chunk in chunks:
+        if RECORD_SEPARATOR in chunk:
+            raise ValueError("Text cannot contain the record separator character U+001E.")
+        totals['read'] += len(chunk)
+        yield chunk
+
+def stream(cipher, operation, args, body):
+    """
+    Encrypts or decrypts a raw text body of any size as a chunked response.
+
+    The body is read in chunks and each chunk is transformed and sent back as soon as it
+    is ready, so memory use does not grow with the size of the input. The first output
+    chunk is computed before the response starts, so an invalid key or an error in the
+    start of the text gives a 400 status code. An error found later, once the 200 status
+    has been sent, ends the stream with an error record: the U+001E record separator
+    followed by a JSON object with an 'error' message and a newline. The input cannot
+    contain U+001E. Finished operations are logged by size.
+
+    Parameters (query string):
+    - keyString: str, the key in the format the cipher's JSON endpoint expects.
+    - alphabet: str, the alphabet to use (optional, default A-Z).
+
+    Returns:
+    - A streamed text/plain response, or a JSON error with a 400 status code.
+    """
+    key_string = args.get('keyString', '')
+    alphabet = args.get('alphabet', DEFAULT_ALPHABET)
+    totals = {'read': 0, 'written': 0}
+    try:
+        stage = create_stage(cipher, operation, key_string, alphabet)
+        results = transform_stream(stage, checked_chunks(decode_chunks(body), totals))
+        first = next(results, '')
+    except ValueError as e:
+        return jsonify({'error': f'Invalid input: {str(e)}'}), 400
+
+    def generate():
+        totals['written'] += len(first)
+        if first:
+            yield first
+        try:
+            for result in results:
+                totals['written'] += len(result)
+                yield result
+        except ValueError as e:
+            yield RECORD_SEPARATOR + json.dumps({'error': f'Invalid input: {str(e)}'}) + '\n'
+            return
+        log_stream(cipher, operation, key_string, alphabet, totals['read'], totals['written'])
+
+    return Response(stream_with_context(generate()), mimetype='text/plain')
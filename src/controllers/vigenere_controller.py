@@ -1,29 +1,16 @@
-import sqlite3
-import os
-from flask import jsonify
-from services.vigenere_service import encrypt_text, decrypt_text
+from flask import Response, jsonify
+from services.log_service import log_operation
+from services.metrics_service import KERNEL, SERIALIZE, stage_end, stage_start
+from services.parallel_service import transform
+from services.vigenere_service import crack_text, encrypt_bytes, decrypt_bytes
 
 # Helper function to log Vigenère operations
 def log_vigenere_operation(operation, input_text, key, result_text, alphabet):
-    try:
-        # Connect to SQLite database
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        db_path = os.path.join(current_dir, '../..', 'encryption_log.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # Insert log into vigenere_log table
-        cursor.execute('''
-            INSERT INTO vigenere_log (operation, input_text, key, output_text, alphabet)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (operation, input_text, key, result_text, alphabet))
-
-        # Commit and close connection
-        conn.commit()
-        conn.close()
-
-    except Exception as e:
-        print(f"Error logging Vigenère operation: {e}")
+    # Queue the row for the background writer; no disk I/O happens in the request
+    log_operation('''
+        INSERT INTO vigenere_log (operation, input_text, key, output_text, alphabet)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (operation, input_text, key, result_text, alphabet))
 
 def encrypt(request):
     """
@@ -54,11 +41,16 @@ def encrypt(request):
     if len(alphabet) != 26 or len(set(alphabet)) != 26:
         return jsonify({'error': 'Alphabet must be a permutation of 26 unique characters.'}), 400
 
-    encrypted_text = encrypt_text(text, key, alphabet)
+    start = stage_start()
+    encrypted_text = transform('vigenere', 'encrypt', text, key, alphabet)
+    stage_end(KERNEL, start)
 
     log_vigenere_operation('encrypt', text, key, encrypted_text, alphabet)
 
-    return jsonify({'encrypted_text': encrypted_text})
+    start = stage_start()
+    response = jsonify({'encrypted_text': encrypted_text})
+    stage_end(SERIALIZE, start)
+    return response
 
 def decrypt(request):
     """
@@ -89,8 +81,84 @@ def decrypt(request):
     if len(alphabet) != 26 or len(set(alphabet)) != 26:
         return jsonify({'error': 'Alphabet must be a permutation of 26 unique characters.'}), 400
     
-    decrypted_text = decrypt_text(text, key, alphabet)
+    start = stage_start()
+    decrypted_text = transform('vigenere', 'decrypt', text, key, alphabet)
+    stage_end(KERNEL, start)
 
     log_vigenere_operation('decrypt', text, key, decrypted_text, alphabet)
 
-    return jsonify({'decrypted_text': decrypted_text})
+    start = stage_start()
+    response = jsonify({'decrypted_text': decrypted_text})
+    stage_end(SERIALIZE, start)
+    return response
+
+def transform_bytes(body, args, operation):
+    """
+    Encrypts or decrypts a raw binary body with a Vigenère cipher over Z_256.
+
+    Parameters:
+    - body (bytes): The application/octet-stream request body.
+    - args: The query string, with:
+        - keyString (str): The key, used as its UTF-8 bytes.
+        - offset (int): The number of bytes already processed with the key (optional, default 0).
+    - operation (str): 'encrypt' or 'decrypt'.
+
+    Returns:
+    - application/octet-stream response with the transformed bytes.
+      In case of errors, returns a JSON response with an error message and status code 400.
+    """
+    key = args.get('keyString', '')
+    try:
+        offset = int(args.get('offset', 0))
+        start = stage_start()
+        result = encrypt_bytes(body, key, offset) if operation == 'encrypt' else decrypt_bytes(body, key, offset)
+        stage_end(KERNEL, start)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid input: {str(e)}'}), 400
+
+    # Binary bodies are logged by size only
+    log_vigenere_operation(operation, f'<{len(body)} bytes>', key, f'<{len(result)} bytes>', 'bytes')
+
+    return Response(result, mimetype='application/octet-stream')
+
+def encrypt_bytes_body(body, args):
+    return transform_bytes(body, args, 'encrypt')
+
+def decrypt_bytes_body(body, args):
+    return transform_bytes(body, args, 'decrypt')
+
+def crack(request):
+    """
+    Recovers the key of a Vigenère ciphertext without knowing it.
+
+    Parameters:
+    - text (str): Encrypted text to crack, provided in the request arguments.
+    - cipher (str): Cipher type, expected to be 'vigenere', provided in the request arguments.
+    - alphabet (str): Custom alphabet (optional), provided in the request arguments.
+    - maxKeyLength (int): Longest key length to consider (optional, default 20).
+    - topK (int): Number of key candidates to return (optional, default 3).
+
+    Returns:
+    - JSON response containing:
+        - 'encrypted_text' (str): The most likely key.
+        - 'candidates' (list): Ranked key candidates with their scores and a plaintext preview.
+      In case of errors, returns a JSON response with an error message and status code 400.
+    """
+    text = request.get('inputText', '')
+    cipher = request.get('cipher', '').lower()
+    alphabet = request.get('alphabet', 'ABCDEFGHIJKLMNOPQRSTUVWXYZ')  # Default alphabet
+
+    if cipher != 'vigenere':
+        return jsonify({'error': 'Invalid cipher type. Use "cipher=vigenere".'}), 400
+
+    if len(alphabet) != 26 or len(set(alphabet)) != 26:
+        return jsonify({'error': 'Alphabet must be a permutation of 26 unique characters.'}), 400
+
+    try:
+        max_key_length = int(request.get('maxKeyLength', 20))
+        top_k = int(request.get('topK', 3))
+        candidates = crack_text(text, alphabet, max_key_length=max_key_length, top_k=top_k)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid input: {str(e)}'}), 400
+
+    return jsonify({'encrypted_text': candidates[0]['key'], 'candidates': candidates})
@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from controllers import (
     affine_controller,
@@ -7,12 +7,25 @@ from controllers import (
     hill_controller,
     mono_alphabetic_controller,
     euclid_controller,
+    log_controller,
+    stream_controller,
+    batch_controller,
+    score_controller,
+    metrics_controller,
+    jobs_controller,
 )
+from controllers.euclid_controller import parse_flag
+from services.cache_service import ResultCache, cache_key
+from services.log_service import capture_logs, logs_size, replay_logs
+from services.metrics_service import JSON_PARSE, stage_end, stage_start
 
 app = Flask(__name__)
 
 CORS(app)
 
+# Per-route latency and stage timings, exported at /metrics
+metrics_controller.install(app)
+
 cipher_controllers = {
     'affine': affine_controller,
     'vigenere': vigenere_controller,
@@ -22,17 +35,102 @@ cipher_controllers = {
     'euclid': euclid_controller,
 }
 
+# Ciphers whose encrypt and decrypt results depend only on the cached payload fields
+CACHED_CIPHERS = {'affine', 'vigenere', 'playfair', 'hill', 'mono_alphabetic'}
+
+result_cache = ResultCache()
+
+def result_key(cipher, operation, data):
+    """
+    Return the result cache key of an encrypt or decrypt payload, or None when it is not cached.
+
+    The key is a digest of the cipher, the operation and every payload field but noCache.
+    A payload with "noCache": true is not cached; noCache is read as parse_flag reads
+    boolean parameters, so "false" or "0" keep the cache.
+
+    Raises:
+    - ValueError: if noCache is not a recognised boolean.
+    """
+    if cipher not in CACHED_CIPHERS or not isinstance(data, dict) or parse_flag(data.get('noCache', False), 'noCache'):
+        return None
+    # The text is hashed as is rather than serialized with the other fields
+    fields = {name: value for name, value in data.items() if name not in ('inputText', 'noCache')}
+    return cache_key(cipher, operation, data.get('inputText'), fields)
+
+def cached_response(key):
+    """
+    Return the response cached under a key, or None on a miss.
+    The audit rows cached with it are queued again, so a cached operation is logged like any other.
+    """
+    cached = result_cache.get(key)
+    if cached is None:
+        return None
+    body, entries = cached
+    replay_logs(entries)
+    return Response(body, mimetype='application/json', headers={'X-Cache': 'HIT'})
+
+def store_result(key, body, entries):
+    """
+    Cache a successful response body with the audit rows logged while computing it.
+    """
+    result_cache.put(key, (body, entries), size=len(body) + logs_size(entries))
+
+def dispatch(cipher, operation, data):
+    """
+    Call a controller operation through the result cache.
+
+    Successful results are cached under result_key(cipher, operation, data), with the
+    audit rows logged by the controller.
+    """
+    controller = cipher_controllers.get(cipher)
+    try:
+        key = result_key(cipher, operation, data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if key is None:
+        return getattr(controller, operation)(data)
+    cached = cached_response(key)
+    if cached is not None:
+        return cached
+
+    try:
+        with capture_logs() as entries:
+            result = getattr(controller, operation)(data)
+    finally:
+        replay_logs(entries)
+    if isinstance(result, Response) and result.status_code == 200:
+        store_result(key, result.get_data(), entries)
+        result.headers['X-Cache'] = 'MISS'
+    return result
+
+def bytes_route(cipher, operation):
+    """
+    Handle an application/octet-stream body, with the key in the query string.
+    Only the ciphers with a byte mode (affine and vigenere) accept one.
+    """
+    handler = getattr(cipher_controllers.get(cipher), f'{operation}_bytes_body', None)
+    if handler is None:
+        return jsonify({'error': f'Byte mode is not supported for {cipher}.'}), 400
+    try:
+        return handler(request.get_data(), request.args)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Encryption route
 @app.route('/encrypt/<cipher>', methods=['POST'])
 def encrypt_route(cipher):
+    if request.mimetype == 'application/octet-stream':
+        return bytes_route(cipher, 'encrypt')
+    start = stage_start()
     data = request.get_json()
+    stage_end(JSON_PARSE, start)
     controller = cipher_controllers.get(cipher)
 
     if controller is None or not hasattr(controller, 'encrypt'):
         return jsonify({'error': f'Encryption method for {cipher} not found.'}), 400
     
     try:
-        result = controller.encrypt(data)
+        result = dispatch(cipher, 'encrypt', data)
         return result
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -40,13 +138,17 @@ def encrypt_route(cipher):
 # Decryption route
 @app.route('/decrypt/<cipher>', methods=['POST'])
 def decrypt_route(cipher):
+    if request.mimetype == 'application/octet-stream':
+        return bytes_route(cipher, 'decrypt')
+    start = stage_start()
     data = request.get_json()
+    stage_end(JSON_PARSE, start)
     controller = cipher_controllers.get(cipher)
     if controller is None or not hasattr(controller, 'decrypt'):
         return jsonify({'error': f'Decryption method for {cipher} not found.'}), 400
     
     try:
-        result = controller.decrypt(data)
+        result = dispatch(cipher, 'decrypt', data)
         return result
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -54,7 +156,9 @@ def decrypt_route(cipher):
 # Crack route
 @app.route('/crack/<cipher>', methods=['POST'])
 def bruteforce_route(cipher):
+    start = stage_start()
     data = request.get_json()
+    stage_end(JSON_PARSE, start)
     controller = cipher_controllers.get(cipher)
     
     if controller is None or not hasattr(controller, 'crack'):
@@ -66,5 +170,61 @@ def bruteforce_route(cipher):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Asynchronous crack jobs: submit, poll, fetch the result and cancel
+@app.route('/jobs/<cipher>', methods=['POST'])
+def submit_job_route(cipher):
+    controller = cipher_controllers.get(cipher)
+    if controller is None or not hasattr(controller, 'crack'):
+        return jsonify({'error': f'Crack method for {cipher} not found.'}), 400
+    start = stage_start()
+    data = request.get_json(silent=True)
+    stage_end(JSON_PARSE, start)
+    return jobs_controller.submit(cipher, data)
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status_route(job_id):
+    return jobs_controller.status(job_id)
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result_route(job_id):
+    return jobs_controller.result(job_id)
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job_route(job_id):
+    return jobs_controller.cancel(job_id)
+
+# Streaming route, for raw text bodies too large to send as JSON
+@app.route('/stream/<operation>/<cipher>', methods=['POST'])
+def stream_route(operation, cipher):
+    return stream_controller.stream(cipher, operation, request.args, request.stream)
+
+# Batch route, for many small encrypt and decrypt jobs in one request
+@app.route('/batch', methods=['POST'])
+def batch_route():
+    try:
+        return batch_controller.run(request.get_json())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Plaintext fitness scoring route
+@app.route('/score', methods=['POST'])
+def score_route():
+    return score_controller.score(request.get_json())
+
+# Result cache counters
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats_route():
+    return jsonify(result_cache.stats())
+
+# Prometheus metrics
+@app.route('/metrics', methods=['GET'])
+def metrics_route():
+    return metrics_controller.export()
+
+# Operation log route
+@app.route('/logs/<cipher>', methods=['GET'])
+def logs_route(cipher):
+    return log_controller.query(cipher, request.args)
+
 if __name__ == '__main__':
     app.run(debug=True)
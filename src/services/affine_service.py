@@ -1,3 +1,11 @@
+from functools import lru_cache
+
+import numpy as np
+
+from . import layout_service, modmath
+from .frequency_service import text_to_indices, letter_histogram, expected_frequencies, chi_squared
+
+
 def mod_inverse(a, mod):
     """
     Find the modular inverse of 'a' under modulo 'mod'.
@@ -10,10 +18,7 @@ def mod_inverse(a, mod):
     Returns:
     - int, the modular inverse of 'a' under modulo 'mod'.
     """
-    for x in range(1, mod):
-        if (a * x) % mod == 1:
-            return x
-    raise ValueError(f"No modular inverse for a={a} under modulo {mod}.")
+    return modmath.mod_inverse(a, mod)
 
 def process_text(text, alphabet):
     """
@@ -32,6 +37,9 @@ def affine_encrypt_char(char, a, b, alphabet, mod):
     """
     Encrypt a single character using the Affine cipher formula.
 
+    The character is looked up in the compiled key, so it gets the same image as in
+    encrypt_text.
+
     Parameters:
     - char: str, the character to encrypt.
     - a: int, the multiplier in the Affine cipher.
@@ -41,14 +49,19 @@ def affine_encrypt_char(char, a, b, alphabet, mod):
 
     Returns:
     - str, the encrypted character.
+
+    Raises:
+    - ValueError: if the character is not in the alphabet or 'a' is not coprime with 'mod'.
     """
-    index = alphabet.index(char)
-    return alphabet[(a * index + b) % mod]
+    return _translate_char(char, compile_key(a, b, alphabet)[0])
 
 def affine_decrypt_char(char, a, b, alphabet, mod):
     """
     Decrypt a single character using the Affine cipher formula.
 
+    The character is looked up in the compiled key, so it gets the same image as in
+    decrypt_text.
+
     Parameters:
     - char: str, the character to decrypt.
     - a: int, the multiplier in the Affine cipher.
@@ -58,44 +71,99 @@ def affine_decrypt_char(char, a, b, alphabet, mod):
 
     Returns:
     - str, the decrypted character.
+
+    Raises:
+    - ValueError: if the character is not in the alphabet or 'a' is not coprime with 'mod'.
     """
-    index = alphabet.index(char)
-    a_inv = mod_inverse(a, mod)
-    return alphabet[(a_inv * (index - b)) % mod]
+    return _translate_char(char, compile_key(a, b, alphabet)[1])
+
+def _translate_char(char, table):
+    try:
+        return table[ord(char)]
+    except (KeyError, TypeError):
+        raise ValueError(f"Character {char!r} is not in the alphabet.")
 
-def encrypt_text(text, a, b, alphabet):
+@lru_cache(maxsize=256)
+def compile_key(a, b, alphabet):
     """
-    Encrypt the entire text using the Affine cipher, preserving non-alphabet characters.
+    Compile an Affine key into a pair of translation tables for str.translate.
+
+    Both tables map every symbol of the alphabet, and the lowercase form of each
+    symbol, to its uppercase image, so a whole text is transformed in a single pass.
+    Compiled keys are kept in an LRU cache so repeated keys cost nothing.
 
     Parameters:
-    - text: str, the plaintext to encrypt.
     - a: int, the multiplier in the Affine cipher.
     - b: int, the shift in the Affine cipher.
     - alphabet: str, the custom alphabet to use.
 
     Returns:
-    - str, the encrypted text with non-alphabet characters retained.
+    - tuple: (encrypt_table, decrypt_table), dicts usable with str.translate.
+
+    Raises:
+    - ValueError: if 'a' is not coprime with the length of the alphabet.
     """
     mod = len(alphabet)
     # Validate 'a' is coprime with mod
     try:
-        mod_inverse (a, mod)
+        a_inv = mod_inverse(a, mod)
     except ValueError:
-        raise ValueError ( f"Invalid 'a' value: {a} must be coprime with the length of the alphabet ({mod})." )
-    processed_text = process_text(text, alphabet)
-    encrypted_text = ''.join(affine_encrypt_char(char, a, b, alphabet, mod) for char in processed_text)
-
-    full_result = []
-    j = 0
-    for char in text:
-        if char.upper() in alphabet:
-            full_result.append(encrypted_text[j])
-            j += 1
-        else:
-            full_result.append(char)
-    return ''.join(full_result).strip()
-
-def decrypt_text(text, a, b, alphabet):
+        raise ValueError(f"Invalid 'a' value: {a} must be coprime with the length of the alphabet ({mod}).")
+
+    positions = {}
+    for index, char in enumerate(alphabet):
+        positions.setdefault(char, index)
+
+    encrypt_table = {}
+    decrypt_table = {}
+    for char in set(alphabet) | set(alphabet.lower()):
+        upper = char.upper()
+        if upper not in positions:
+            continue
+        index = positions[upper]
+        encrypt_table[ord(char)] = alphabet[(a * index + b) % mod]
+        decrypt_table[ord(char)] = alphabet[(a_inv * (index - b)) % mod]
+    return encrypt_table, decrypt_table
+
+def translate_text(text, table, alphabet, output='preserve'):
+    """
+    Apply a compiled translation table to a text in the given output mode.
+
+    The default layout is a single str.translate over the text. The other modes record the
+    layout of the text once, translate only its letters and lay them out again.
+
+    Parameters:
+    - text: str, the input text.
+    - table: dict, one of the tables of compile_key.
+    - alphabet: str, the custom alphabet to use.
+    - output: str, one of layout_service.OUTPUT_MODES.
+
+    Returns:
+    - str, the translated text.
+    """
+    if output == 'preserve':
+        return text.translate(table).strip()
+    layout = layout_service.scan(text, alphabet)
+    return layout.render(layout.letters().translate(table), output).strip()
+
+def encrypt_text(text, a, b, alphabet, output='preserve'):
+    """
+    Encrypt the entire text using the Affine cipher, preserving non-alphabet characters.
+
+    Parameters:
+    - text: str, the plaintext to encrypt.
+    - a: int, the multiplier in the Affine cipher.
+    - b: int, the shift in the Affine cipher.
+    - alphabet: str, the custom alphabet to use.
+    - output: str, one of layout_service.OUTPUT_MODES (default 'preserve').
+
+    Returns:
+    - str, the encrypted text with non-alphabet characters retained.
+    """
+    encrypt_table, _ = compile_key(a, b, alphabet)
+    return translate_text(text, encrypt_table, alphabet, output)
+
+def decrypt_text(text, a, b, alphabet, output='preserve'):
     """
     Decrypt the entire text using the Affine cipher, preserving non-alphabet characters.
 
@@ -104,29 +172,104 @@ def decrypt_text(text, a, b, alphabet):
     - a: int, the multiplier in the Affine cipher.
     - b: int, the shift in the Affine cipher.
     - alphabet: str, the custom alphabet to use.
+    - output: str, one of layout_service.OUTPUT_MODES (default 'preserve').
 
     Returns:
     - str, the decrypted text with non-alphabet characters retained.
     """
-    mod = len(alphabet)
-    # Validate 'a' is coprime with mod
+    _, decrypt_table = compile_key(a, b, alphabet)
+    return translate_text(text, decrypt_table, alphabet, output)
+
+
+def transform_many(texts, a, b, alphabet, mode='encrypt'):
+    """
+    Encrypt or decrypt several texts with the same key, compiling the key only once.
+
+    Parameters:
+    - texts: list of str, the input texts.
+    - a: int, the multiplier in the Affine cipher.
+    - b: int, the shift in the Affine cipher.
+    - alphabet: str, the custom alphabet to use.
+    - mode: str, 'encrypt' or 'decrypt'.
+
+    Returns:
+    - list of str, the transformed texts in order.
+    """
+    encrypt_table, decrypt_table = compile_key(a, b, alphabet)
+    table = encrypt_table if mode == 'encrypt' else decrypt_table
+    return [text.translate(table).strip() for text in texts]
+
+# Size of the slices that byte mode translates into a caller's output buffer
+BYTE_CHUNK_SIZE = 1 << 20
+
+@lru_cache(maxsize=256)
+def compile_byte_key(a, b):
+    """
+    Compile an Affine key over the 256 byte values into a pair of bytes.translate tables.
+
+    Parameters:
+    - a: int, the multiplier, which must be odd to be invertible modulo 256.
+    - b: int, the shift.
+
+    Returns:
+    - tuple: (encrypt_table, decrypt_table), 256-byte tables usable with bytes.translate.
+
+    Raises:
+    - ValueError: if 'a' is even.
+    """
     try:
-        mod_inverse ( a, mod )
+        a_inv = mod_inverse(a, 256)
     except ValueError:
-        raise ValueError ( f"Invalid 'a' value: {a} must be coprime with the length of the alphabet ({mod})." )
-    processed_text = process_text(text, alphabet)
-    decrypted_text = ''.join(affine_decrypt_char(char, a, b, alphabet, mod) for char in processed_text)
+        raise ValueError(f"Invalid 'a' value: {a} must be odd to be coprime with 256.")
+    encrypt_table = bytes((a * x + b) % 256 for x in range(256))
+    decrypt_table = bytes(a_inv * (x - b) % 256 for x in range(256))
+    return encrypt_table, decrypt_table
+
+def _translate_bytes(data, table, out):
+    if out is None:
+        if not isinstance(data, (bytes, bytearray)):
+            data = bytes(data)
+        return data.translate(table)
+    source = memoryview(data).cast('B')
+    target = memoryview(out).cast('B')
+    if len(target) < len(source):
+        raise ValueError("Output buffer is smaller than the input.")
+    for start in range(0, len(source), BYTE_CHUNK_SIZE):
+        stop = min(start + BYTE_CHUNK_SIZE, len(source))
+        target[start:stop] = source[start:stop].tobytes().translate(table)
+    return out
+
+def encrypt_bytes(data, a, b, out=None):
+    """
+    Encrypt binary data with the Affine cipher over Z_256: every byte x becomes (a*x + b) mod 256.
+
+    Parameters:
+    - data: bytes-like, the plaintext.
+    - a: int, the multiplier (odd).
+    - b: int, the shift.
+    - out: writable bytes-like of at least len(data) bytes to write the result into (optional).
+
+    Returns:
+    - bytes, the ciphertext, or 'out' when it was given.
+    """
+    encrypt_table, _ = compile_byte_key(a, b)
+    return _translate_bytes(data, encrypt_table, out)
+
+def decrypt_bytes(data, a, b, out=None):
+    """
+    Decrypt binary data encrypted with encrypt_bytes.
 
-    full_result = []
-    j = 0
-    for char in text:
-        if char.upper() in alphabet:
-            full_result.append(decrypted_text[j])
-            j += 1
-        else:
-            full_result.append(char)
-    return ''.join(full_result).strip()
+    Parameters:
+    - data: bytes-like, the ciphertext.
+    - a: int, the multiplier (odd).
+    - b: int, the shift.
+    - out: writable bytes-like of at least len(data) bytes to write the result into (optional).
 
+    Returns:
+    - bytes, the plaintext, or 'out' when it was given.
+    """
+    _, decrypt_table = compile_byte_key(a, b)
+    return _translate_bytes(data, decrypt_table, out)
 
 def crack_text(freq1, freq2, alphabet):
     """
@@ -163,3 +306,66 @@ def crack_text(freq1, freq2, alphabet):
     b = (Y1 - a * X1) % mod
 
     return a, b
+
+def valid_keys(mod):
+    """
+    Enumerate every valid Affine key (a, b) for an alphabet of the given length.
+
+    Parameters:
+    - mod: int, the length of the alphabet.
+
+    Returns:
+    - tuple of numpy.ndarray: (a_values, b_values), one entry per key
+      (312 keys for a 26-letter alphabet).
+    """
+    units = modmath.unit_group(mod)
+    a_values = np.repeat(units, mod)
+    b_values = np.tile(np.arange(mod, dtype=np.int64), len(units))
+    return a_values, b_values
+
+def brute_force(text, alphabet, top_k=5, preview_length=80):
+    """
+    Crack the Affine cipher from the ciphertext alone by scoring every valid key.
+
+    The ciphertext histogram is computed once. For every key the plaintext histogram is
+    obtained by indexing it with the (keys x mod) encryption table, so the full text is
+    never decrypted per key. Candidates are ranked by chi-squared distance from English.
+
+    Parameters:
+    - text: str, the ciphertext to crack.
+    - alphabet: str, the custom alphabet to use.
+    - top_k: int, the number of best candidates to return.
+    - preview_length: int, the number of ciphertext characters decrypted for each preview.
+
+    Returns:
+    - list of dict: the best candidates, each with 'a', 'b', 'score' and 'preview', best first.
+
+    Raises:
+    - ValueError: if the alphabet is too short or the text contains no alphabet characters.
+    """
+    mod = len(alphabet)
+    if mod < 2:
+        raise ValueError("Alphabet must contain at least two characters.")
+    histogram = letter_histogram(text_to_indices(text, alphabet), mod)
+    if not histogram.any():
+        raise ValueError("Ciphertext contains no characters from the alphabet.")
+
+    a_values, b_values = valid_keys(mod)
+    plain = np.arange(mod, dtype=np.int64)
+    # encrypt_table[k, p] is the ciphertext index of plaintext index p under key k
+    encrypt_table = (a_values[:, None] * plain[None, :] + b_values[:, None]) % mod
+    plaintext_histograms = histogram[encrypt_table]
+    scores = chi_squared(plaintext_histograms, expected_frequencies(alphabet))
+
+    top_k = max(1, min(int(top_k), len(scores)))
+    best = np.argsort(scores, kind='stable')[:top_k]
+    preview = text[:preview_length]
+    return [
+        {
+            'a': int(a_values[k]),
+            'b': int(b_values[k]),
+            'score': float(scores[k]),
+            'preview': decrypt_text(preview, int(a_values[k]), int(b_values[k]), alphabet),
+        }
+        for k in best
+    ]
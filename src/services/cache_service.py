@@ -0,0 +1,126 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+# Memory budget of the shared result cache, in bytes
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Bookkeeping cost of one entry on top of its key and value
+ENTRY_OVERHEAD = 128
+
+
+def cache_key(*fields):
+    """
+    Hash the fields identifying a request into a cache key.
+
+    Strings are hashed as UTF-8 and other values as JSON, each prefixed with its type and
+    length so different field splits never collide. BLAKE2b hashes large texts at memory
+    speed, far faster than any cipher transforms them.
+
+    Parameters:
+    - fields: str, or any JSON-serializable value (None for a missing field).
+
+    Returns:
+    - bytes: A 16-byte digest.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for field in fields:
+        if isinstance(field, str):
+            data = field.encode('utf-8', 'surrogatepass')
+            digest.update(b'S')
+        else:
+            data = json.dumps(field, sort_keys=True).encode('utf-8')
+            digest.update(b'J')
+        digest.update(len(data).to_bytes(8, 'little'))
+        digest.update(data)
+    return digest.digest()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of values, bounded by their total size in bytes.
+
+    Putting an entry evicts the least recently used ones until the cache fits its budget.
+    Entries larger than a quarter of the budget are not cached, so one huge result cannot
+    flush everything else.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Parameters:
+        - max_bytes (int): The largest total size of the cached entries.
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def entry_size(key, size):
+        return len(key) + size + ENTRY_OVERHEAD
+
+    def get(self, key):
+        """
+        Return the cached value of the key, or None, and mark it as recently used.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size=None):
+        """
+        Cache a value, evicting the least recently used entries as needed.
+
+        Parameters:
+        - key (bytes): The cache key, as returned by cache_key.
+        - value: The value to cache.
+        - size (int): The number of bytes the value holds (default: len(value)).
+
+        Returns:
+        - bool: True if the value was cached, False if it is too large.
+        """
+        size = self.entry_size(key, len(value) if size is None else size)
+        if size > self.max_bytes // 4:
+            return False
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, old_size) = self._entries.popitem(last=False)
+                self.size -= old_size
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns:
+        - dict: with 'entries', 'bytes', 'maxBytes', 'hits', 'misses' and 'evictions'.
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.size,
+                'maxBytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -1,32 +1,25 @@
-def extended_euclid(b, m):
+from .modmath import batch_inverse, extended_gcd, mod_inverse
+
+def euclid_table(b, m):
     """
-    Computes the Extended Euclidean Algorithm to find coefficients and remainders.
+    Lists the steps of the Extended Euclidean Algorithm for the inverse of 'b' modulo 'm'.
+
+    Each row is [Q, A1, A2, A3, B1, B2, B3]: the quotient, then the two remainders A3 and
+    B3 with their coefficients of 'm' and 'b'. The table ends at the first row whose
+    remainder B3 is 1 (B2 is then the inverse) or 0 (there is none). A negative 'b' is
+    shown through its residue, whose steps reach the same inverse.
 
     Parameters:
     - b (int): The number for which the modular inverse is calculated.
     - m (int): The modulus under which to calculate the modular inverse.
 
     Returns:
-    - tuple: (inverse, table)
-        - inverse (int or None): The modular inverse if it exists; None otherwise.
-        - table (list of lists): The detailed steps of the Euclidean algorithm.
+    - list of lists: The detailed steps of the Euclidean algorithm.
     """
     table = []
-    A1, A2, A3 = 1, 0, m
-    B1, B2, B3 = 0, 1, b
-    table.append(["-", A1, A2, A3, B1, B2, B3])
-
-    while True:
-        if B3 == 0:
-            return None, table
-        if B3 == 1:
-            return B2 % m, table
-
-        Q = A3 // B3
-        T1, T2, T3 = A1 - Q * B1, A2 - Q * B2, A3 - Q * B3
-        A1, A2, A3 = B1, B2, B3
-        B1, B2, B3 = T1, T2, T3
-        table.append([Q, A1, A2, A3, B1, B2, B3])
+    extended_gcd(m, b % m if b < 0 < m else b, table)
+    end = next((i for i, row in enumerate(table) if row[6] in (0, 1)), len(table) - 1)
+    return table[:end + 1]
 
 def modular_inverse(a, mod):
     """
@@ -41,8 +34,40 @@ def modular_inverse(a, mod):
         - inverse (int): The modular inverse, if it exists; None otherwise.
         - table (list of lists): Detailed steps of the Euclidean algorithm as a table.
     """
-    inverse, table = extended_euclid(a, mod)
-    return inverse, table
+    try:
+        inverse = mod_inverse(a, mod)
+    except ValueError:
+        inverse = None
+    return inverse, euclid_table(a, mod)
+
+def batch_modular_inverse(values, mod, with_tables=False):
+    """
+    Finds the modular inverses of many values under one modulus with Montgomery's trick.
+
+    The running products of the values are inverted with a single extended Euclid call,
+    and the individual inverses are peeled off the prefix products, for a total of
+    3(n - 1) modular multiplications.
+
+    Parameters:
+    - values (list of int): The numbers to invert.
+    - mod (int): The modulus under which to calculate the inverses.
+    - with_tables (bool): Whether to also return the Euclidean steps of each value (default False).
+
+    Returns:
+    - tuple: (inverses, non_invertible, tables)
+        - inverses (list): The modular inverse of each value, None where it does not exist.
+        - non_invertible (list of int): The positions of the values that have no inverse.
+        - tables (list of lists or None): The Euclidean table of each value, if requested.
+
+    Raises:
+    - ValueError: if the modulus is smaller than 2.
+    """
+    inverses, non_invertible = batch_inverse(values, mod)
+
+    tables = None
+    if with_tables:
+        tables = [euclid_table(value, mod) for value in values]
+    return inverses, non_invertible, tables
 
 def format_table(table):
     """
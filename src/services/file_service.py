@@ -0,0 +1,260 @@
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+from . import affine_service, hill_service, mono_alphabetic_service, vigenere_service
+
+# Bytes handled by one task; each worker holds about this much input and output at a time
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+FILE_CIPHERS = ('affine', 'vigenere', 'mono_alphabetic', 'hill')
+
+# Window scanned at a time when moving a Hill chunk boundary to the next block boundary
+ALIGN_WINDOW = 4096
+
+
+def _byte_table(table):
+    """
+    Convert a str.translate table to a 256-byte bytes.translate table.
+    """
+    result = bytearray(range(256))
+    for code, image in table.items():
+        if code > 255:
+            continue
+        image = ord(image) if isinstance(image, str) and len(image) == 1 else image
+        if not isinstance(image, int) or image > 255:
+            raise ValueError("File mode needs an alphabet of single-byte characters.")
+        result[code] = image
+    return bytes(result)
+
+@lru_cache(maxsize=32)
+def compile_cipher(spec):
+    """
+    Build the kernel of a file transformation.
+
+    The text ciphers read the file as Latin-1, so every byte is one character and the
+    output has exactly the length of the input. Unlike encrypt_text, the affine result
+    is not stripped, and mono-alphabetic only changes the ASCII letters.
+
+    Parameters:
+    - spec (tuple): (cipher, mode, key, alphabet, binary), with the key already parsed:
+      (a, b) for affine, a str for vigenere and mono_alphabetic, a tuple of rows for hill.
+
+    Returns:
+    - dict: with keys
+        - 'translate': a bytes.translate table for position-independent ciphers, else None.
+        - 'letters': a 256-entry bool array of the bytes that consume key or block
+          positions, or None when the kernel does not depend on them.
+        - 'block': the block length chunk boundaries must be aligned to (letters).
+    """
+    cipher, mode, key, alphabet, binary = spec
+    encrypt = mode == 'encrypt'
+    kernel = {'translate': None, 'letters': None, 'block': 1}
+    if cipher == 'affine':
+        a, b = key
+        if binary:
+            tables = affine_service.compile_byte_key(a, b)
+            kernel['translate'] = tables[0] if encrypt else tables[1]
+        else:
+            tables = affine_service.compile_key(a, b, alphabet)
+            kernel['translate'] = _byte_table(tables[0] if encrypt else tables[1])
+    elif cipher == 'mono_alphabetic':
+        if binary:
+            raise ValueError("Byte mode is only supported for affine and vigenere.")
+        if len(key) != 26 or not key.isalpha():
+            raise ValueError("Key must be a 26-character alphabetic string.")
+        table = mono_alphabetic_service.compile_key(key)[0 if encrypt else 1]
+        # The text service lowercases the text first, so both cases map to the lowercase image
+        lowered = {code: table[ord(chr(code).lower())] for code in range(65, 123) if ord(chr(code).lower()) in table}
+        kernel['translate'] = _byte_table(lowered)
+    elif cipher == 'vigenere':
+        if not binary:
+            vigenere_service.validate_alphabet(alphabet)
+            positions = vigenere_service.compile_alphabet(alphabet.upper())['positions']
+            kernel['letters'] = np.array([chr(code) in positions for code in range(256)])
+    elif cipher == 'hill':
+        if binary:
+            raise ValueError("Byte mode is only supported for affine and vigenere.")
+        matrix = np.array(key)
+        if matrix.ndim != 2 or matrix.shape[0] != matrix.shape[1] or matrix.shape[0] not in (2, 3):
+            raise ValueError("Matrix must be 2x2 or 3x3.")
+        kernel['letters'] = np.array([chr(code).isalpha() for code in range(256)])
+        kernel['block'] = matrix.shape[0]
+    else:
+        raise ValueError(f"Unsupported cipher: {cipher}.")
+    return kernel
+
+def transform_chunk(spec, data, offset, out):
+    """
+    Transform one chunk of a file into 'out'.
+
+    Parameters:
+    - spec (tuple): The cipher spec, as in compile_cipher.
+    - data (bytes): The chunk.
+    - offset (int): For vigenere, the key position at the start of the chunk: the number
+      of letters before it (text) or of bytes before it (binary).
+    - out: writable bytes-like of len(data) bytes.
+    """
+    cipher, mode, key, alphabet, binary = spec
+    kernel = compile_cipher(spec)
+    encrypt = mode == 'encrypt'
+    if kernel['translate'] is not None:
+        out[:] = data.translate(kernel['translate'])
+    elif cipher == 'vigenere' and binary:
+        transform = vigenere_service.encrypt_bytes if encrypt else vigenere_service.decrypt_bytes
+        transform(data, key, offset, out=out)
+    elif cipher == 'vigenere':
+        text = data.decode('latin-1')
+        rotated = vigenere_service.rotate_key(key, offset)
+        result = vigenere_service.encrypt_text(text, rotated, alphabet) if encrypt else vigenere_service.decrypt_text(text, rotated, alphabet)
+        out[:] = result.encode('latin-1')
+    else:
+        text = data.decode('latin-1')
+        matrix = np.array(key)
+        result = hill_service.encrypt_text(text, matrix, alphabet) if encrypt else hill_service.decrypt_text(text, matrix, alphabet)[0]
+        out[:] = result.encode('latin-1')
+
+def _count_task(spec, path, start, stop):
+    letters = compile_cipher(spec)['letters']
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as source:
+        return int(np.count_nonzero(letters[np.frombuffer(source, dtype=np.uint8, count=stop - start, offset=start)]))
+
+def _transform_task(spec, input_path, output_path, start, stop, offset):
+    with open(input_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as source, \
+            open(output_path, 'r+b') as output, mmap.mmap(output.fileno(), 0, access=mmap.ACCESS_WRITE) as target:
+        view = memoryview(target)[start:stop]
+        try:
+            transform_chunk(spec, source[start:stop], offset, view)
+        finally:
+            view.release()
+    return stop - start
+
+def plan_chunks(size, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Split [0, size) into consecutive (start, stop) ranges of at most chunk_size bytes.
+    """
+    return [(start, min(start + chunk_size, size)) for start in range(0, size, max(int(chunk_size), 1))]
+
+def align_chunks(source, chunks, counts, letters, block):
+    """
+    Move each chunk boundary forward to the next block boundary.
+
+    Parameters:
+    - source: the input as a bytes-like object.
+    - chunks (list of tuple): The (start, stop) ranges.
+    - counts (list of int): The number of letters in each range.
+    - letters (numpy.ndarray): The 256-entry bool table of letter bytes.
+    - block (int): The block length, in letters.
+
+    Returns:
+    - list of tuple: the aligned ranges, each holding a whole number of blocks.
+    """
+    size = chunks[-1][1]
+    bounds = [0]
+    before = 0
+    for (start, _), count in zip(chunks, counts):
+        needed = -before % block
+        position = start
+        while needed and position < size:
+            window = np.frombuffer(source, dtype=np.uint8, count=min(ALIGN_WINDOW, size - position), offset=position)
+            found = np.flatnonzero(letters[window])
+            if len(found) >= needed:
+                position += int(found[needed - 1]) + 1
+                needed = 0
+            else:
+                needed -= len(found)
+                position += len(window)
+        if bounds[-1] < position < size:
+            bounds.append(position)
+        before += count
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def transform_file(input_path, output_path, cipher, mode, key, alphabet='ABCDEFGHIJKLMNOPQRSTUVWXYZ',
+                   binary=False, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Encrypt or decrypt a file through memory maps, in parallel chunks.
+
+    The output file is preallocated to the input size and every worker writes its chunk
+    into its own mmap of it. Affine and mono-alphabetic chunks are cut at any byte.
+    Vigenère chunks first have their letters counted in parallel, and each chunk starts
+    the key at the number of letters before it. Hill chunk boundaries are moved forward
+    to the next block boundary, so every chunk holds whole blocks.
+
+    Parameters:
+    - input_path (str): The file to read.
+    - output_path (str): The file to write; it is created or truncated, and must not be the input file.
+    - cipher (str): 'affine', 'vigenere', 'mono_alphabetic' or 'hill'.
+    - mode (str): 'encrypt' or 'decrypt'.
+    - key: (a, b) for affine, a str for vigenere and mono_alphabetic, rows of the matrix for hill.
+    - alphabet (str): The alphabet of the text ciphers (default "ABCDEFGHIJKLMNOPQRSTUVWXYZ").
+    - binary (bool): Use the Z_256 byte mode of affine or vigenere.
+    - workers (int): The number of worker processes (default: one per core; 1 runs in this process).
+    - chunk_size (int): The bytes handled by one task.
+
+    Returns:
+    - dict: bytes, chunks, workers and seconds.
+
+    Raises:
+    - ValueError: for an invalid key or cipher, a Hill text that is not a whole number of blocks,
+      or an output path naming the input file.
+    """
+    if mode not in ('encrypt', 'decrypt'):
+        raise ValueError("Mode must be 'encrypt' or 'decrypt'.")
+    # The output is truncated before the input is mapped, which would destroy a shared file
+    if os.path.exists(output_path) and os.path.samefile(input_path, output_path):
+        raise ValueError("The output file must not be the input file.")
+    if cipher == 'hill':
+        key = tuple(tuple(int(value) for value in row) for row in key)
+    elif cipher == 'affine':
+        key = tuple(int(value) for value in key)
+    spec = (cipher, mode, key, alphabet, bool(binary))
+    kernel = compile_cipher(spec)
+    workers = workers or os.cpu_count() or 1
+
+    start_time = time.perf_counter()
+    size = os.path.getsize(input_path)
+    with open(output_path, 'wb') as output:
+        output.truncate(size)
+    chunks = plan_chunks(size, chunk_size)
+    if not chunks:
+        return {'bytes': 0, 'chunks': 0, 'workers': workers, 'seconds': time.perf_counter() - start_time}
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(chunks) > 1 else None
+    try:
+        def run(function, *columns):
+            if executor is None:
+                return list(map(function, *columns))
+            return list(executor.map(function, *columns))
+
+        offsets = [0] * len(chunks)
+        if kernel['letters'] is not None:
+            counts = run(_count_task, [spec] * len(chunks), [input_path] * len(chunks),
+                         [start for start, _ in chunks], [stop for _, stop in chunks])
+            total = sum(counts)
+            if total % kernel['block']:
+                raise ValueError(f"Text length must be divisible by {kernel['block']} for the given matrix size.")
+            if kernel['block'] > 1:
+                with open(input_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as source:
+                    chunks = align_chunks(source, chunks, counts, kernel['letters'], kernel['block'])
+            else:
+                offsets = np.concatenate(([0], np.cumsum(counts)[:-1])).tolist()
+        elif cipher == 'vigenere':
+            offsets = [start for start, _ in chunks]
+
+        run(_transform_task, [spec] * len(chunks), [input_path] * len(chunks), [output_path] * len(chunks),
+            [start for start, _ in chunks], [stop for _, stop in chunks], offsets)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return {
+        'bytes': size,
+        'chunks': len(chunks),
+        'workers': workers if executor is not None else 1,
+        'seconds': time.perf_counter() - start_time,
+    }
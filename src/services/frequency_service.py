@@ -0,0 +1,88 @@
+import numpy as np
+
+# Relative frequencies of letters in English text
+ENGLISH_LETTER_FREQUENCIES = {
+    'A': 0.08167, 'B': 0.01492, 'C': 0.02782, 'D': 0.04253, 'E': 0.12702,
+    'F': 0.02228, 'G': 0.02015, 'H': 0.06094, 'I': 0.06966, 'J': 0.00153,
+    'K': 0.00772, 'L': 0.04025, 'M': 0.02406, 'N': 0.06749, 'O': 0.07507,
+    'P': 0.01929, 'Q': 0.00095, 'R': 0.05987, 'S': 0.06327, 'T': 0.09056,
+    'U': 0.02758, 'V': 0.00978, 'W': 0.02360, 'X': 0.00150, 'Y': 0.01974,
+    'Z': 0.00074,
+}
+
+# Frequency assumed for alphabet symbols that never occur in English letters
+MIN_FREQUENCY = 1e-4
+
+
+def text_to_indices(text, alphabet):
+    """
+    Convert the characters of a text that belong to the alphabet into alphabet indices.
+
+    Letters are compared in uppercase, characters outside the alphabet are dropped.
+
+    Parameters:
+    - text: str, the text to convert.
+    - alphabet: str, the custom alphabet to use.
+
+    Returns:
+    - numpy.ndarray: int64 array of alphabet indices, in text order.
+    """
+    codes = np.frombuffer(text.upper().encode('utf-32-le'), dtype=np.uint32)
+    alphabet_codes = np.array([ord(char) for char in alphabet], dtype=np.uint32)
+    # Stable sort keeps the first occurrence of a duplicated symbol in front
+    order = np.argsort(alphabet_codes, kind='stable')
+    sorted_codes = alphabet_codes[order]
+
+    positions = np.searchsorted(sorted_codes, codes)
+    positions[positions == len(sorted_codes)] = 0
+    valid = sorted_codes[positions] == codes if len(sorted_codes) else np.zeros(len(codes), dtype=bool)
+    return order[positions[valid]].astype(np.int64)
+
+def letter_histogram(indices, mod):
+    """
+    Count the occurrences of each alphabet index.
+
+    Parameters:
+    - indices: numpy.ndarray, alphabet indices as returned by text_to_indices.
+    - mod: int, the length of the alphabet.
+
+    Returns:
+    - numpy.ndarray: array of length 'mod' with the count of each index.
+    """
+    return np.bincount(indices, minlength=mod)
+
+def expected_frequencies(alphabet):
+    """
+    Build the expected relative frequency of each alphabet symbol in English plaintext.
+
+    Parameters:
+    - alphabet: str, the custom alphabet to use.
+
+    Returns:
+    - numpy.ndarray: float array of length len(alphabet) summing to 1.
+    """
+    frequencies = np.array(
+        [ENGLISH_LETTER_FREQUENCIES.get(char.upper(), MIN_FREQUENCY) for char in alphabet],
+        dtype=np.float64,
+    )
+    return frequencies / frequencies.sum()
+
+def chi_squared(histograms, expected):
+    """
+    Compute the chi-squared statistic of one or more letter histograms against expected frequencies.
+
+    Lower values indicate a closer match to the expected language.
+
+    Parameters:
+    - histograms: numpy.ndarray, shape (..., mod) letter counts.
+    - expected: numpy.ndarray, shape (mod,) relative frequencies as returned by expected_frequencies.
+
+    Returns:
+    - numpy.ndarray: chi-squared statistic for each histogram, shape (...).
+    """
+    histograms = np.asarray(histograms, dtype=np.float64)
+    totals = histograms.sum(axis=-1, keepdims=True)
+    expected_counts = totals * expected
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = np.where(expected_counts > 0, (histograms - expected_counts) ** 2 / expected_counts, 0.0)
+    return terms.sum(axis=-1)
@@ -1,5 +1,17 @@
+from itertools import combinations
+
 import numpy as np
 
+from . import layout_service
+from .modmath import mod_inverse, inverse_table
+from .frequency_service import letter_histogram, expected_frequencies, chi_squared
+
+# Number of crib offsets stacked into one array when searching for a key
+CRACK_BATCH_SIZE = 65536
+
+# Number of leading crib blocks combined when looking for an invertible plaintext matrix
+CRIB_BLOCK_LIMIT = 8
+
 
 def mod_inverse_matrix(matrix, mod=26):
     """
@@ -19,7 +31,7 @@ def mod_inverse_matrix(matrix, mod=26):
     if det == 0:
         raise ValueError("Matrix determinant is zero, inverse does not exist.")
 
-    det_inv = pow(det % mod, -1, mod)  # Modular inverse of the determinant
+    det_inv = mod_inverse(det, mod)  # Modular inverse of the determinant
     adjugate = np.round(det * np.linalg.inv(matrix)).astype(int)  # Adjugate matrix
     return (det_inv * adjugate % mod).astype(int)
 
@@ -50,15 +62,37 @@ def process_text(text):
     """
     return ''.join([char for char in text if char.isalpha()]).upper()
 
-def hill_cipher(text, matrix, alphabet, mode='encrypt'):
+def transform_blocks(indices, matrix, mod):
+    """
+    Apply the Hill transformation to a stream of alphabet indices with a single matrix multiply.
+
+    Parameters:
+    - indices: numpy.ndarray, alphabet indices whose length is a multiple of the matrix size.
+    - matrix: numpy.ndarray, the matrix used for transformation.
+    - mod: int, the length of the alphabet.
+
+    Returns:
+    - numpy.ndarray: the transformed indices, in the same order.
+    """
+    matrix_size = matrix.shape[0]
+    blocks = indices.reshape(-1, matrix_size)
+    # Each row block b becomes (matrix @ b), i.e. blocks @ matrix.T
+    return ((blocks @ matrix.T.astype(np.int64)) % mod).reshape(-1)
+
+def hill_cipher(text, matrix, alphabet, mode='encrypt', output='preserve'):
     """
     Core function for the Hill cipher, encrypts or decrypts text based on the provided matrix.
 
+    The layout of the text is recorded in one scan; its letters, as alphabet indices, are
+    reshaped into an (n_blocks x k) array, transformed with one matrix multiply modulo the
+    alphabet length, and scattered back, so the whole operation runs in linear time.
+
     Parameters:
     - text: str, the text to encrypt or decrypt.
     - matrix: numpy.ndarray, the matrix used for transformation.
     - alphabet: str, the custom alphabet to use.
     - mode: str, 'encrypt' for encryption, 'decrypt' for decryption.
+    - output: str, one of layout_service.OUTPUT_MODES (default 'preserve').
 
     Returns:
     - str: the resulting encrypted or decrypted text.
@@ -66,40 +100,36 @@ def hill_cipher(text, matrix, alphabet, mode='encrypt'):
     matrix_size = matrix.shape[0]
     mod = len(alphabet)
 
-    # Create mappings for the alphabet
-    ALPHABET_DICT = {char: idx for idx, char in enumerate(alphabet)}
-    REVERSE_ALPHABET_DICT = {idx: char for idx, char in enumerate(alphabet)}
-
-    def text_to_vector(block):
-        return [ALPHABET_DICT[char] for char in block]
-
-    def vector_to_text(vector):
-        return ''.join(REVERSE_ALPHABET_DICT[num % mod] for num in vector)
+    layout = layout_service.scan(text, alphabet, strict=True)
+    if len(layout) % matrix_size != 0:
+        raise ValueError(f"Text length must be divisible by {matrix_size} for the given matrix size.")
+    if len(layout) == 0 and output == 'preserve':
+        return text
 
-    validate_text_length(text, matrix_size)
-    processed_text = process_text(text)
-    result_text = ''
+    return layout.render(transform_blocks(layout.indices, matrix, mod), output)
 
-    for i in range(0, len(processed_text), matrix_size):
-        block = processed_text[i:i + matrix_size]
-        vector = text_to_vector(block)
+def split_blocks(text, alphabet, matrix_size):
+    """
+    Split the text after its last complete block of alphabetic characters.
 
-        # Perform matrix multiplication
-        transformed_vector = np.dot(matrix, vector) % mod
-        result_text += vector_to_text(transformed_vector.astype(int))
+    Parameters:
+    - text: str, the input text.
+    - alphabet: str, the custom alphabet to use.
+    - matrix_size: int, the size of the matrix (the block length).
 
-    # Reinsert non-alphabet characters
-    full_result = ''
-    j = 0
-    for char in text:
-        if char.upper() in alphabet:
-            full_result += result_text[j]
-            j += 1
-        else:
-            full_result += char
-    return full_result
+    Returns:
+    - tuple:
+        - str: the prefix holding every complete block.
+        - str: the rest of the text, starting at the first letter of the incomplete block.
+    """
+    layout = layout_service.scan(text, alphabet, strict=True)
+    remainder = len(layout) % matrix_size
+    if remainder == 0:
+        return text, ''
+    cut = int(layout.positions[len(layout) - remainder])
+    return text[:cut], text[cut:]
 
-def encrypt_text(text, matrix, alphabet):
+def encrypt_text(text, matrix, alphabet, output='preserve'):
     """
     Encrypt text using the Hill cipher with the specified key matrix and alphabet.
 
@@ -107,6 +137,7 @@ def encrypt_text(text, matrix, alphabet):
     - text: str, the text to encrypt.
     - matrix: numpy.ndarray, the key matrix used for encryption (2x2 or 3x3).
     - alphabet: str, the custom alphabet to use.
+    - output: str, one of layout_service.OUTPUT_MODES (default 'preserve').
 
     Returns:
     - str: the encrypted text.
@@ -116,9 +147,9 @@ def encrypt_text(text, matrix, alphabet):
     """
     if matrix.shape[0] != matrix.shape[1] or matrix.shape[0] not in [2, 3]:
         raise ValueError("Matrix must be 2x2 or 3x3.")
-    return hill_cipher(text, matrix, alphabet, mode='encrypt')
+    return hill_cipher(text, matrix, alphabet, mode='encrypt', output=output)
 
-def decrypt_text(text, matrix, alphabet):
+def decrypt_text(text, matrix, alphabet, output='preserve'):
     """
     Decrypt text using the Hill cipher with the specified key matrix and alphabet.
 
@@ -126,6 +157,7 @@ def decrypt_text(text, matrix, alphabet):
     - text: str, the text to decrypt.
     - matrix: numpy.ndarray, the key matrix used for decryption (2x2 or 3x3).
     - alphabet: str, the custom alphabet to use.
+    - output: str, one of layout_service.OUTPUT_MODES (default 'preserve').
 
     Returns:
     - tuple:
@@ -138,5 +170,191 @@ def decrypt_text(text, matrix, alphabet):
     if matrix.shape[0] != matrix.shape[1] or matrix.shape[0] not in [2, 3]:
         raise ValueError("Matrix must be 2x2 or 3x3.")
     inverse_matrix = mod_inverse_matrix(matrix, mod=len(alphabet))
-    decrypted_text = hill_cipher(text, inverse_matrix, alphabet, mode='decrypt')
+    decrypted_text = hill_cipher(text, inverse_matrix, alphabet, mode='decrypt', output=output)
     return decrypted_text, inverse_matrix.tolist()
+
+def transform_many(texts, matrix, alphabet, mode='encrypt'):
+    """
+    Encrypt or decrypt several texts with the same key matrix in one matrix multiply.
+
+    The texts are joined and classified together; since every text must hold complete
+    blocks, the blocks of the joined text never straddle two texts.
+
+    Parameters:
+    - texts: list of str, the input texts.
+    - matrix: numpy.ndarray, the key matrix (2x2 or 3x3).
+    - alphabet: str, the custom alphabet to use.
+    - mode: str, 'encrypt' or 'decrypt'.
+
+    Returns:
+    - list of str: the transformed texts, in order.
+
+    Raises:
+    - ValueError: if the matrix is invalid or any text cannot be transformed on its own.
+    """
+    if matrix.shape[0] != matrix.shape[1] or matrix.shape[0] not in [2, 3]:
+        raise ValueError("Matrix must be 2x2 or 3x3.")
+    mod = len(alphabet)
+    if mode == 'decrypt':
+        matrix = mod_inverse_matrix(matrix, mod=mod)
+    matrix_size = matrix.shape[0]
+
+    layout = layout_service.scan(''.join(texts), alphabet, strict=True)
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    bounds = np.concatenate(([0], np.cumsum(lengths)))
+    letter_counts = np.diff(np.searchsorted(layout.positions, bounds))
+    if np.any(letter_counts % matrix_size):
+        raise ValueError(f"Text length must be divisible by {matrix_size} for the given matrix size.")
+    if len(layout) == 0:
+        return list(texts)
+
+    transformed = layout.render(transform_blocks(layout.indices, matrix, mod))
+    return [transformed[start:end] for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist())]
+
+def batch_mod_inverse_matrices(matrices, mod):
+    """
+    Invert a stack of 2x2 or 3x3 matrices under a modulus, using the adjugate formula.
+
+    Parameters:
+    - matrices: numpy.ndarray, shape (n, k, k) integer matrices with k in (2, 3).
+    - mod: int, the modulus for the inversion operation.
+
+    Returns:
+    - tuple:
+        - numpy.ndarray: shape (n, k, k) inverses (undefined where not invertible).
+        - numpy.ndarray: bool mask of the matrices that are invertible under the modulus.
+    """
+    matrices = np.asarray(matrices, dtype=np.int64) % mod
+    if matrices.shape[-1] == 2:
+        a, b = matrices[:, 0, 0], matrices[:, 0, 1]
+        c, d = matrices[:, 1, 0], matrices[:, 1, 1]
+        det = a * d - b * c
+        adjugate = np.stack([np.stack([d, -b], axis=-1), np.stack([-c, a], axis=-1)], axis=1)
+    else:
+        rows = [matrices[:, 0], matrices[:, 1], matrices[:, 2]]
+        # Columns of the adjugate are the cross products of the other two rows
+        adjugate = np.stack([np.cross(rows[1], rows[2]), np.cross(rows[2], rows[0]), np.cross(rows[0], rows[1])], axis=-1)
+        det = np.einsum('ij,ij->i', rows[0], adjugate[:, :, 0])
+
+    det = det % mod
+    det_inverse = inverse_table(mod)[det]
+    invertible = det_inverse != 0
+    return (det_inverse[:, None, None] * (adjugate % mod)) % mod, invertible
+
+def crack_text(ciphertext, crib, alphabet, size=None, top_k=5, preview_length=80):
+    """
+    Recover the Hill key matrix from a ciphertext and a known plaintext fragment (crib).
+
+    The crib may start at any letter position. For every position, any k of the complete
+    plaintext blocks covered by the crib give a k x k plaintext matrix P and the matching
+    ciphertext matrix C, so the key is K = C P^-1 (mod m). Positions are processed in
+    batches of stacked arrays. A candidate key is kept only if it maps every crib block to
+    the ciphertext and is invertible, and candidates are ranked by the chi-squared distance
+    of the full decryption from English.
+
+    Parameters:
+    - ciphertext: str, the text to crack.
+    - crib: str, known plaintext contained in the message.
+    - alphabet: str, the custom alphabet to use.
+    - size: int, the matrix size (2 or 3), or None to try both.
+    - top_k: int, the number of key candidates to return.
+    - preview_length: int, the number of letters decrypted for each preview.
+
+    Returns:
+    - list of dict: the key candidates, best first, each with 'matrix', 'keyString',
+      'offset' (letter position of the crib), 'score' and 'preview'.
+
+    Raises:
+    - ValueError: if the size is not 2 or 3, or if the alphabet is invalid.
+    """
+    sizes = [2, 3] if size is None else [int(size)]
+    if any(matrix_size not in [2, 3] for matrix_size in sizes):
+        raise ValueError("Matrix must be 2x2 or 3x3.")
+    mod = len(alphabet)
+    if mod < 2:
+        raise ValueError("Alphabet must contain at least two characters.")
+
+    cipher_indices = layout_service.scan(ciphertext, alphabet, strict=True).indices
+    crib_indices = layout_service.scan(crib, alphabet, strict=True).indices
+    expected = expected_frequencies(alphabet)
+
+    candidates = {}
+    for matrix_size in sizes:
+        for key, offset in _crib_keys(cipher_indices, crib_indices, matrix_size, mod):
+            key_string = ','.join(map(str, key.reshape(-1).tolist()))
+            if key_string in candidates:
+                continue
+            inverse, invertible = batch_mod_inverse_matrices(key[None], mod)
+            if not invertible[0]:
+                continue
+            usable = len(cipher_indices) - len(cipher_indices) % matrix_size
+            plaintext = transform_blocks(cipher_indices[:usable], inverse[0], mod)
+            candidates[key_string] = {
+                'matrix': key.tolist(),
+                'keyString': key_string,
+                'offset': offset,
+                'score': float(chi_squared(letter_histogram(plaintext, mod), expected)),
+                'preview': ''.join(alphabet[i] for i in plaintext[:preview_length].tolist()),
+            }
+
+    ranked = sorted(candidates.values(), key=lambda candidate: candidate['score'])
+    return ranked[:max(1, int(top_k))]
+
+def _crib_keys(cipher_indices, crib_indices, matrix_size, mod):
+    """
+    Yield (key, offset) for every crib position that determines a consistent key matrix.
+    """
+    k = matrix_size
+    n, crib_length = len(cipher_indices), len(crib_indices)
+    n -= n % k
+    offsets = np.arange(0, max(n - crib_length + 1, 0), dtype=np.int64)
+    # First block boundary inside the crib, and the number of complete blocks it covers
+    starts = -(-offsets // k) * k
+    block_counts = (offsets + crib_length - starts) // k
+    offsets, starts, block_counts = offsets[block_counts >= k], starts[block_counts >= k], block_counts[block_counts >= k]
+    if len(offsets) == 0:
+        return
+
+    max_blocks = min(int(block_counts.max()), CRIB_BLOCK_LIMIT)
+    element_range = np.arange(k)
+    for batch in range(0, len(offsets), CRACK_BATCH_SIZE):
+        batch_offsets = offsets[batch:batch + CRACK_BATCH_SIZE]
+        batch_starts = starts[batch:batch + CRACK_BATCH_SIZE]
+        batch_counts = block_counts[batch:batch + CRACK_BATCH_SIZE]
+        found = np.zeros(len(batch_offsets), dtype=bool)
+
+        # Try each choice of k crib blocks until P is invertible
+        for blocks in combinations(range(max_blocks), k):
+            active = ~found & (batch_counts > blocks[-1])
+            if not active.any():
+                continue
+            rows = np.flatnonzero(active)
+            block_starts = batch_starts[rows][:, None] + np.array(blocks)[None, :] * k
+            # positions[r, j, i] is element i of block j in the ciphertext letter stream
+            positions = block_starts[:, :, None] + element_range[None, None, :]
+            # Columns of P and C are the plaintext and ciphertext block vectors
+            plain = np.transpose(crib_indices[positions - batch_offsets[rows][:, None, None]], (0, 2, 1))
+            cipher = np.transpose(cipher_indices[positions], (0, 2, 1))
+
+            plain_inverse, invertible = batch_mod_inverse_matrices(plain, mod)
+            rows, plain_inverse, cipher = rows[invertible], plain_inverse[invertible], cipher[invertible]
+            found[rows] = True
+            keys = np.matmul(cipher, plain_inverse) % mod
+
+            # Check each key against the leading crib blocks at once, then the full crib for survivors
+            check_starts = batch_starts[rows][:, None] + np.arange(max_blocks)[None, :] * k
+            check_positions = check_starts[:, :, None] + element_range[None, None, :]
+            covered = np.arange(max_blocks)[None, :] < batch_counts[rows][:, None]
+            check_positions = np.where(covered[:, :, None], check_positions, batch_starts[rows][:, None, None])
+            check_plain = crib_indices[check_positions - batch_offsets[rows][:, None, None]]
+            check_cipher = cipher_indices[check_positions]
+            mapped = np.matmul(check_plain, np.transpose(keys, (0, 2, 1))) % mod
+            consistent = ((mapped == check_cipher).all(axis=2) | ~covered).all(axis=1)
+
+            for key, row in zip(keys[consistent], rows[consistent].tolist()):
+                offset = int(batch_offsets[row])
+                start, count = int(batch_starts[row]), int(batch_counts[row])
+                crib_blocks = crib_indices[start - offset:start - offset + count * k].reshape(count, k)
+                cipher_blocks = cipher_indices[start:start + count * k].reshape(count, k)
+                if np.array_equal((crib_blocks @ key.T) % mod, cipher_blocks):
+                    yield key, offset
@@ -0,0 +1,304 @@
+import atexit
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from .log_service import DB_PATH, ensure_schema, get_logger
+from .parallel_service import init_worker
+
+# How long finished jobs and their results are kept, in seconds
+DEFAULT_TTL = 3600.0
+
+# Largest number of jobs queued or running on one pool
+DEFAULT_MAX_JOBS = 32
+
+# Expired jobs are deleted at most once per this many seconds
+EXPIRE_INTERVAL = 30.0
+
+# How long a queue's claim on its pending jobs holds, in seconds; it is renewed every third of that
+LEASE_SECONDS = 60.0
+
+# Statuses stored in the jobs table; 'running' is reported for queued jobs a worker has picked up
+PENDING = 'queued'
+
+
+class QueueFullError(RuntimeError):
+    """
+    Raised when a job is submitted while the pool already holds the maximum number of jobs.
+    """
+
+
+class JobQueue:
+    """
+    Runs long jobs on a process pool and keeps their state in the jobs table.
+
+    Each job is a call runner(cipher, payload) in a worker process, returning
+    (body, status_code, mimetype, log_entries). The job row is written when the job is
+    submitted and again when it finishes, so the state and result of a job can be read
+    from any thread and survive a restart. Finished jobs are deleted once their TTL has passed.
+
+    Several processes may share the jobs table, so every pending job is owned by the queue
+    running it. The owner renews its lease on its jobs while it runs and releases them on
+    shutdown. start() resubmits only the pending jobs it claims with a single UPDATE: those
+    without an owner, or whose owner's lease has lapsed because its process died.
+    """
+
+    def __init__(self, runner, db_path=DB_PATH, workers=None, max_jobs=DEFAULT_MAX_JOBS, ttl=DEFAULT_TTL):
+        """
+        Parameters:
+        - runner: a top-level function (so it can be sent to the workers) running one job.
+        - db_path (str): The SQLite database holding the jobs table.
+        - workers (int): The number of worker processes (default: one per core).
+        - max_jobs (int): The largest number of jobs queued or running at once.
+        - ttl (float): How long a finished job is kept, in seconds.
+        """
+        self.runner = runner
+        self.owner = uuid.uuid4().hex
+        self.db_path = db_path
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self._executor = None
+        self._futures = {}
+        self._closing = False
+        self._renewer = None
+        self._stopped = threading.Event()
+        self._next_expiry = 0.0
+        # Reentrant: a future that is already done runs its callback inside submit
+        self._lock = threading.RLock()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.db_path, timeout=10.0)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def _execute(self, sql, params=()):
+        connection = self._connect()
+        try:
+            with connection:
+                cursor = connection.execute(sql, params)
+                return cursor.fetchall(), cursor.rowcount
+        finally:
+            connection.close()
+
+    def start(self):
+        """
+        Start the worker pool and resubmit the pending jobs no live queue owns.
+
+        Called by every other method, so the jobs resume on the first use after a restart.
+        """
+        with self._lock:
+            if self._executor is not None:
+                return
+            ensure_schema(self.db_path)
+            # Switch to WAL before any concurrent use, as the audit logger does on its connection
+            self._execute('PRAGMA journal_mode=WAL')
+            self._closing = False
+            # Workers run one job each and start no process pools of their own
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker)
+            self._stopped.clear()
+            self._renewer = threading.Thread(target=self._renew_leases, name='job-lease', daemon=True)
+            self._renewer.start()
+
+            now = time.time()
+            self._execute('''
+                UPDATE jobs SET owner = ?, lease_expires = ?
+                WHERE status = ? AND (owner IS NULL OR lease_expires < ?)
+            ''', (self.owner, now + LEASE_SECONDS, PENDING, now))
+            rows, _ = self._execute(
+                'SELECT id, cipher, payload FROM jobs WHERE status = ? AND owner = ? ORDER BY created_at',
+                (PENDING, self.owner))
+            for row in rows:
+                self._dispatch(row['id'], row['cipher'], json.loads(row['payload']))
+
+    def _renew_leases(self):
+        while not self._stopped.wait(LEASE_SECONDS / 3):
+            self._execute('UPDATE jobs SET lease_expires = ? WHERE status = ? AND owner = ?',
+                          (time.time() + LEASE_SECONDS, PENDING, self.owner))
+
+    def shutdown(self, wait=True):
+        """
+        Stop the worker pool. Jobs that have not finished stay pending in the table, released
+        so the next queue to start resumes them.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+            renewer, self._renewer = self._renewer, None
+            self._closing = True
+        self._stopped.set()
+        if renewer is not None:
+            renewer.join()
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+            self._execute('UPDATE jobs SET owner = NULL, lease_expires = NULL WHERE status = ? AND owner = ?',
+                          (PENDING, self.owner))
+
+    def submit(self, cipher, payload):
+        """
+        Queue a job and return at once.
+
+        Parameters:
+        - cipher (str): The cipher the job runs for.
+        - payload (dict): The JSON payload passed to the runner.
+
+        Returns:
+        - str: The job id.
+
+        Raises:
+        - QueueFullError: if max_jobs jobs are already queued or running.
+        """
+        self.start()
+        self.expire()
+        with self._lock:
+            if len(self._futures) >= self.max_jobs:
+                raise QueueFullError(f'At most {self.max_jobs} jobs can be queued or running at once.')
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            self._execute(
+                'INSERT INTO jobs (id, cipher, status, payload, created_at, owner, lease_expires) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (job_id, cipher, PENDING, json.dumps(payload), now, self.owner, now + LEASE_SECONDS),
+            )
+            self._dispatch(job_id, cipher, payload)
+        return job_id
+
+    def _dispatch(self, job_id, cipher, payload):
+        future = self._executor.submit(self.runner, cipher, payload)
+        self._futures[job_id] = future
+        future.add_done_callback(lambda future: self._finish(job_id, future))
+
+    def _finish(self, job_id, future):
+        with self._lock:
+            self._futures.pop(job_id, None)
+            if self._closing and future.cancelled():
+                return  # Shutting down: the job stays pending and is resubmitted on restart
+
+        body = status_code = mimetype = None
+        if future.cancelled():
+            status = 'cancelled'
+        else:
+            try:
+                body, status_code, mimetype, entries = future.result()
+                status = 'done'
+                get_logger().log_batch(entries)
+            except Exception as e:
+                status = 'failed'
+                body, status_code, mimetype = json.dumps({'error': str(e)}), 500, 'application/json'
+            if isinstance(body, bytes):
+                body = body.decode('utf-8')
+
+        now = time.time()
+        # A job cancelled while it was running keeps its 'cancelled' status; its result is discarded.
+        # So is the result of a job another queue has claimed since this one's lease lapsed.
+        self._execute('''
+            UPDATE jobs SET status = ?, result = ?, status_code = ?, mimetype = ?, finished_at = ?, expires_at = ?
+            WHERE id = ? AND status = ? AND owner = ?
+        ''', (status, body, status_code, mimetype, now, now + self.ttl, job_id, PENDING, self.owner))
+
+    def get(self, job_id):
+        """
+        Look up the state of a job.
+
+        Returns:
+        - dict: jobId, cipher, status ('queued', 'running', 'done', 'failed' or 'cancelled'),
+          createdAt, finishedAt and expiresAt (Unix times), or None for an unknown or expired job.
+        """
+        self.start()
+        self.expire()
+        rows, _ = self._execute(
+            'SELECT id, cipher, status, created_at, finished_at, expires_at FROM jobs WHERE id = ?', (job_id,))
+        if not rows:
+            return None
+        row = rows[0]
+        status = row['status']
+        with self._lock:
+            future = self._futures.get(job_id)
+        if status == PENDING and future is not None and future.running():
+            status = 'running'
+        return {
+            'jobId': row['id'],
+            'cipher': row['cipher'],
+            'status': status,
+            'createdAt': row['created_at'],
+            'finishedAt': row['finished_at'],
+            'expiresAt': row['expires_at'],
+        }
+
+    def result(self, job_id):
+        """
+        Fetch the result of a job.
+
+        Returns:
+        - tuple: (status, body, status_code, mimetype); body, status_code and mimetype are
+          None until the job is done or failed. None for an unknown or expired job.
+        """
+        self.start()
+        self.expire()
+        rows, _ = self._execute('SELECT status, result, status_code, mimetype FROM jobs WHERE id = ?', (job_id,))
+        if not rows:
+            return None
+        row = rows[0]
+        return row['status'], row['result'], row['status_code'], row['mimetype']
+
+    def cancel(self, job_id):
+        """
+        Cancel a job that has not finished.
+
+        A queued job is removed from the pool. A running job cannot be interrupted, so it
+        is marked cancelled and its result is discarded when it completes.
+
+        Returns:
+        - bool: True if the job was cancelled, False if it is unknown or already finished.
+        """
+        self.start()
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            return True
+        now = time.time()
+        _, count = self._execute(
+            'UPDATE jobs SET status = ?, finished_at = ?, expires_at = ? WHERE id = ? AND status = ?',
+            ('cancelled', now, now + self.ttl, job_id, PENDING),
+        )
+        return count > 0
+
+    def pending(self):
+        """
+        Return the number of jobs queued or running on the pool.
+        """
+        with self._lock:
+            return len(self._futures)
+
+    def expire(self, force=False):
+        """
+        Delete the finished jobs whose TTL has passed, at most once per EXPIRE_INTERVAL.
+
+        Returns:
+        - int: The number of jobs deleted.
+        """
+        now = time.time()
+        if not force and now < self._next_expiry:
+            return 0
+        self._next_expiry = now + EXPIRE_INTERVAL
+        ensure_schema(self.db_path)
+        _, count = self._execute('DELETE FROM jobs WHERE expires_at < ?', (now,))
+        return count
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_job_queue(runner):
+    """
+    Return the process-wide job queue for encryption_log.db, created on first use.
+
+    The pool is stopped when the interpreter exits; unfinished jobs are resumed on the next start.
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(runner)
+            atexit.register(_queue.shutdown, wait=False)
+        return _queue
@@ -0,0 +1,178 @@
+import numpy as np
+
+# 'preserve' keeps every non-letter in place and writes the letters in uppercase,
+# 'preserve_case' also restores the case of each letter, 'strip' keeps the letters only
+# and 'blocks' groups them in blocks of BLOCK_LENGTH letters
+OUTPUT_MODES = ('preserve', 'preserve_case', 'strip', 'blocks')
+
+BLOCK_LENGTH = 5
+
+# Texts whose code points are all below this are classified through a lookup table instead of a sort
+TABLE_LIMIT = 1 << 16
+
+
+def _distinct_codes(codes):
+    """
+    Find the distinct code points of a text and the slot of each in per-code tables.
+
+    Returns:
+    - tuple:
+        - list of int: the distinct code points.
+        - list of int: the table slot of each distinct code point.
+        - int: the size of the tables.
+        - numpy.ndarray: the table slot of every character of the text.
+    """
+    if len(codes) and int(codes.max()) < TABLE_LIMIT:
+        distinct = np.flatnonzero(np.bincount(codes)).tolist()
+        return distinct, distinct, distinct[-1] + 1, codes
+    distinct, inverse = np.unique(codes, return_inverse=True)
+    return distinct.tolist(), range(len(distinct)), len(distinct), inverse
+
+def _decode(codes):
+    return np.ascontiguousarray(codes, dtype=np.uint32).tobytes().decode('utf-32-le')
+
+def _lower_codes(codes):
+    distinct, slots, size, lookup = _distinct_codes(codes)
+    table = np.zeros(size, dtype=np.uint32)
+    for slot, code in zip(slots, distinct):
+        lower = chr(code).lower()
+        table[slot] = ord(lower) if len(lower) == 1 else code
+    return table[lookup]
+
+
+class Layout:
+    """
+    The layout of a text: where its letters are and which of them were lowercase.
+
+    A layout is recorded by scan() in one pass over the text. A cipher kernel then only
+    sees the contiguous stream of letters, and render() scatters its output back.
+
+    Attributes:
+    - codes (numpy.ndarray): the text as uint32 code points.
+    - positions (numpy.ndarray): the position of every letter in the text, in order.
+    - lowercase (numpy.ndarray): bool per letter, set for the letters that were lowercase.
+    - letter_codes (numpy.ndarray): the uppercase code point of every letter.
+    - indices (numpy.ndarray): the alphabet index of every letter, or None without an alphabet.
+    - alphabet (str): the alphabet given to scan(), or None.
+    """
+    __slots__ = ('codes', 'positions', 'lowercase', 'letter_codes', 'indices', 'alphabet')
+
+    def __init__(self, codes, positions, lowercase, letter_codes, indices, alphabet):
+        self.codes = codes
+        self.positions = positions
+        self.lowercase = lowercase
+        self.letter_codes = letter_codes
+        self.indices = indices
+        self.alphabet = alphabet
+
+    def __len__(self):
+        return len(self.positions)
+
+    def letters(self):
+        """
+        Return the letters of the text in order, in uppercase.
+        """
+        return _decode(self.letter_codes)
+
+    def render(self, stream, output='preserve'):
+        """
+        Lay out the output of a cipher kernel.
+
+        Parameters:
+        - stream (str or numpy.ndarray): the transformed letters, as a str or as alphabet indices.
+        - output (str): one of OUTPUT_MODES.
+
+        Returns:
+        - str: the formatted text.
+
+        Raises:
+        - ValueError: for an unknown output mode, or a stream that does not fill the letter
+          positions in the 'preserve' modes.
+        """
+        if output not in OUTPUT_MODES:
+            raise ValueError(f"Output must be one of {', '.join(OUTPUT_MODES)}.")
+        if isinstance(stream, str):
+            text, stream = stream, np.frombuffer(stream.encode('utf-32-le'), dtype=np.uint32)
+        else:
+            stream = np.array([ord(char) for char in self.alphabet], dtype=np.uint32)[stream]
+            text = None
+
+        if output in ('strip', 'blocks'):
+            text = _decode(stream) if text is None else text
+            if output == 'strip':
+                return text
+            return ' '.join(text[start:start + BLOCK_LENGTH] for start in range(0, len(text), BLOCK_LENGTH))
+
+        if len(stream) != len(self.positions):
+            raise ValueError("The transformed letters do not fit the layout of the text.")
+        if output == 'preserve_case' and self.lowercase.any():
+            stream = stream.copy()
+            stream[self.lowercase] = _lower_codes(stream[self.lowercase])
+        result = self.codes.copy()
+        result[self.positions] = stream
+        return _decode(result)
+
+def scan(text, alphabet=None, strict=False):
+    """
+    Record the layout of a text in a single pass.
+
+    Every distinct character is classified once, and the per-character arrays are built
+    by table lookups, so no Python code runs per character of the text.
+
+    Parameters:
+    - text (str): The text.
+    - alphabet (str): The letters are the characters whose uppercase form is in the alphabet.
+      Without one, the letters are the alphabetic characters.
+    - strict (bool): With an alphabet, require the letters to be exactly the alphabetic characters.
+
+    Returns:
+    - Layout: the layout of the text.
+
+    Raises:
+    - ValueError: in strict mode, if an alphabetic character is not in the alphabet or a
+      non-alphabetic character is.
+    """
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    distinct, slots, size, lookup = _distinct_codes(codes)
+
+    positions = None
+    if alphabet is not None:
+        positions = {}
+        for index, char in enumerate(alphabet):
+            positions.setdefault(char, index)
+
+    is_letter = np.zeros(size, dtype=bool)
+    is_lower = np.zeros(size, dtype=bool)
+    upper_codes = np.zeros(size, dtype=np.uint32)
+    letter_index = np.zeros(size, dtype=np.int64)
+    for slot, code in zip(slots, distinct):
+        char = chr(code)
+        upper = char.upper()
+        if len(upper) != 1:
+            upper = char  # e.g. 'ß', whose uppercase form is two letters
+        if positions is None:
+            letter = char.isalpha()
+        else:
+            letter = upper in positions
+            if strict and letter != char.isalpha():
+                if letter:
+                    raise ValueError("Text contains non-alphabetic characters that are part of the alphabet.")
+                raise ValueError(f"Character '{char}' is not in the alphabet.")
+        if letter:
+            is_letter[slot] = True
+            is_lower[slot] = upper != char
+            upper_codes[slot] = ord(upper)
+            letter_index[slot] = positions[upper] if positions is not None else 0
+
+    letter_positions = np.flatnonzero(is_letter[lookup])
+    letter_slots = lookup[letter_positions]
+    if len(codes) < 1 << 32:
+        letter_positions = letter_positions.astype(np.uint32)
+    return Layout(
+        codes,
+        letter_positions,
+        is_lower[letter_slots],
+        upper_codes[letter_slots],
+        letter_index[letter_slots] if positions is not None else None,
+        alphabet,
+    )
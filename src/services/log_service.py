@@ -0,0 +1,478 @@
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from .metrics_service import AUDIT_LOG, stage_end, stage_start
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../..', 'encryption_log.db')
+
+# Operation log table of each cipher
+LOG_TABLES = {
+    'affine': 'affine_log',
+    'vigenere': 'vigenere_log',
+    'mono_alphabetic': 'mono_alphabetic_log',
+    'hill': 'hill_log',
+    'playfair': 'playfair_log',
+}
+
+# Schema migrations, applied in order; PRAGMA user_version records how many have run
+MIGRATIONS = [
+    [
+        statement
+        for table in LOG_TABLES.values()
+        for statement in (
+            f'CREATE INDEX IF NOT EXISTS idx_{table}_timestamp_id ON {table} (timestamp, id)',
+            f'CREATE INDEX IF NOT EXISTS idx_{table}_operation_timestamp_id ON {table} (operation, timestamp, id)',
+        )
+    ],
+    [
+        # State and results of the asynchronous jobs (see job_service)
+        '''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            cipher TEXT NOT NULL,
+            status TEXT NOT NULL CHECK(status IN ('queued', 'done', 'failed', 'cancelled')),
+            payload TEXT NOT NULL,
+            result TEXT,
+            status_code INTEGER,
+            mimetype TEXT,
+            created_at REAL NOT NULL,
+            finished_at REAL,
+            expires_at REAL
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_jobs_expires_at ON jobs (expires_at)',
+        'CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)',
+    ],
+    [
+        # The job queue running a pending job, and until when its claim holds without being renewed
+        'ALTER TABLE jobs ADD COLUMN owner TEXT',
+        'ALTER TABLE jobs ADD COLUMN lease_expires REAL',
+    ],
+]
+
+# Largest page a single log query may return
+MAX_PAGE_SIZE = 10000
+
+
+def migrate(connection):
+    """
+    Apply the schema migrations that have not run on this database yet.
+
+    Parameters:
+    - connection (sqlite3.Connection): A connection to the log database.
+    """
+    version = connection.execute('PRAGMA user_version').fetchone()[0]
+    for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+        with connection:
+            for statement in statements:
+                connection.execute(statement)
+            connection.execute(f'PRAGMA user_version = {number}')
+
+_migrated = set()
+
+def ensure_schema(db_path=DB_PATH):
+    """
+    Migrate the log database once per process.
+
+    Parameters:
+    - db_path (str): The SQLite database to migrate.
+    """
+    if db_path in _migrated:
+        return
+    connection = sqlite3.connect(db_path)
+    try:
+        migrate(connection)
+    finally:
+        connection.close()
+    _migrated.add(db_path)
+
+
+class AuditLogger:
+    """
+    Writes operation log rows to SQLite from a single background thread.
+
+    Requests only put (sql, params) pairs on a bounded queue. The writer thread owns one
+    persistent connection in WAL mode and inserts rows with executemany, grouped by
+    statement, once a batch is full or the flush interval has passed.
+    When the queue is full, rows are dropped (and counted) under the 'drop' policy, or
+    the caller waits up to 'block_timeout' seconds under the 'block' policy.
+    """
+
+    def __init__(self, db_path=DB_PATH, max_queue=10000, batch_size=256, flush_interval=0.5,
+                 policy='drop', block_timeout=1.0):
+        """
+        Parameters:
+        - db_path (str): The SQLite database to write to.
+        - max_queue (int): The maximum number of rows waiting to be written.
+        - batch_size (int): The number of rows that triggers a write.
+        - flush_interval (float): The longest time in seconds a row waits before being written.
+        - policy (str): 'drop' or 'block', what to do when the queue is full.
+        - block_timeout (float): How long a caller waits for room under the 'block' policy.
+        """
+        if policy not in ('drop', 'block'):
+            raise ValueError("Policy must be 'drop' or 'block'.")
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='audit-logger', daemon=True)
+                self._thread.start()
+
+    def log(self, sql, params):
+        """
+        Queue one row for insertion without touching the disk.
+
+        Parameters:
+        - sql (str): The INSERT statement.
+        - params (tuple): The values of the row.
+
+        Returns:
+        - bool: True if the row was queued, False if it was dropped.
+        """
+        self.start()
+        try:
+            if self.policy == 'block':
+                self._queue.put((sql, params), timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait((sql, params))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def log_many(self, sql, rows):
+        """
+        Queue several rows of one statement, to be written in the same transaction.
+
+        Parameters:
+        - sql (str): The INSERT statement.
+        - rows (list of tuple): The values of each row.
+
+        Returns:
+        - int: The number of rows queued.
+        """
+        return self.log_batch([(sql, params) for params in rows])
+
+    def log_batch(self, entries):
+        """
+        Queue rows of any statements as a single item, so they are written in the same transaction.
+
+        Parameters:
+        - entries (list of tuple): (sql, params) pairs.
+
+        Returns:
+        - int: The number of rows queued, either all of them or none.
+        """
+        if not entries:
+            return 0
+        self.start()
+        try:
+            if self.policy == 'block':
+                self._queue.put(list(entries), timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(list(entries))
+            return len(entries)
+        except queue.Full:
+            self.dropped += len(entries)
+            return 0
+
+    def flush(self, timeout=None):
+        """
+        Wait until every row queued before the call has been written.
+
+        Parameters:
+        - timeout (float): The longest time to wait, in seconds (None waits indefinitely).
+
+        Returns:
+        - bool: True if the rows were written within the timeout.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """
+        Write the remaining rows and stop the writer thread.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.db_path)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        migrate(connection)
+        return connection
+
+    def _write(self, connection, batch):
+        if not batch:
+            return
+        statements = {}
+        for sql, params in batch:
+            statements.setdefault(sql, []).append(params)
+        try:
+            with connection:
+                for sql, rows in statements.items():
+                    connection.executemany(sql, rows)
+            self.written += len(batch)
+        except Exception as e:
+            # A bad row must not lose the rest of the batch
+            for sql, params in batch:
+                try:
+                    with connection:
+                        connection.execute(sql, params)
+                    self.written += 1
+                except Exception as row_error:
+                    print(f"Error logging operation: {row_error}")
+            print(f"Error logging batch, rows were retried one by one: {e}")
+        batch.clear()
+
+    def _run(self):
+        connection = self._connect()
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    item = ()
+
+                if item is None:
+                    self._write(connection, batch)
+                    while True:
+                        try:
+                            pending = self._queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if isinstance(pending, tuple) and pending:
+                            batch.append(pending)
+                        elif isinstance(pending, list):
+                            batch.extend(pending)
+                        elif isinstance(pending, threading.Event):
+                            pending.set()
+                    self._write(connection, batch)
+                    return
+                if isinstance(item, threading.Event):
+                    self._write(connection, batch)
+                    item.set()
+                elif isinstance(item, list):
+                    batch.extend(item)
+                elif item:
+                    batch.append(item)
+
+                if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                    self._write(connection, batch)
+                    deadline = time.monotonic() + self.flush_interval
+        finally:
+            connection.close()
+
+
+_logger = None
+_logger_lock = threading.Lock()
+
+def get_logger():
+    """
+    Return the process-wide audit logger for encryption_log.db, created on first use.
+
+    The logger is flushed and stopped when the interpreter exits.
+    """
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            _logger = AuditLogger()
+            atexit.register(_logger.close)
+        return _logger
+
+_transaction = threading.local()
+
+def log_operation(sql, params):
+    """
+    Queue one operation log row on the shared audit logger.
+
+    Inside a log_transaction block, the row is collected and queued with the others
+    when the block ends.
+
+    Parameters:
+    - sql (str): The INSERT statement.
+    - params (tuple): The values of the row.
+    """
+    start = stage_start()
+    entries = getattr(_transaction, 'entries', None)
+    if entries is not None:
+        entries.append((sql, params))
+    else:
+        get_logger().log(sql, params)
+    stage_end(AUDIT_LOG, start)
+
+@contextmanager
+def log_transaction():
+    """
+    Collect the rows logged by the current thread inside the block and queue them as one
+    batch, which the writer commits in a single transaction.
+    """
+    if getattr(_transaction, 'entries', None) is not None:
+        # Nested blocks join the outer transaction
+        yield
+        return
+    _transaction.entries = []
+    try:
+        yield
+        get_logger().log_batch(_transaction.entries)
+    finally:
+        _transaction.entries = None
+
+@contextmanager
+def capture_logs():
+    """
+    Collect the rows logged by the current thread inside the block without queuing them.
+
+    Used where the rows cannot be written from the current process, e.g. in a worker
+    process: the caller sends the rows back and queues them with get_logger().log_batch.
+
+    Yields:
+    - list of tuple: the (sql, params) rows logged so far.
+    """
+    previous = getattr(_transaction, 'entries', None)
+    entries = []
+    _transaction.entries = entries
+    try:
+        yield entries
+    finally:
+        _transaction.entries = previous
+
+def replay_logs(entries):
+    """
+    Queue rows collected by capture_logs, as log_operation would have queued them.
+
+    Parameters:
+    - entries (list of tuple): The (sql, params) rows.
+    """
+    start = stage_start()
+    current = getattr(_transaction, 'entries', None)
+    if current is not None:
+        current.extend(entries)
+    else:
+        get_logger().log_batch(entries)
+    stage_end(AUDIT_LOG, start)
+
+def logs_size(entries):
+    """
+    Return the approximate number of bytes held by the text values of logged rows.
+    """
+    return sum(len(value) for _, params in entries for value in params if isinstance(value, (str, bytes)))
+
+def encode_cursor(timestamp, row_id):
+    return f'{timestamp}|{row_id}'
+
+def decode_cursor(cursor):
+    """
+    Split a pagination cursor into its (timestamp, id) key.
+
+    Raises:
+    - ValueError: if the cursor is malformed.
+    """
+    timestamp, separator, row_id = cursor.rpartition('|')
+    if not separator:
+        raise ValueError("Invalid cursor.")
+    return timestamp, int(row_id)
+
+def query_logs(cipher, operation=None, since=None, until=None, after=None, limit=100, db_path=DB_PATH):
+    """
+    Read operation log rows in (timestamp, id) order, one page at a time.
+
+    Pages are selected by keyset pagination on (timestamp, id), which the migration
+    indexes, so a page costs the same however deep it is. Rows are read lazily from a
+    separate read-only connection, which does not block the WAL writer.
+
+    Parameters:
+    - cipher (str): The cipher whose log is read.
+    - operation (str): Only return rows of this operation (optional).
+    - since (str): Only return rows at or after this timestamp, "YYYY-MM-DD HH:MM:SS" (optional).
+    - until (str): Only return rows before this timestamp (optional).
+    - after (str): The cursor of the last row of the previous page (optional).
+    - limit (int): The page size.
+    - db_path (str): The SQLite database to read.
+
+    Returns:
+    - generator of dict: The rows of the page, each with its 'cursor'.
+
+    Raises:
+    - ValueError: if the cipher, the limit or the cursor is invalid.
+    """
+    table = LOG_TABLES.get(cipher)
+    if table is None:
+        raise ValueError(f"No operation log for {cipher}.")
+    limit = int(limit)
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"Limit must be between 1 and {MAX_PAGE_SIZE}.")
+
+    conditions, params = [], []
+    if operation:
+        conditions.append('operation = ?')
+        params.append(operation)
+    if since:
+        conditions.append('timestamp >= ?')
+        params.append(since.replace('T', ' '))
+    if until:
+        conditions.append('timestamp < ?')
+        params.append(until.replace('T', ' '))
+    if after:
+        conditions.append('(timestamp, id) > (?, ?)')
+        params.extend(decode_cursor(after))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    sql = f'SELECT * FROM {table} {where} ORDER BY timestamp, id LIMIT ?'
+    params.append(limit)
+
+    # Make sure the indexes exist before the first query
+    ensure_schema(db_path)
+
+    def rows():
+        connection = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+        connection.row_factory = sqlite3.Row
+        try:
+            for row in connection.execute(sql, params):
+                record = dict(row)
+                record['cursor'] = encode_cursor(record['timestamp'], record['id'])
+                yield record
+        finally:
+            connection.close()
+
+    return rows()
+
+def stream_logs(rows, limit):
+    """
+    Serialize log rows as JSON lines, ending with a line holding the cursor of the next page.
+
+    Parameters:
+    - rows (iterable of dict): The rows returned by query_logs.
+    - limit (int): The page size the rows were queried with.
+
+    Returns:
+    - generator of str: One JSON document per line.
+    """
+    count, cursor = 0, None
+    for row in rows:
+        count += 1
+        cursor = row['cursor']
+        yield json.dumps(row) + '\n'
+    yield json.dumps({'next_cursor': cursor if count == int(limit) else None}) + '\n'
@@ -0,0 +1,239 @@
+import itertools
+import threading
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+from time import perf_counter_ns
+
+# Upper bounds of the latency histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _format_labels(names, values, extra=''):
+    pairs = [
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+# One lock guards every metric, so a batch of finished requests is folded in with a single acquire
+_lock = threading.Lock()
+
+
+class Counter:
+    """
+    Monotonic counter with a fixed set of label names.
+    """
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, labels=(), amount=1):
+        with _lock:
+            self._inc(labels, amount)
+
+    def _inc(self, labels, amount):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self):
+        with _lock:
+            values = dict(self._values)
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(values.items()):
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    """
+    Latency histogram with a fixed set of label names.
+
+    Each label combination keeps one row of per-bucket counts plus the sum and count of
+    the observations. Recording is a bisect outside the lock and three increments inside
+    it; buckets are only made cumulative when the metrics are read.
+    """
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._rows = {}
+
+    def observe(self, labels, value):
+        """
+        Record one observation.
+
+        Parameters:
+        - labels (tuple): The label values, in the order of the label names.
+        - value (float): The observed value, in seconds.
+        """
+        index = bisect_left(self.buckets, value)
+        with _lock:
+            self._add(labels, index, value)
+
+    def _add(self, labels, index, value):
+        row = self._rows.get(labels)
+        if row is None:
+            row = self._rows[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        row[index] += 1
+        row[-2] += value
+        row[-1] += 1
+
+    def collect(self):
+        with _lock:
+            rows = {labels: list(row) for labels, row in self._rows.items()}
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        bounds = [_format_value(bound) for bound in self.buckets] + ['+Inf']
+        for labels, row in sorted(rows.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, row):
+                cumulative += count
+                label_text = _format_labels(self.labelnames, labels, 'le="' + bound + '"')
+                lines.append(f'{self.name}_bucket{label_text} {cumulative}')
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {_format_value(row[-2])}')
+            lines.append(f'{self.name}_count{label_text} {row[-1]}')
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    'cipher_request_duration_seconds', 'Time spent handling a request.', ('cipher', 'route'))
+REQUEST_COUNT = Counter(
+    'cipher_requests_total', 'Requests handled, by response status.', ('cipher', 'route', 'status'))
+STAGE_LATENCY = Histogram(
+    'cipher_request_stage_duration_seconds', 'Time spent in each stage of a sampled request.', ('cipher', 'route', 'stage'))
+
+REGISTRY = [REQUEST_LATENCY, REQUEST_COUNT, STAGE_LATENCY]
+
+# Stages a request may be timed in; a request's timings are a list indexed like this tuple
+STAGES = ('json_parse', 'key_parse', 'kernel', 'serialize', 'audit_log')
+JSON_PARSE, KEY_PARSE, KERNEL, SERIALIZE, AUDIT_LOG = range(len(STAGES))
+
+# One request in this many has its stages timed; the others only pay a lookup per stage
+STAGE_SAMPLE_EVERY = 16
+
+# Stage timings of the request being handled, or None outside a request or when it is not sampled
+_stages = ContextVar('stages', default=None)
+_requests = itertools.count()
+
+
+def begin_request(sampled=None):
+    """
+    Start a request, timing its stages if it is sampled.
+
+    Parameters:
+    - sampled (bool): Whether to time the stages (default: one request in STAGE_SAMPLE_EVERY).
+
+    Returns:
+    - list: nanoseconds spent in each of STAGES, filled by stage_end until end_request,
+      or None when the request is not sampled.
+    """
+    if sampled is None:
+        sampled = next(_requests) % STAGE_SAMPLE_EVERY == 0
+    stages = [0] * len(STAGES) if sampled else None
+    _stages.set(stages)
+    return stages
+
+def end_request():
+    _stages.set(None)
+
+def current_stages():
+    """
+    Return the stage timings of the current request, or None when its stages are not timed.
+    """
+    return _stages.get()
+
+def stage_start():
+    """
+    Return the start time of a stage of the current request, in nanoseconds, or 0 when its
+    stages are not timed. Outside a request it does nothing, so services can be timed
+    without depending on Flask.
+    """
+    return perf_counter_ns() if _stages.get() is not None else 0
+
+def stage_end(stage, start):
+    """
+    Add the time since 'start', as returned by stage_start, to a stage of the current request.
+
+    Parameters:
+    - stage (int): The index of the stage in STAGES.
+    - start (int): The value stage_start returned.
+    """
+    if start:
+        _stages.get()[stage] += perf_counter_ns() - start
+
+def add_stages(stages):
+    """
+    Add stage timings measured elsewhere, such as in a worker process, to the current request.
+    """
+    current = _stages.get()
+    if current is not None and stages is not None:
+        for stage, nanoseconds in enumerate(stages):
+            current[stage] += nanoseconds
+
+# Finished requests waiting to be folded into the metrics: (cipher, route, status, seconds, stages)
+_pending = deque()
+
+# Past this many waiting requests, each new request folds a batch of FOLD_BATCH itself
+MAX_PENDING = 10000
+FOLD_BATCH = 64
+
+def record_request(cipher, route, status, seconds, stages):
+    """
+    Record the latency, status and stage timings (as returned by begin_request) of a finished request.
+
+    The request is only appended to a queue, which needs no lock; the metrics are updated
+    when they are rendered. Without a scraper, requests fold a small batch each once
+    MAX_PENDING are waiting, so the queue stays bounded.
+    """
+    _pending.append((cipher, route, status, seconds, stages))
+    if len(_pending) > MAX_PENDING:
+        fold(FOLD_BATCH)
+
+def fold(limit=None):
+    """
+    Fold the waiting requests into the metrics, oldest first.
+
+    Parameters:
+    - limit (int): The largest number of requests to fold (default: all of them).
+    """
+    latency_buckets = REQUEST_LATENCY.buckets
+    stage_buckets = STAGE_LATENCY.buckets
+    with _lock:
+        while limit is None or limit > 0:
+            try:
+                cipher, route, status, seconds, stages = _pending.popleft()
+            except IndexError:
+                return
+            REQUEST_LATENCY._add((cipher, route), bisect_left(latency_buckets, seconds), seconds)
+            REQUEST_COUNT._inc((cipher, route, str(status)), 1)
+            if stages is not None:
+                for stage, nanoseconds in enumerate(stages):
+                    if nanoseconds:
+                        value = nanoseconds / 1e9
+                        STAGE_LATENCY._add((cipher, route, STAGES[stage]), bisect_left(stage_buckets, value), value)
+            if limit is not None:
+                limit -= 1
+
+def render():
+    """
+    Render every registered metric in the Prometheus text exposition format.
+
+    Returns:
+    - str: The metrics, one sample per line.
+    """
+    fold()
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.collect())
+    return '\n'.join(lines) + '\n'
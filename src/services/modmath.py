@@ -0,0 +1,188 @@
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+
+# Moduli up to this size get precomputed gcd, unit and inverse tables; larger ones are computed per call.
+# It covers the letter alphabets and the 256-symbol byte alphabet while keeping the cached tables small.
+TABLE_LIMIT = 4096
+
+
+@lru_cache(maxsize=32)
+def gcd_table(mod):
+    """
+    Compute gcd(x, mod) for every residue x.
+
+    Parameters:
+    - mod (int): The modulus.
+
+    Returns:
+    - numpy.ndarray: int64 array of length 'mod' (read-only, shared between callers).
+    """
+    table = np.gcd(np.arange(mod, dtype=np.int64), mod)
+    table.flags.writeable = False
+    return table
+
+@lru_cache(maxsize=32)
+def unit_group(mod):
+    """
+    List the residues that are invertible under the modulus, in increasing order.
+
+    Parameters:
+    - mod (int): The modulus.
+
+    Returns:
+    - numpy.ndarray: int64 array of the units (read-only).
+    """
+    units = np.flatnonzero(gcd_table(mod) == 1)
+    units.flags.writeable = False
+    return units
+
+@lru_cache(maxsize=32)
+def inverse_table(mod):
+    """
+    Compute the inverse of every residue under the modulus, 0 where there is none.
+
+    For a prime modulus the table is filled in linear time with the recurrence
+    inv[i] = -(mod // i) * inv[mod % i]. For other moduli the recurrence does not apply
+    (mod % i may share a factor with mod), so the units are inverted together with
+    batch_inverse instead.
+
+    Parameters:
+    - mod (int): The modulus.
+
+    Returns:
+    - numpy.ndarray: int64 array of length 'mod' (read-only).
+    """
+    units = unit_group(mod)
+    if mod < 2:
+        table = np.zeros(mod, dtype=np.int64)
+    elif len(units) == mod - 1:
+        inverses = [0, 1 % mod]
+        for i in range(2, mod):
+            inverses.append(-(mod // i) * inverses[mod % i] % mod)
+        table = np.array(inverses[:mod], dtype=np.int64)
+    else:
+        table = np.zeros(mod, dtype=np.int64)
+        inverses, _ = batch_inverse(units.tolist(), mod)
+        table[units] = inverses
+    table.flags.writeable = False
+    return table
+
+def extended_gcd(a, b, steps=None):
+    """
+    Find g = gcd(a, b) and coefficients x, y with a*x + b*y = g.
+
+    Parameters:
+    - a (int), b (int): The numbers.
+    - steps (list): If given, each step is appended to it as [q, x0, y0, r0, x1, y1, r1],
+      the two remainders and their coefficients after the quotient q ('-' for the start).
+
+    Returns:
+    - tuple of int: (g, x, y).
+    """
+    x0, x1, y0, y1 = 1, 0, 0, 1
+    if steps is not None:
+        steps.append(['-', x0, y0, a, x1, y1, b])
+    while b:
+        q = a // b
+        a, b = b, a - q * b
+        x0, x1 = x1, x0 - q * x1
+        y0, y1 = y1, y0 - q * y1
+        if steps is not None:
+            steps.append([q, x0, y0, a, x1, y1, b])
+    return a, x0, y0
+
+def is_unit(a, mod):
+    """
+    Check whether 'a' is invertible under the modulus.
+    """
+    if 0 < mod <= TABLE_LIMIT:
+        return bool(gcd_table(mod)[a % mod] == 1)
+    return gcd(a, mod) == 1
+
+def mod_inverse(a, mod):
+    """
+    Find the inverse of 'a' under the modulus.
+
+    Moduli up to TABLE_LIMIT are answered from the cached inverse table, so repeated
+    key validation for an alphabet costs a single lookup.
+
+    Parameters:
+    - a (int): The number to invert.
+    - mod (int): The modulus.
+
+    Returns:
+    - int: The inverse of 'a'.
+
+    Raises:
+    - ValueError: if 'a' has no inverse under the modulus.
+    """
+    if mod < 2:
+        raise ValueError(f"No modular inverse for a={a} under modulo {mod}.")
+    if mod <= TABLE_LIMIT:
+        inverse = int(inverse_table(mod)[a % mod])
+        if inverse:
+            return inverse
+    else:
+        g, x, _ = extended_gcd(a % mod, mod)
+        if g == 1:
+            return x % mod
+    raise ValueError(f"No modular inverse for a={a} under modulo {mod}.")
+
+def batch_inverse(values, mod):
+    """
+    Invert many values under one modulus with Montgomery's trick.
+
+    The running products of the values are inverted with a single extended Euclid call,
+    and the individual inverses are peeled off the prefix products, for a total of
+    3(n - 1) modular multiplications. The gcd of that call tells whether every value is
+    invertible; only when it is not are the values checked one by one and the products
+    of the invertible ones taken again.
+
+    Parameters:
+    - values (list of int): The numbers to invert.
+    - mod (int): The modulus, at least 2.
+
+    Returns:
+    - tuple: (inverses, non_invertible)
+        - inverses (list): The inverse of each value, None where it does not exist.
+        - non_invertible (list of int): The positions of the values that have no inverse.
+
+    Raises:
+    - ValueError: if the modulus is smaller than 2.
+    """
+    if mod < 2:
+        raise ValueError("Modulus must be at least 2.")
+    inverses = [None] * len(values)
+    non_invertible = []
+    positions = range(len(values))
+    units = [value % mod for value in values]
+    prefix = []
+    product = 1
+    for value in units:
+        product = product * value % mod
+        prefix.append(product)
+    g, inverse, _ = extended_gcd(product, mod)
+
+    if g != 1:
+        # Some value shares a factor with the modulus: keep the invertible ones
+        positions, kept, prefix = [], [], []
+        product = 1
+        for position, value in enumerate(units):
+            if gcd(value, mod) != 1:
+                non_invertible.append(position)
+                continue
+            product = product * value % mod
+            positions.append(position)
+            kept.append(value)
+            prefix.append(product)
+        units = kept
+        _, inverse, _ = extended_gcd(product, mod)
+
+    if positions:
+        for i in range(len(positions) - 1, 0, -1):
+            inverses[positions[i]] = inverse * prefix[i - 1] % mod
+            inverse = inverse * units[i] % mod
+        inverses[positions[0]] = inverse % mod
+    return inverses, non_invertible
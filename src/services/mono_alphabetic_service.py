@@ -1,3 +1,28 @@
+import math
+import random
+from functools import lru_cache
+
+import numpy as np
+
+from . import parallel_service
+from .ngram_service import load_quadgrams
+
+@lru_cache(maxsize=256)
+def compile_key(key):
+    """
+    Compile a substitution key into a pair of translation tables for str.translate.
+
+    Parameters:
+    - key (str): A 26-character string representing the substitution key.
+
+    Returns:
+    - tuple: (encrypt_table, decrypt_table), usable on lowercased text.
+    """
+    alphabet = 'abcdefghijklmnopqrstuvwxyz'
+    encrypt_table = str.maketrans({alphabet[i]: key[i].lower() for i in range(26)})
+    decrypt_table = str.maketrans({key[i].lower(): alphabet[i] for i in range(26)})
+    return encrypt_table, decrypt_table
+
 def encrypt_text(text, key):
     """
     Encrypts text using a mono-alphabetic substitution cipher.
@@ -9,9 +34,8 @@ def encrypt_text(text, key):
     Returns:
     - str: The encrypted text, with each letter substituted according to the key.
     """
-    alphabet = 'abcdefghijklmnopqrstuvwxyz'
-    key_map = {alphabet[i]: key[i].lower() for i in range(26)}
-    return ''.join(key_map.get(char, char) for char in text.lower())
+    encrypt_table, _ = compile_key(key)
+    return text.lower().translate(encrypt_table)
 
 def decrypt_text(text, key):
     """
@@ -24,6 +48,182 @@ def decrypt_text(text, key):
     Returns:
     - str: The decrypted text, with each letter reverted to its original form based on the key.
     """
-    alphabet = 'abcdefghijklmnopqrstuvwxyz'
-    key_map = {key[i].lower(): alphabet[i] for i in range(26)}
-    return ''.join(key_map.get(char, char) for char in text.lower())
+    _, decrypt_table = compile_key(key)
+    return text.lower().translate(decrypt_table)
+
+def transform_many(texts, key, mode='encrypt'):
+    """
+    Encrypts or decrypts several texts with the same substitution key.
+
+    Parameters:
+    - texts (list of str): The input texts.
+    - key (str): A 26-character string representing the substitution key.
+    - mode (str): 'encrypt' or 'decrypt'.
+
+    Returns:
+    - list of str: The transformed texts, in order.
+    """
+    encrypt_table, decrypt_table = compile_key(key)
+    table = encrypt_table if mode == 'encrypt' else decrypt_table
+    return [text.lower().translate(table) for text in texts]
+
+
+ENGLISH_FREQUENCY_ORDER = 'ETAOINSHRDLCUMWFGYPBVKJXQZ'
+
+# Weights turning four letter indices into a quadgram code
+QUADGRAM_WEIGHTS = np.array([17576, 676, 26, 1], dtype=np.int64)
+
+
+class QuadgramState:
+    """
+    Quadgram fitness of a ciphertext under a decryption mapping, updated incrementally.
+
+    The ciphertext is reduced once to its distinct quadgrams and their counts. Swapping
+    the plaintext letters of two ciphertext letters only rescores the distinct quadgrams
+    that contain one of them, so the text is never decrypted again.
+    """
+
+    def __init__(self, indices, mapping, quadgrams):
+        """
+        Parameters:
+        - indices (numpy.ndarray): Ciphertext letter indices (0 for a to 25 for z).
+        - mapping (numpy.ndarray): Plaintext letter index for each ciphertext letter index.
+        - quadgrams (numpy.ndarray): Quadgram log10 probabilities indexed by quadgram code.
+        """
+        windows = np.lib.stride_tricks.sliding_window_view(indices, 4)
+        codes, counts = np.unique(windows @ QUADGRAM_WEIGHTS, return_counts=True)
+        self.letters = (codes[:, None] // QUADGRAM_WEIGHTS) % 26
+        self.counts = counts.astype(np.float64)
+        self.quadgrams = quadgrams
+        self.contains = [np.flatnonzero((self.letters == letter).any(axis=1)) for letter in range(26)]
+        self.member = np.zeros((26, len(codes)), dtype=bool)
+        for letter in range(26):
+            self.member[letter, self.contains[letter]] = True
+        self.mapping = mapping.copy()
+        self.values = quadgrams[self.mapping[self.letters] @ QUADGRAM_WEIGHTS]
+        self.score = float(self.counts @ self.values)
+
+    def swap_delta(self, x, y):
+        """
+        Compute the score change of swapping the plaintext letters of ciphertext letters x and y.
+
+        Returns:
+        - tuple: (delta, affected quadgram positions, their new values).
+        """
+        affected = np.concatenate([self.contains[x], self.contains[y][~self.member[x, self.contains[y]]]])
+        mapping = self.mapping.copy()
+        mapping[x], mapping[y] = mapping[y], mapping[x]
+        values = self.quadgrams[mapping[self.letters[affected]] @ QUADGRAM_WEIGHTS]
+        delta = float(self.counts[affected] @ (values - self.values[affected]))
+        return delta, affected, values
+
+    def apply_swap(self, x, y, affected, values, delta):
+        self.mapping[x], self.mapping[y] = self.mapping[y], self.mapping[x]
+        self.values[affected] = values
+        self.score += delta
+
+def _text_indices(text):
+    return np.array([ord(char) - ord('a') for char in text.lower() if 'a' <= char <= 'z'], dtype=np.int64)
+
+def frequency_mapping(indices):
+    """
+    Build the initial decryption mapping by matching ciphertext letter frequencies to English.
+
+    Parameters:
+    - indices (numpy.ndarray): Ciphertext letter indices.
+
+    Returns:
+    - numpy.ndarray: Plaintext letter index for each ciphertext letter index.
+    """
+    ranked = np.argsort(-np.bincount(indices, minlength=26), kind='stable')
+    mapping = np.empty(26, dtype=np.int64)
+    mapping[ranked] = [ord(char) - ord('A') for char in ENGLISH_FREQUENCY_ORDER]
+    return mapping
+
+def _hill_climb(args):
+    """
+    Run hill-climbing restarts, each from a perturbation of the best key so far, and return (score, mapping) of the best.
+    """
+    indices, restarts, seed = args
+    rng = random.Random(seed)
+    quadgrams = load_quadgrams()
+    start = frequency_mapping(indices)
+    pairs = [(x, y) for x in range(26) for y in range(x + 1, 26)]
+
+    best_score, best_mapping = -math.inf, start
+    for restart in range(restarts):
+        # The first climb starts from the frequency key, later ones from a perturbed best key
+        mapping = best_mapping.copy()
+        for _ in range(0 if restart == 0 else rng.randint(2, 8)):
+            x, y = rng.sample(range(26), 2)
+            mapping[x], mapping[y] = mapping[y], mapping[x]
+        state = QuadgramState(indices, mapping, quadgrams)
+
+        improved = True
+        while improved:
+            improved = False
+            rng.shuffle(pairs)
+            for x, y in pairs:
+                delta, affected, values = state.swap_delta(x, y)
+                if delta > 0:
+                    state.apply_swap(x, y, affected, values, delta)
+                    improved = True
+        if state.score > best_score:
+            best_score, best_mapping = state.score, state.mapping.copy()
+    return best_score, best_mapping
+
+def crack_text(text, restarts=40, workers=None, seed=None):
+    """
+    Recovers a mono-alphabetic substitution key from ciphertext alone.
+
+    Starting from the key that matches letter frequencies to English, each restart
+    hill-climbs over letter swaps scored by quadgram log probabilities, then the next
+    restart perturbs the best key found so far. Restarts are spread across the shared process pool.
+
+    Parameters:
+    - text (str): The ciphertext to crack.
+    - restarts (int): The total number of hill-climbing restarts.
+    - workers (int): The number of tasks the restarts are split into on the shared process pool
+      (default: parallel_service.pool_size(), 1 disables the pool).
+    - seed (int): Seed for the random restarts (optional).
+
+    Returns:
+    - dict: with
+        - 'key' (str): The 26-character key, in the format encrypt_text accepts.
+        - 'score' (float): The mean quadgram log10 probability of the decryption.
+        - 'confidence' (float): Between 0 (random text) and 1 (typical English).
+        - 'decrypted_text' (str): The ciphertext decrypted with the key.
+    """
+    indices = _text_indices(text)
+    if len(indices) < 4:
+        raise ValueError("Ciphertext must contain at least four letters.")
+
+    restarts = max(1, int(restarts))
+    task_count = max(1, min(workers or parallel_service.pool_size(), restarts))
+    seeds = random.Random(seed).sample(range(2 ** 32), task_count)
+    tasks = [(indices, len(range(i, restarts, task_count)), task_seed) for i, task_seed in enumerate(seeds)]
+    if task_count == 1:
+        results = [_hill_climb(tasks[0])]
+    else:
+        results = list(parallel_service.get_pool().map(_hill_climb, tasks))
+    best_score, mapping = max(results, key=lambda result: result[0])
+
+    # mapping[c] is the plaintext letter of ciphertext letter c; the key maps plaintext to ciphertext
+    key = [''] * 26
+    for cipher_index, plain_index in enumerate(mapping.tolist()):
+        key[plain_index] = chr(ord('A') + cipher_index)
+    key = ''.join(key)
+
+    quadgrams = load_quadgrams()
+    probabilities = 10 ** quadgrams
+    english_score = float(probabilities @ quadgrams / probabilities.sum())
+    random_score = float(quadgrams.mean())
+    score = best_score / (len(indices) - 3)
+    confidence = min(max((score - random_score) / (english_score - random_score), 0.0), 1.0)
+
+    return {
+        'key': key,
+        'score': score,
+        'confidence': confidence,
+        'decrypted_text': decrypt_text(text, key),
+    }
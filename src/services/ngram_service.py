@@ -0,0 +1,184 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+
+# Quadgram counts of English text, one "QUAD count" pair per line
+QUADGRAM_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'english_quadgrams.txt')
+
+# Monogram to quadgram log10 probability tables built from QUADGRAM_PATH, as one float32 .npy array
+NGRAM_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'english_ngrams.npy')
+
+LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# Start of the table of each n-gram order in the NGRAM_PATH array
+NGRAM_OFFSETS = {1: 0, 2: 26, 3: 26 + 26 ** 2, 4: 26 + 26 ** 2 + 26 ** 3}
+
+
+def build_ngram_file(source=QUADGRAM_PATH, destination=NGRAM_PATH):
+    """
+    Build the n-gram table file from a quadgram count file.
+
+    Lower order counts are the marginals of the quadgram counts over their trailing
+    letters. N-grams missing from the counts get a floor probability of 0.01 / total count.
+
+    Parameters:
+    - source (str): The quadgram count file, one "QUAD count" pair per line.
+    - destination (str): The .npy file to write.
+    """
+    counts = np.zeros(26 ** 4, dtype=np.float64)
+    with open(source, encoding='utf-8') as file:
+        for line in file:
+            quadgram, count = line.split()
+            counts[quadgram_code(quadgram)] = float(count)
+
+    tables = []
+    for n in NGRAM_OFFSETS:
+        order_counts = counts.reshape(26 ** n, -1).sum(axis=1)
+        total = order_counts.sum()
+        tables.append(np.log10(np.where(order_counts > 0, order_counts, 0.01) / total))
+    np.save(destination, np.concatenate(tables).astype(np.float32))
+
+@lru_cache(maxsize=4)
+def load_ngrams(path=NGRAM_PATH):
+    """
+    Map the n-gram tables of the NGRAM_PATH file into memory.
+
+    The file is opened read-only with mmap, so loading costs no parsing and processes
+    forked after the first load share its pages.
+
+    Parameters:
+    - path (str): The .npy table file.
+
+    Returns:
+    - dict: n (1 to 4) -> float32 array of 26^n log10 probabilities indexed by n-gram code.
+    """
+    table = np.load(path, mmap_mode='r')
+    return {n: table[offset:offset + 26 ** n] for n, offset in NGRAM_OFFSETS.items()}
+
+def load_quadgrams(path=NGRAM_PATH):
+    """
+    Load the English quadgram table as log10 probabilities indexed by quadgram code.
+
+    The code of the quadgram with letter indices (a, b, c, d) is a*26^3 + b*26^2 + c*26 + d.
+
+    Parameters:
+    - path (str): The .npy table file.
+
+    Returns:
+    - numpy.ndarray: float32 array of 26^4 log10 probabilities.
+    """
+    return load_ngrams(path)[4]
+
+def quadgram_code(quadgram):
+    """
+    Compute the table code of a four-letter uppercase string.
+
+    Parameters:
+    - quadgram (str): Four letters from A to Z.
+
+    Returns:
+    - int: The quadgram code.
+    """
+    code = 0
+    for char in quadgram:
+        code = code * 26 + LETTERS.index(char)
+    return code
+
+def quadgram_codes(indices):
+    """
+    Compute the code of every quadgram in a stream of A-Z letter indices.
+
+    Parameters:
+    - indices (numpy.ndarray): Letter indices (0 for A to 25 for Z), shape (..., n).
+
+    Returns:
+    - numpy.ndarray: Quadgram codes, shape (..., n - 3).
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    return (indices[..., :-3] * 17576 + indices[..., 1:-2] * 676
+            + indices[..., 2:-1] * 26 + indices[..., 3:])
+
+def quadgram_score(indices):
+    """
+    Score a stream of A-Z letter indices by its quadgram log10 probability.
+
+    Higher scores indicate text closer to English.
+
+    Parameters:
+    - indices (numpy.ndarray): Letter indices (0 for A to 25 for Z).
+
+    Returns:
+    - float: The sum of the log10 probabilities of all quadgrams.
+    """
+    return float(load_quadgrams()[quadgram_codes(indices)].sum(dtype=np.float64))
+
+def ngram_codes(indices, n):
+    """
+    Compute the code of every n-gram in a stream of A-Z letter indices.
+
+    Parameters:
+    - indices (numpy.ndarray): Letter indices (0 for A to 25 for Z), shape (..., length).
+    - n (int): The n-gram order, from 1 to 4.
+
+    Returns:
+    - numpy.ndarray: N-gram codes, shape (..., length - n + 1).
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    length = indices.shape[-1] - n + 1
+    codes = np.zeros(indices.shape[:-1] + (max(length, 0),), dtype=np.int64)
+    if length <= 0:
+        return codes
+    for i in range(n):
+        codes = codes * 26 + indices[..., i:i + length]
+    return codes
+
+def text_indices(text):
+    """
+    Convert the A-Z letters of a text to letter indices, ignoring case and dropping other characters.
+    """
+    codes = np.frombuffer(text.upper().encode('utf-32-le'), dtype=np.uint32).astype(np.int64) - ord('A')
+    return codes[(codes >= 0) & (codes < 26)]
+
+def score_batch(candidates, n=4):
+    """
+    Score a batch of candidate plaintexts in one vectorized pass.
+
+    The letter streams are joined, every n-gram code is looked up at once, and the
+    n-grams spanning two candidates are masked out before summing per candidate.
+
+    Parameters:
+    - candidates (list of str or numpy.ndarray): The candidates, as texts (only their
+      letters are scored) or as 2-D arrays of letter indices, one row per candidate.
+    - n (int): The n-gram order, from 1 to 4.
+
+    Returns:
+    - tuple:
+        - numpy.ndarray: the sum of the n-gram log10 probabilities of each candidate.
+        - numpy.ndarray: the number of n-grams of each candidate.
+    """
+    if n not in NGRAM_OFFSETS:
+        raise ValueError("N-gram order must be between 1 and 4.")
+    table = load_ngrams()[n]
+
+    if isinstance(candidates, np.ndarray):
+        if candidates.ndim != 2:
+            raise ValueError("Candidate arrays must be two-dimensional.")
+        values = table[ngram_codes(candidates, n)]
+        return values.sum(axis=-1, dtype=np.float64), np.full(len(candidates), values.shape[-1])
+
+    streams = [text_indices(text) for text in candidates]
+    lengths = np.fromiter(map(len, streams), dtype=np.int64, count=len(streams))
+    counts = np.maximum(lengths - n + 1, 0)
+    if not counts.any():
+        return np.zeros(len(streams)), counts
+
+    indices = np.concatenate(streams)
+    values = table[ngram_codes(indices, n)].astype(np.float64)
+    # N-gram i starts at letter i; it belongs to a candidate if it ends inside it
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    positions = np.arange(len(values))
+    owner = np.searchsorted(starts, positions, side='right') - 1
+    valid = positions + n <= starts[owner] + lengths[owner]
+    scores = np.bincount(owner[valid], weights=values[valid], minlength=len(streams))
+    return scores, counts
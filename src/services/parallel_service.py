@@ -0,0 +1,252 @@
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from . import affine_service, hill_service, mono_alphabetic_service, vigenere_service
+
+# Texts with at least this many characters are split across the shared process pool
+PARALLEL_THRESHOLD = 8 * 1024 * 1024
+
+# Smallest segment worth sending to a worker, in characters
+MIN_SEGMENT_SIZE = 1024 * 1024
+
+PARALLEL_CIPHERS = ('affine', 'vigenere', 'mono_alphabetic', 'hill')
+
+# Ciphers whose output can be laid out in the other layout_service.OUTPUT_MODES
+LAYOUT_CIPHERS = ('affine', 'hill')
+
+
+def _segment_text(name, encoding, width, start, stop):
+    memory = shared_memory.SharedMemory(name=name)
+    try:
+        return bytes(memory.buf[start * width:stop * width]).decode(encoding)
+    finally:
+        memory.close()
+
+def _count_task(cipher, alphabet, name, encoding, width, start, stop):
+    text = _segment_text(name, encoding, width, start, stop)
+    if cipher == 'vigenere':
+        return vigenere_service.count_letters(text, alphabet)
+    # Hill blocks are made of the alphabetic characters
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    unique_codes, counts = np.unique(codes, return_counts=True)
+    return int(sum(count for code, count in zip(unique_codes.tolist(), counts.tolist()) if chr(code).isalpha()))
+
+def transform_segment(cipher, mode, text, key, alphabet, offset=0, output='preserve'):
+    """
+    Transform one segment of a text, starting from the given cipher state.
+
+    Parameters:
+    - cipher (str): 'affine', 'vigenere', 'mono_alphabetic' or 'hill'.
+    - mode (str): 'encrypt' or 'decrypt'.
+    - text (str): The segment.
+    - key: (a, b) for affine, a str for vigenere and mono_alphabetic, the matrix rows for hill.
+    - alphabet (str): The alphabet (unused by mono_alphabetic).
+    - offset (int): For vigenere, the number of letters before the segment.
+    - output (str): For affine and hill, one of layout_service.OUTPUT_MODES.
+
+    Returns:
+    - str: The transformed segment; affine results are not stripped in the 'preserve' mode.
+    """
+    encrypt = mode == 'encrypt'
+    if cipher == 'affine':
+        encrypt_table, decrypt_table = affine_service.compile_key(key[0], key[1], alphabet)
+        table = encrypt_table if encrypt else decrypt_table
+        if output == 'preserve':
+            return text.translate(table)
+        return affine_service.translate_text(text, table, alphabet, output)
+    if cipher == 'mono_alphabetic':
+        return mono_alphabetic_service.encrypt_text(text, key) if encrypt else mono_alphabetic_service.decrypt_text(text, key)
+    if cipher == 'vigenere':
+        rotated = vigenere_service.rotate_key(key, offset)
+        return vigenere_service.encrypt_text(text, rotated, alphabet) if encrypt else vigenere_service.decrypt_text(text, rotated, alphabet)
+    if cipher == 'hill':
+        matrix = np.array(key)
+        return hill_service.encrypt_text(text, matrix, alphabet, output) if encrypt else hill_service.decrypt_text(text, matrix, alphabet, output)[0]
+    raise ValueError(f"Unsupported cipher: {cipher}.")
+
+def _transform_task(cipher, mode, key, alphabet, input_name, output_name, encoding, width, start, stop, offset):
+    result = transform_segment(cipher, mode, _segment_text(input_name, encoding, width, start, stop), key, alphabet, offset)
+    try:
+        encoded = result.encode(encoding)
+    except UnicodeEncodeError:
+        return result
+    if len(encoded) != (stop - start) * width:
+        return result  # Length changed (e.g. by lowercasing), sent back instead
+    memory = shared_memory.SharedMemory(name=output_name)
+    try:
+        memory.buf[start * width:stop * width] = encoded
+    finally:
+        memory.close()
+    return None
+
+def split_segments(length, segments):
+    """
+    Split [0, length) into 'segments' ranges of nearly equal size.
+    """
+    bounds = np.linspace(0, length, segments + 1).astype(np.int64).tolist()
+    return [(start, stop) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+def align_segments(text, segments, counts, block):
+    """
+    Move each segment boundary forward past the letters that complete the block it cuts.
+
+    Parameters:
+    - text (str): The whole text.
+    - segments (list of tuple): The (start, stop) ranges.
+    - counts (list of int): The number of alphabetic characters in each range.
+    - block (int): The block length.
+
+    Returns:
+    - list of tuple: the aligned ranges, each holding whole blocks.
+    """
+    bounds = [0]
+    before = 0
+    for (start, _), count in zip(segments, counts):
+        needed = -before % block
+        position = start
+        while needed and position < len(text):
+            if text[position].isalpha():
+                needed -= 1
+            position += 1
+        if bounds[-1] < position < len(text):
+            bounds.append(position)
+        before += count
+    bounds.append(len(text))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Set in the worker processes of the server's pools, where work runs without a pool of its own
+_in_worker = False
+
+def init_worker():
+    """
+    Initializer of every server worker process (shared pool, ASGI offload pool, job queue).
+
+    Work running in a worker is already spread across cores by the pool it runs on, so it
+    must not start another one: pool_size() is 1 there and the callers run serially.
+    """
+    global _in_worker, _pool
+    _in_worker = True
+    _pool = None  # A forked worker would otherwise inherit the parent's pool object
+
+def get_pool():
+    """
+    Return the process pool shared by the requests of this process, created on first use.
+
+    Raises:
+    - RuntimeError: in a worker process, where no pool may be nested.
+    """
+    global _pool
+    if _in_worker:
+        raise RuntimeError("Worker processes cannot start a process pool of their own.")
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(initializer=init_worker)
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+def pool_size():
+    """
+    Return the number of processes parallel work may use: one per core, or 1 in a worker process.
+    """
+    return 1 if _in_worker else os.cpu_count() or 1
+
+def transform(cipher, mode, text, key, alphabet='ABCDEFGHIJKLMNOPQRSTUVWXYZ', threshold=None, segments=None, output='preserve'):
+    """
+    Encrypt or decrypt a text, splitting it across the shared process pool when it is large.
+
+    Texts shorter than the threshold, or running on a single core or in a worker process,
+    are transformed in the calling thread. Larger texts are copied once into shared memory,
+    so the workers read their segments without the text being pickled, and write results
+    of unchanged length into a second shared buffer. Each segment gets its starting state: Vigenère segments
+    start the key at the number of letters before them, counted in parallel first, and
+    Hill segment boundaries are moved to block boundaries. The results equal those of the
+    cipher services. The other output modes are laid out from one scan of the whole text,
+    in the calling thread.
+
+    Parameters:
+    - cipher (str): 'affine', 'vigenere', 'mono_alphabetic' or 'hill'.
+    - mode (str): 'encrypt' or 'decrypt'.
+    - text (str): The input text.
+    - key: (a, b) for affine, a str for vigenere and mono_alphabetic, the matrix rows for hill.
+    - alphabet (str): The alphabet (unused by mono_alphabetic).
+    - threshold (int): The length from which the pool is used (default PARALLEL_THRESHOLD).
+    - segments (int): The number of segments (default: one per core, each of at least MIN_SEGMENT_SIZE).
+    - output (str): For affine and hill, one of layout_service.OUTPUT_MODES (default 'preserve').
+
+    Returns:
+    - str: The transformed text.
+
+    Raises:
+    - ValueError: as the cipher services do for invalid keys, texts or output modes.
+    """
+    if output != 'preserve' and cipher not in LAYOUT_CIPHERS:
+        raise ValueError(f"Output modes other than 'preserve' are not supported for {cipher}.")
+    threshold = PARALLEL_THRESHOLD if threshold is None else threshold
+    if segments is None:
+        segments = min(pool_size(), max(len(text) // MIN_SEGMENT_SIZE, 1))
+    if cipher not in PARALLEL_CIPHERS or len(text) < threshold or segments < 2 or output != 'preserve' or _in_worker:
+        result = transform_segment(cipher, mode, text, key, alphabet, output=output)
+        return result.strip() if cipher == 'affine' else result
+
+    if cipher == 'hill':
+        key = [list(map(int, row)) for row in np.asarray(key).tolist()]
+    if cipher == 'vigenere':
+        vigenere_service.validate_alphabet(alphabet)
+
+    if text.isascii():
+        encoding, width = 'latin-1', 1
+    else:
+        encoding, width = 'utf-32-le', 4
+    encoded = text.encode(encoding)
+
+    source = shared_memory.SharedMemory(create=True, size=max(len(encoded), 1))
+    target = shared_memory.SharedMemory(create=True, size=max(len(encoded), 1))
+    try:
+        source.buf[:len(encoded)] = encoded
+        del encoded
+        pool = get_pool()
+        ranges = split_segments(len(text), segments)
+        offsets = [0] * len(ranges)
+
+        if cipher in ('vigenere', 'hill'):
+            futures = [pool.submit(_count_task, cipher, alphabet, source.name, encoding, width, start, stop)
+                       for start, stop in ranges]
+            counts = [future.result() for future in futures]
+            if cipher == 'hill':
+                size = len(key)
+                if sum(counts) % size:
+                    raise ValueError(f"Text length must be divisible by {size} for the given matrix size.")
+                ranges = align_segments(text, ranges, counts, size)
+                offsets = [0] * len(ranges)
+            else:
+                offsets = np.concatenate(([0], np.cumsum(counts)[:-1])).tolist()
+
+        futures = [
+            pool.submit(_transform_task, cipher, mode, key, alphabet, source.name, target.name, encoding, width, start, stop, offset)
+            for (start, stop), offset in zip(ranges, offsets)
+        ]
+        returned = [future.result() for future in futures]
+
+        output = bytes(target.buf[:len(text) * width]).decode(encoding)
+        if any(part is not None for part in returned):
+            # Splice in the segments whose length changed
+            output = ''.join(
+                output[start:stop] if part is None else part
+                for (start, stop), part in zip(ranges, returned)
+            )
+    finally:
+        source.close()
+        source.unlink()
+        target.close()
+        target.unlink()
+
+    return output.strip() if cipher == 'affine' else output
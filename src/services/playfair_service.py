@@ -1,12 +1,20 @@
-import string
+import random
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from . import layout_service, parallel_service
+from .ngram_service import load_quadgrams
 
 alphabet = 'ABCDEFGHIKLMNOPQRSTUVWXYZ'  # I and J are combined when performing Playfair
 
 def create_playfair_key_matrix(key):
-    key = ''.join(sorted(set(key), key=key.index)).upper().replace('J', 'I')
+    key = ''.join(dict.fromkeys(key)).upper().replace('J', 'I')
     key_matrix = [c for c in key if c in alphabet]
+    present = set(key_matrix)
     for letter in alphabet:
-        if letter not in key_matrix:
+        if letter not in present:
             key_matrix.append(letter)
     return [key_matrix[i:i + 5] for i in range(0, 25, 5)]
 
@@ -17,53 +25,77 @@ def find_position(char, key_matrix):
                 return row, col
     return None
 
-def playfair_encryption(plaintext, key):
-    key_matrix = create_playfair_key_matrix(key)
-    plaintext = plaintext.upper().replace('J', 'I')
-    plaintext_pairs = []
-    
+def build_digram_tables(key_matrix):
+    '''Builds the digram -> digram encryption and decryption tables of a 5x5 key matrix.
+    Every ordered pair of letters (including doubled letters) is mapped, so each pair
+    of text is transformed with a single dictionary lookup.
+    '''
+    positions = {}
+    for row in range(5):
+        for col in range(5):
+            positions.setdefault(key_matrix[row][col], (row, col))
+
+    encryption_table = {}
+    decryption_table = {}
+    for char1, (row1, col1) in positions.items():
+        for char2, (row2, col2) in positions.items():
+            if row1 == row2:
+                encrypted = key_matrix[row1][(col1 + 1) % 5] + key_matrix[row2][(col2 + 1) % 5]
+                decrypted = key_matrix[row1][(col1 - 1) % 5] + key_matrix[row2][(col2 - 1) % 5]
+            elif col1 == col2:
+                encrypted = key_matrix[(row1 + 1) % 5][col1] + key_matrix[(row2 + 1) % 5][col2]
+                decrypted = key_matrix[(row1 - 1) % 5][col1] + key_matrix[(row2 - 1) % 5][col2]
+            else:
+                encrypted = decrypted = key_matrix[row1][col2] + key_matrix[row2][col1]
+            encryption_table[char1 + char2] = encrypted
+            decryption_table[char1 + char2] = decrypted
+    return positions, encryption_table, decryption_table
+
+@lru_cache(maxsize=1024)
+def compile_key(key):
+    '''Compiles a key once into its position map and digram tables; compiled keys are kept in a bounded LRU cache.'''
+    return build_digram_tables(create_playfair_key_matrix(key))
+
+def lookup_digram(table, char1, char2):
+    pair = table.get(char1 + char2)
+    if pair is None:
+        raise ValueError(f"Characters '{char1}{char2}' cannot be placed in the Playfair key square.")
+    return pair
+
+def encrypt_digrams(plaintext, encryption_table, final=True):
+    '''Encrypts uppercase, J-free text pair by pair.
+    Unless final is set, a trailing letter whose partner has not been read yet is left
+    unconsumed, so the text can be encrypted in pieces.
+    Returns the ciphertext and the number of characters consumed.
+    '''
+    encrypted_text = []
+
     i = 0
     while i < len(plaintext):
         char1 = plaintext[i]
         if not char1.isalpha():
-            plaintext_pairs.append((char1,))
+            encrypted_text.append(char1)
             i += 1
             continue
+        if i + 1 == len(plaintext) and not final:
+            break
 
         char2 = plaintext[i + 1] if i + 1 < len(plaintext) and plaintext[i + 1].isalpha() else 'X'
         
         if char1 == char2:
-            plaintext_pairs.append((char1, 'X'))
+            encrypted_text.append(lookup_digram(encryption_table, char1, 'X'))
             i += 1
         else:
-            plaintext_pairs.append((char1, char2))
+            encrypted_text.append(lookup_digram(encryption_table, char1, char2))
             i += 2
 
-    encrypted_text = []
-    for pair in plaintext_pairs:
-        if len(pair) == 1:
-            encrypted_text.append(pair[0])
-            continue
-        
-        char1, char2 = pair
-        row1, col1 = find_position(char1, key_matrix)
-        row2, col2 = find_position(char2, key_matrix)
-        
-        if row1 == row2:
-            encrypted_text.append(key_matrix[row1][(col1 + 1) % 5])
-            encrypted_text.append(key_matrix[row2][(col2 + 1) % 5])
-        elif col1 == col2:
-            encrypted_text.append(key_matrix[(row1 + 1) % 5][col1])
-            encrypted_text.append(key_matrix[(row2 + 1) % 5][col2])
-        else:
-            encrypted_text.append(key_matrix[row1][col2])
-            encrypted_text.append(key_matrix[row2][col1])
-    
-    return ''.join(encrypted_text)
-
-def playfair_decryption(ciphertext, key):
-    key_matrix = create_playfair_key_matrix(key)
-    ciphertext = ciphertext.upper().replace('J', 'I')
+    return ''.join(encrypted_text), i
+
+def decrypt_digrams(ciphertext, decryption_table, final=True):
+    '''Decrypts uppercase, J-free text pair by pair, keeping the padding characters.
+    Unless final is set, a trailing letter whose partner has not been read yet is left unconsumed.
+    Returns the list of decrypted characters and the number of characters consumed.
+    '''
     decrypted_text = []
 
     i = 0
@@ -73,25 +105,17 @@ def playfair_decryption(ciphertext, key):
             decrypted_text.append(char1)
             i += 1
             continue
+        if i + 1 == len(ciphertext) and not final:
+            break
         
         char2 = ciphertext[i + 1] if i + 1 < len(ciphertext) and ciphertext[i + 1].isalpha() else 'X'
-        
-        row1, col1 = find_position(char1, key_matrix)
-        row2, col2 = find_position(char2, key_matrix)
-
-        if row1 == row2:
-            decrypted_text.append(key_matrix[row1][(col1 - 1) % 5])
-            decrypted_text.append(key_matrix[row2][(col2 - 1) % 5])
-        elif col1 == col2:
-            decrypted_text.append(key_matrix[(row1 - 1) % 5][col1])
-            decrypted_text.append(key_matrix[(row2 - 1) % 5][col2])
-        else:
-            decrypted_text.append(key_matrix[row1][col2])
-            decrypted_text.append(key_matrix[row2][col1])
-        
+        decrypted_text.extend(lookup_digram(decryption_table, char1, char2))
         i += 2
 
-    # Remove padding 'X' characters
+    return decrypted_text, i
+
+def remove_padding(decrypted_text):
+    '''Removes the padding 'X' characters from a list of decrypted characters.'''
     cleaned_text = []
     for i, char in enumerate(decrypted_text):
         if i < len(decrypted_text) - 1 and char == 'X' and decrypted_text[i - 1] == decrypted_text[i + 1]:
@@ -101,3 +125,204 @@ def playfair_decryption(ciphertext, key):
         cleaned_text.append(char)
 
     return ''.join(cleaned_text)
+
+def letter_stream(text, output):
+    '''Returns the text prepared for the digram functions, and its layout for the given output mode.
+    By default the text keeps its punctuation and each run of letters is paired on its own.
+    In the 'strip' and 'blocks' modes, the letters are scanned into one contiguous stream and
+    paired across words, as in the classical cipher; the digrams change the number of letters,
+    so the modes that keep the text layout in place cannot be used.
+    '''
+    if output == 'preserve':
+        return text.upper().replace('J', 'I'), None
+    if output not in ('strip', 'blocks'):
+        raise ValueError("Playfair output must be 'preserve', 'strip' or 'blocks'.")
+    layout = layout_service.scan(text)
+    return layout.letters().replace('J', 'I'), layout
+
+def playfair_encryption(plaintext, key, output='preserve'):
+    _, encryption_table, _ = compile_key(key)
+    text, layout = letter_stream(plaintext, output)
+    encrypted_text, _ = encrypt_digrams(text, encryption_table)
+    return encrypted_text if layout is None else layout.render(encrypted_text, output)
+
+def playfair_decryption(ciphertext, key, output='preserve'):
+    _, _, decryption_table = compile_key(key)
+    text, layout = letter_stream(ciphertext, output)
+    decrypted_text, _ = decrypt_digrams(text, decryption_table)
+    decrypted_text = remove_padding(decrypted_text)
+    return decrypted_text if layout is None else layout.render(decrypted_text, output)
+
+def transform_many(texts, key, mode='encrypt'):
+    '''Encrypts or decrypts several texts with the same key, compiling the key square once.'''
+    _, encryption_table, decryption_table = compile_key(key)
+    texts = [text.upper().replace('J', 'I') for text in texts]
+    if mode == 'encrypt':
+        return [encrypt_digrams(text, encryption_table)[0] for text in texts]
+    return [remove_padding(decrypt_digrams(text, decryption_table)[0]) for text in texts]
+
+# Playfair alphabet index -> A-Z index, used for quadgram scoring
+_TO_LETTER_INDEX = np.array([ord(c) - ord('A') for c in alphabet], dtype=np.int64)
+
+def _position_digram_table():
+    # Decrypted (position, position) of every pair of key-square positions; the same for every key
+    table = np.empty((625, 2), dtype=np.int64)
+    for position1 in range(25):
+        for position2 in range(25):
+            row1, col1 = divmod(position1, 5)
+            row2, col2 = divmod(position2, 5)
+            if row1 == row2:
+                pair = (row1 * 5 + (col1 - 1) % 5, row2 * 5 + (col2 - 1) % 5)
+            elif col1 == col2:
+                pair = (((row1 - 1) % 5) * 5 + col1, ((row2 - 1) % 5) * 5 + col2)
+            else:
+                pair = (row1 * 5 + col2, row2 * 5 + col1)
+            table[position1 * 25 + position2] = pair
+    return table
+
+_POSITION_TABLE = _position_digram_table()
+_DIGRAM_FIRST, _DIGRAM_SECOND = np.divmod(np.arange(625), 25)
+
+def decryption_digram_table(square):
+    '''Builds the 625-entry decryption digram table of a key square given as 25 alphabet indices.
+    Entry first * 25 + second holds the two decrypted alphabet indices.
+    '''
+    positions = np.empty(25, dtype=np.int64)
+    positions[square] = np.arange(25)
+    return square[_POSITION_TABLE[positions[_DIGRAM_FIRST] * 25 + positions[_DIGRAM_SECOND]]]
+
+class _SquareScorer:
+    '''Scores batches of candidate key squares against one ciphertext.
+    Each candidate is decrypted through the precomputed digram table and scored
+    by the quadgram log10 probability of its plaintext.
+    '''
+    def __init__(self, digrams, quadgrams):
+        self.first, self.second = np.divmod(digrams, 25)
+        self.quadgrams = np.asarray(quadgrams)
+        self._offsets = {}
+
+    def offsets(self, count):
+        # Flat indices of the ciphertext letters in a batch of 'count' squares, and the offset of each square's letters
+        if count not in self._offsets:
+            rows = np.arange(count)[:, None] * 25
+            self._offsets[count] = ((rows + self.first).reshape(-1), (rows + self.second).reshape(-1), rows)
+        return self._offsets[count]
+
+    def score(self, squares):
+        '''Returns the scores of a (count, 25) array of key squares.'''
+        count = len(squares)
+        first, second, rows = self.offsets(count)
+        positions = np.argsort(squares, axis=1).reshape(-1)
+        pairs = positions[first] * 25 + positions[second]
+        plaintext = _POSITION_TABLE[pairs].reshape(count, -1)
+        if count > 1:
+            plaintext = plaintext + rows
+        letters = _TO_LETTER_INDEX[squares].reshape(-1)[plaintext]
+        bigrams = letters[:, :-1] * 26 + letters[:, 1:]
+        return self.quadgrams[bigrams[:, :-2] * 676 + bigrams[:, 2:]].sum(axis=1, dtype=np.float64)
+
+def _square_moves():
+    '''Returns every key-square move as a position permutation, with the cumulative probability of drawing it.
+    Moves are mostly letter swaps, sometimes row/column swaps or a transpose.
+    '''
+    identity = np.arange(25)
+    grid = identity.reshape(5, 5)
+    swaps, rows, columns = [], [], []
+    for i in range(25):
+        for j in range(i + 1, 25):
+            move = identity.copy()
+            move[[i, j]] = move[[j, i]]
+            swaps.append(move)
+    for i in range(5):
+        for j in range(i + 1, 5):
+            order = list(range(5))
+            order[i], order[j] = j, i
+            rows.append(grid[order].reshape(-1))
+            columns.append(grid[:, order].reshape(-1))
+    groups = [(swaps, 0.9), (rows, 0.04), (columns, 0.04), ([grid.T.reshape(-1)], 0.02)]
+    moves = np.array([move for group, _ in groups for move in group])
+    weights = np.concatenate([np.full(len(group), weight / len(group)) for group, weight in groups])
+    return moves, np.cumsum(weights) / weights.sum()
+
+_MOVES, _MOVE_CDF = _square_moves()
+
+# Cooling schedule: the temperature drops by TEMPERATURE_STEP after every 'iterations' candidate moves
+TEMPERATURE_STEP = 0.2
+ITERATIONS_PER_TEMPERATURE = 10000
+# Largest number of candidate moves scored together
+MAX_BATCH = 16
+
+def _anneal(args):
+    '''Runs simulated annealing passes until the time budget or the number of restarts runs out.
+    Each pass cools from 10 + 0.087 * (letters - 84) in steps of TEMPERATURE_STEP, trying 'iterations'
+    moves per temperature, and starts from the best square found so far.
+    Moves are drawn from the current square in batches scored together; the first one passing the
+    acceptance test is taken, which is the same as trying them one after the other.
+    Returns (best score, best square).
+    '''
+    digrams, seed, time_budget, iterations, restarts = args
+    rng = np.random.default_rng(seed)
+    scorer = _SquareScorer(digrams, load_quadgrams())
+    deadline = time.monotonic() + time_budget
+    temperature_start = 10 + 0.087 * (2 * len(digrams) - 84)
+
+    best_square = rng.permutation(25)
+    best_score = scorer.score(best_square[None])[0]
+    passes = 0
+    while restarts is None or passes < restarts:
+        passes += 1
+        square, score = best_square, best_score
+        temperature = temperature_start
+        batch = 1
+        while temperature > 0:
+            # Moves and acceptance thresholds for this temperature: a move is accepted when its score
+            # is at least the current score plus temperature * log(uniform), i.e. with probability exp(delta / temperature)
+            moves = _MOVES[np.searchsorted(_MOVE_CDF, rng.random(iterations))]
+            thresholds = temperature * np.log(rng.random(iterations))
+            tried = 0
+            while tried < iterations:
+                if time.monotonic() >= deadline:
+                    return best_score, best_square
+                count = min(batch, iterations - tried)
+                candidates = square[moves[tried:tried + count]]
+                scores = scorer.score(candidates)
+                accepted = np.flatnonzero(scores >= score + thresholds[tried:tried + count])
+                if len(accepted) == 0:
+                    tried += count
+                    batch = min(batch * 2, MAX_BATCH)
+                    continue
+                index = accepted[0]
+                tried += index + 1
+                square, score = candidates[index], scores[index]
+                if score > best_score:
+                    best_square, best_score = square, score
+                if index < count // 4:
+                    batch = max(batch // 2, 1)
+            temperature -= TEMPERATURE_STEP
+    return best_score, best_square
+
+def crack_playfair(ciphertext, time_budget=30.0, workers=None, seed=None, iterations=ITERATIONS_PER_TEMPERATURE, restarts=None):
+    '''Recovers a Playfair key square from ciphertext alone with simulated annealing.
+    Candidate squares are scored by the quadgram log10 probability of their decryption,
+    computed through a precomputed digram table. Independent searches run in parallel on
+    the shared process pool (one per worker, default parallel_service.pool_size()), each repeating annealing passes until the time budget (in seconds) runs out,
+    or after 'restarts' passes when it is given.
+    Returns a dict with the best 'key' square (25 letters, row by row), its 'score' and the 'plaintext'.
+    '''
+    letters = [alphabet.index(c) for c in ciphertext.upper().replace('J', 'I') if c in alphabet]
+    if len(letters) < 4:
+        raise ValueError("Ciphertext must contain at least four letters.")
+    letters = np.array(letters[:len(letters) - len(letters) % 2], dtype=np.int64)
+    digrams = letters[0::2] * 25 + letters[1::2]
+
+    task_count = max(1, workers or parallel_service.pool_size())
+    seeds = random.Random(seed).sample(range(2 ** 32), task_count)
+    tasks = [(digrams, task_seed, time_budget, iterations, restarts) for task_seed in seeds]
+    if task_count == 1:
+        results = [_anneal(tasks[0])]
+    else:
+        results = list(parallel_service.get_pool().map(_anneal, tasks))
+
+    best_score, best_square = max(results, key=lambda result: result[0])
+    key = ''.join(alphabet[i] for i in best_square)
+    return {'key': key, 'score': float(best_score), 'plaintext': playfair_decryption(ciphertext, key)}
@@ -0,0 +1,209 @@
+import codecs
+
+from . import affine_service, hill_service, layout_service, mono_alphabetic_service, playfair_service, vigenere_service
+
+# Number of request body bytes read at a time in streaming mode
+CHUNK_SIZE = 64 * 1024
+
+
+class AffineStage:
+    """
+    Streaming Affine transformation.
+
+    Characters are translated chunk by chunk. Like encrypt_text, which strips the whole
+    result, leading whitespace is dropped and trailing whitespace is held back until a
+    non-whitespace character follows it.
+    """
+
+    def __init__(self, a, b, alphabet, mode='encrypt'):
+        encrypt_table, decrypt_table = affine_service.compile_key(a, b, alphabet)
+        self.table = encrypt_table if mode == 'encrypt' else decrypt_table
+        self.started = False
+        self.whitespace = ''
+
+    def feed(self, chunk):
+        text = self.whitespace + chunk.translate(self.table)
+        if not self.started:
+            text = text.lstrip()
+            self.started = bool(text)
+        stripped = text.rstrip()
+        self.whitespace = text[len(stripped):]
+        return stripped
+
+    def finish(self):
+        return ''
+
+
+class VigenereStage:
+    """
+    Streaming Vigenère transformation.
+
+    The key position is carried across chunks as the number of letters processed so far.
+    """
+
+    def __init__(self, key, alphabet=vigenere_service.DEFAULT_ALPHABET, mode='encrypt'):
+        vigenere_service.validate_alphabet(alphabet)
+        self.key = key
+        self.alphabet = alphabet
+        self.transform = vigenere_service.encrypt_text if mode == 'encrypt' else vigenere_service.decrypt_text
+        self.offset = 0
+
+    def feed(self, chunk):
+        result = self.transform(chunk, vigenere_service.rotate_key(self.key, self.offset), self.alphabet)
+        self.offset += vigenere_service.count_letters(chunk, self.alphabet)
+        return result
+
+    def finish(self):
+        return ''
+
+
+class MonoAlphabeticStage:
+    """
+    Streaming mono-alphabetic substitution, which needs no state between chunks.
+    """
+
+    def __init__(self, key, mode='encrypt'):
+        self.key = key
+        self.transform = mono_alphabetic_service.encrypt_text if mode == 'encrypt' else mono_alphabetic_service.decrypt_text
+
+    def feed(self, chunk):
+        return self.transform(chunk, self.key)
+
+    def finish(self):
+        return ''
+
+
+class HillStage:
+    """
+    Streaming Hill transformation.
+
+    Each chunk is scanned once and transformed up to its last complete block, so the
+    characters following that block are written out at once. The incomplete block, from
+    its first letter on, is carried over as a list of pieces that is joined when the block
+    is complete instead of being scanned again with every chunk. Characters after a
+    carried letter stay in the carry, as they are written after the rest of its block.
+    """
+
+    def __init__(self, matrix, alphabet, mode='encrypt'):
+        if matrix.shape[0] != matrix.shape[1] or matrix.shape[0] not in [2, 3]:
+            raise ValueError("Matrix must be 2x2 or 3x3.")
+        if mode == 'decrypt':
+            matrix = hill_service.mod_inverse_matrix(matrix, mod=len(alphabet))
+        self.matrix = matrix
+        self.alphabet = alphabet
+        self.carry = []
+        self.carry_letters = 0
+
+    def feed(self, chunk):
+        size = self.matrix.shape[0]
+        layout = layout_service.scan(chunk, self.alphabet, strict=True)
+        letters = len(layout)
+        if self.carry and self.carry_letters + letters < size:
+            self.carry.append(chunk)
+            self.carry_letters += letters
+            return ''
+
+        remainder = (self.carry_letters + letters) % size
+        cut = len(chunk) if remainder == 0 else int(layout.positions[letters - remainder])
+        text = ''.join(self.carry) + chunk[:cut]
+        self.carry = [chunk[cut:]] if remainder else []
+        self.carry_letters = remainder
+        return hill_service.hill_cipher(text, self.matrix, self.alphabet)
+
+    def finish(self):
+        # Raises the usual length error if letters of an incomplete block remain
+        carry, self.carry, self.carry_letters = ''.join(self.carry), [], 0
+        return hill_service.hill_cipher(carry, self.matrix, self.alphabet)
+
+
+class PlayfairStage:
+    """
+    Streaming Playfair transformation.
+
+    A letter whose partner is in the next chunk is carried over. When decrypting, the
+    last decrypted character is also held back, since removing a padding 'X' depends on
+    the characters on both sides of it. The first character of the text is never
+    treated as padding, as its left neighbour is unknown while streaming.
+    """
+
+    def __init__(self, key, mode='encrypt'):
+        _, self.encryption_table, self.decryption_table = playfair_service.compile_key(key)
+        self.mode = mode
+        self.carry = ''
+        self.previous = None
+        self.pending = None
+
+    def feed(self, chunk):
+        return self._process(chunk, final=False)
+
+    def finish(self):
+        result = self._process('', final=True)
+        if self.pending is not None and self.pending != 'X':
+            result += self.pending  # Skip trailing 'X'
+        self.pending = None
+        return result
+
+    def _process(self, chunk, final):
+        text = self.carry + chunk.upper().replace('J', 'I')
+        if self.mode == 'encrypt':
+            result, consumed = playfair_service.encrypt_digrams(text, self.encryption_table, final)
+            self.carry = text[consumed:]
+            return result
+
+        decrypted_text, consumed = playfair_service.decrypt_digrams(text, self.decryption_table, final)
+        self.carry = text[consumed:]
+        cleaned_text = []
+        for char in decrypted_text:
+            pending = self.pending
+            if pending is not None and not (pending == 'X' and self.previous == char):
+                cleaned_text.append(pending)
+            self.previous, self.pending = pending, char
+        return ''.join(cleaned_text)
+
+
+def decode_chunks(stream, chunk_size=CHUNK_SIZE, encoding='utf-8'):
+    """
+    Read a binary stream in fixed-size chunks and decode it incrementally.
+
+    Multi-byte characters split across chunks are decoded once complete.
+
+    Parameters:
+    - stream: a binary file-like object, such as the request body.
+    - chunk_size (int): The number of bytes read at a time.
+    - encoding (str): The text encoding of the stream.
+
+    Returns:
+    - generator of str: The decoded chunks.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            break
+        text = decoder.decode(data)
+        if text:
+            yield text
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+def transform_stream(stage, chunks):
+    """
+    Pipe text chunks through a cipher stage.
+
+    Only the current chunk and the small state carried by the stage are held in memory.
+
+    Parameters:
+    - stage: a cipher stage with feed(chunk) and finish() methods.
+    - chunks (iterable of str): The input text, in order.
+
+    Returns:
+    - generator of str: The transformed text, in order.
+    """
+    for chunk in chunks:
+        result = stage.feed(chunk)
+        if result:
+            yield result
+    result = stage.finish()
+    if result:
+        yield result
@@ -1,7 +1,219 @@
-def encrypt_text(text, key, alphabet="ABCDEFGHIJKLMNOPQRSTUVWXYZ"):
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+from . import parallel_service
+from .frequency_service import text_to_indices, expected_frequencies, chi_squared
+
+DEFAULT_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# Texts shorter than this are processed by the scalar path, where NumPy setup costs more than it saves
+VECTORIZE_THRESHOLD = 4096
+
+# Ciphertexts with at least this many letters have their key lengths evaluated on a process pool
+PARALLEL_THRESHOLD = 1_000_000
+
+
+def validate_alphabet(alphabet):
+    """
+    Validate that the alphabet is a permutation of 26 unique characters.
+
+    Parameters:
+    - alphabet (str): The custom alphabet to validate.
+
+    Raises:
+    - ValueError: If the alphabet does not contain exactly 26 unique characters.
+    """
+    if len(alphabet) != 26 or len(set(alphabet)) != 26:
+        raise ValueError("Alphabet must be a permutation of 26 unique characters.")
+
+@lru_cache(maxsize=1)
+def _uppercase_sources():
+    # Uppercase form -> the characters that uppercase to it, for every character changed by upper()
+    sources = {}
+    for start in range(0, sys.maxunicode + 1, 256):
+        block = ''.join(map(chr, range(start, min(start + 256, sys.maxunicode + 1))))
+        if block.upper() == block:
+            continue  # Most blocks have no cased characters
+        for char in block:
+            upper = char.upper()
+            if upper != char:
+                sources.setdefault(upper, []).append(char)
+    return sources
+
+@lru_cache(maxsize=64)
+def compile_alphabet(alphabet):
+    """
+    Precompute the character lookups used by the scalar and vectorized Vigenère paths.
+
+    Every character whose uppercase form is found in the alphabet is mapped to the index
+    of that form, along with whether the character is itself uppercase (which decides the
+    case of the output character). This includes characters such as 'ı' and 'ſ', which
+    uppercase to 'I' and 'S', and those whose uppercase form is a run of alphabet symbols.
+
+    Parameters:
+    - alphabet (str): The uppercase alphabet.
+
+    Returns:
+    - dict: with keys
+        - 'positions': dict mapping each source character to (index, is_upper).
+        - 'upper', 'lower': tuples of the output character for each index, by case.
+        - 'codes', 'code_index', 'code_upper': sorted source code points and their lookups, as arrays.
+        - 'upper_codes', 'lower_codes': output code points for each index, as arrays,
+          or None if some output character does not lowercase to a single character.
+    """
+    positions = {}
+    for char in set(alphabet):
+        if char.upper() in alphabet:
+            positions[char] = (alphabet.index(char.upper()), char.isupper())
+    for upper, chars in _uppercase_sources().items():
+        if upper in alphabet:
+            for char in chars:
+                positions[char] = (alphabet.index(upper), char.isupper())
+
+    upper = tuple(alphabet)
+    lower = tuple(char.lower() for char in alphabet)
+
+    sources = sorted(positions)
+    codes = np.array([ord(char) for char in sources], dtype=np.uint32)
+    code_index = np.array([positions[char][0] for char in sources], dtype=np.int64)
+    code_upper = np.array([positions[char][1] for char in sources], dtype=bool)
+
+    upper_codes = lower_codes = None
+    if all(len(char) == 1 for char in lower):
+        upper_codes = np.array([ord(char) for char in upper], dtype=np.uint32)
+        lower_codes = np.array([ord(char) for char in lower], dtype=np.uint32)
+
+    return {
+        'positions': positions,
+        'upper': upper,
+        'lower': lower,
+        'codes': codes,
+        'code_index': code_index,
+        'code_upper': code_upper,
+        'upper_codes': upper_codes,
+        'lower_codes': lower_codes,
+    }
+
+def key_shifts(key, alphabet, count):
+    """
+    Convert the key into the list of shifts it applies.
+
+    Only the first 'count' key characters are converted, since a key longer than the
+    number of letters to process is never used past that point.
+
+    Parameters:
+    - key (str): The keyword used to generate shifts.
+    - alphabet (str): The uppercase alphabet.
+    - count (int): The number of letters that will be processed.
+
+    Returns:
+    - list of int: The shift of each used key character.
+
+    Raises:
+    - ValueError: If a used key character is not in the alphabet.
+    """
+    key = key.lower()
+    if count and not key:
+        raise ValueError("Key cannot be empty.")
+    return [alphabet.index(char.upper()) for char in key[:count]]
+
+def rotate_key(key, offset):
+    """
+    Rotate the key so that encryption starts at the given key position.
+
+    Encrypting a text with rotate_key(key, n) continues the key stream of a preceding
+    text that contained n letters, which lets a text be processed in separate pieces.
+
+    Parameters:
+    - key (str): The keyword used to generate shifts.
+    - offset (int): The number of letters already processed with the key.
+
+    Returns:
+    - str: The rotated key.
+    """
+    if not key:
+        return key
+    offset %= len(key)
+    return key[offset:] + key[:offset]
+
+def count_letters(text, alphabet=DEFAULT_ALPHABET):
+    """
+    Count the characters of the text that consume a key character.
+
+    Parameters:
+    - text (str): The text to inspect.
+    - alphabet (str): The custom alphabet used for encryption.
+
+    Returns:
+    - int: The number of characters whose uppercase form is in the alphabet.
+    """
+    tables = compile_alphabet(alphabet.upper())
+    if len(text) < VECTORIZE_THRESHOLD:
+        return sum(map(tables['positions'].__contains__, text))
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    sorted_codes = tables['codes']
+    slots = np.searchsorted(sorted_codes, codes)
+    slots[slots == len(sorted_codes)] = 0
+    return int(np.count_nonzero(sorted_codes[slots] == codes))
+
+def _transform_scalar(text, key, tables, direction):
+    positions = tables['positions']
+    upper = tables['upper']
+    lower = tables['lower']
+    shifts = None
+    key_length = 0
+    key_index = 0
+    result = []
+    for char in text:
+        position = positions.get(char)
+        if position is None:
+            result.append(char)  # Non-alphabetic characters stay unchanged
+            continue
+        if shifts is None:
+            shifts = key_shifts(key, ''.join(upper), len(text))
+            key_length = len(shifts)
+        index = (position[0] + direction * shifts[key_index % key_length]) % 26
+        result.append(upper[index] if position[1] else lower[index])
+        key_index += 1
+    return ''.join(result)
+
+def _transform_vectorized(text, key, tables, direction):
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    sorted_codes = tables['codes']
+    slots = np.searchsorted(sorted_codes, codes)
+    slots[slots == len(sorted_codes)] = 0
+    mask = sorted_codes[slots] == codes
+    slots = slots[mask]
+    count = len(slots)
+    if count == 0:
+        return text
+
+    shifts = np.array(key_shifts(key, ''.join(tables['upper']), count), dtype=np.int64)
+    # Repeating key stream over alphabet positions only
+    stream = np.resize(shifts, count)
+    indices = (tables['code_index'][slots] + direction * stream) % 26
+
+    result = codes.copy()
+    result[mask] = np.where(tables['code_upper'][slots], tables['upper_codes'][indices], tables['lower_codes'][indices])
+    return result.tobytes().decode('utf-32-le')
+
+def _transform(text, key, alphabet, direction):
+    validate_alphabet(alphabet)
+    tables = compile_alphabet(alphabet.upper())
+    if len(text) < VECTORIZE_THRESHOLD or tables['upper_codes'] is None:
+        return _transform_scalar(text, key, tables, direction)
+    return _transform_vectorized(text, key, tables, direction)
+
+def encrypt_text(text, key, alphabet=DEFAULT_ALPHABET):
     """
     Encrypts text using a Vigenère cipher.
 
+    Large texts are processed as NumPy arrays: letters are mapped to indices once, the
+    repeating key stream is added modulo 26, and case and non-alphabet characters are
+    restored with a mask.
+
     Parameters:
     - text (str): The input text to encrypt.
     - key (str): The keyword used to generate shifts for encryption.
@@ -10,56 +222,272 @@ def encrypt_text(text, key, alphabet="ABCDEFGHIJKLMNOPQRSTUVWXYZ"):
     Returns:
     - str: The encrypted text, with each letter shifted according to the key.
     """
-    if len(alphabet) != 26 or len(set(alphabet)) != 26:
-        raise ValueError("Alphabet must be a permutation of 26 unique characters.")
-    
-    encrypted_text = []
-    key = key.lower()
-    key_index = 0
-    key_length = len(key)
-    alphabet = alphabet.upper()
-
-    for char in text:
-        if char.upper() in alphabet:  # Encrypt only characters in the alphabet
-            shift = alphabet.index(key[key_index % key_length].upper())
-            index = (alphabet.index(char.upper()) + shift) % len(alphabet)
-            encrypted_char = alphabet[index]
-            encrypted_text.append(encrypted_char if char.isupper() else encrypted_char.lower())
-            key_index += 1
-        else:
-            encrypted_text.append(char)  # Non-alphabetic characters stay unchanged
-
-    return ''.join(encrypted_text)
+    return _transform(text, key, alphabet, 1)
 
 
-def decrypt_text(text, key,  alphabet="ABCDEFGHIJKLMNOPQRSTUVWXYZ"):
+def decrypt_text(text, key, alphabet=DEFAULT_ALPHABET):
     """
     Decrypts text encrypted using a Vigenère cipher.
 
     Parameters:
     - text (str): The input text to decrypt.
     - key (str): The keyword used to generate shifts for decryption.
+    - alphabet (str): The custom alphabet to use for decryption (default is "ABCDEFGHIJKLMNOPQRSTUVWXYZ").
 
     Returns:
     - str: The decrypted text, with each letter reverted based on the key.
     """
-    if len(alphabet) != 26 or len(set(alphabet)) != 26:
-        raise ValueError("Alphabet must be a permutation of 26 unique characters.")
+    return _transform(text, key, alphabet, -1)
 
-    decrypted_text = []
-    key = key.lower()
-    key_index = 0
-    key_length = len(key)
+
+# Length of the repeated key block added per row in byte mode
+BYTE_BLOCK_SIZE = 1 << 16
+
+def _transform_bytes(data, key, offset, out, direction):
+    if isinstance(key, str):
+        key = key.encode('utf-8')
+    if not key:
+        raise ValueError("Key cannot be empty.")
+    source = np.frombuffer(data, dtype=np.uint8)
+    shifts = np.frombuffer(key, dtype=np.uint8)
+    if direction < 0:
+        shifts = np.negative(shifts)  # Wraps modulo 256
+    shifts = np.roll(shifts, -(offset % len(shifts)))
+
+    if out is None:
+        result = bytearray(len(source))
+        target = np.frombuffer(result, dtype=np.uint8)
+    else:
+        result = out
+        target = np.frombuffer(out, dtype=np.uint8)[:len(source)]
+        if len(target) < len(source):
+            raise ValueError("Output buffer is smaller than the input.")
+
+    # The key is repeated into a block of about BYTE_BLOCK_SIZE bytes so each row added is long
+    block = np.tile(shifts, max(BYTE_BLOCK_SIZE // len(shifts), 1))
+    full = len(source) // len(block) * len(block)
+    if full:
+        np.add(source[:full].reshape(-1, len(block)), block, out=target[:full].reshape(-1, len(block)))
+    np.add(source[full:], block[:len(source) - full], out=target[full:])
+    return result
+
+def encrypt_bytes(data, key, offset=0, out=None):
+    """
+    Encrypts binary data with a Vigenère cipher over Z_256: each byte is added to the
+    next key byte modulo 256.
+
+    The computation runs on np.frombuffer views of the input and output, in uint8
+    arithmetic, which wraps modulo 256 on its own.
+
+    Parameters:
+    - data: bytes-like, the plaintext.
+    - key (bytes or str): The key bytes; a str key is encoded as UTF-8.
+    - offset (int): The number of bytes already processed with the key, to continue its stream (default 0).
+    - out: writable bytes-like of at least len(data) bytes to write the result into (optional).
+
+    Returns:
+    - bytearray: The ciphertext, or 'out' when it was given.
+    """
+    return _transform_bytes(data, key, offset, out, 1)
+
+def decrypt_bytes(data, key, offset=0, out=None):
+    """
+    Decrypts binary data encrypted with encrypt_bytes.
+
+    Parameters:
+    - data: bytes-like, the ciphertext.
+    - key (bytes or str): The key bytes; a str key is encoded as UTF-8.
+    - offset (int): The number of bytes already processed with the key (default 0).
+    - out: writable bytes-like of at least len(data) bytes to write the result into (optional).
+
+    Returns:
+    - bytearray: The plaintext, or 'out' when it was given.
+    """
+    return _transform_bytes(data, key, offset, out, -1)
+
+
+def transform_many(texts, key, alphabet=DEFAULT_ALPHABET, mode='encrypt'):
+    """
+    Encrypts or decrypts several texts with the same key in one vectorized pass.
+
+    The texts are joined and classified together, and the key stream restarts at the
+    first letter of each text, so every result equals the one of encrypt_text or decrypt_text.
+
+    Parameters:
+    - texts (list of str): The input texts.
+    - key (str): The keyword used to generate shifts.
+    - alphabet (str): The custom alphabet to use (default is "ABCDEFGHIJKLMNOPQRSTUVWXYZ").
+    - mode (str): 'encrypt' or 'decrypt'.
+
+    Returns:
+    - list of str: The transformed texts, in order.
+    """
+    validate_alphabet(alphabet)
+    tables = compile_alphabet(alphabet.upper())
+    direction = 1 if mode == 'encrypt' else -1
+    joined = ''.join(texts)
+    if len(joined) < VECTORIZE_THRESHOLD or tables['upper_codes'] is None:
+        return [_transform(text, key, alphabet, direction) for text in texts]
+
+    codes = np.frombuffer(joined.encode('utf-32-le'), dtype=np.uint32)
+    sorted_codes = tables['codes']
+    slots = np.searchsorted(sorted_codes, codes)
+    slots[slots == len(sorted_codes)] = 0
+    mask = sorted_codes[slots] == codes
+    slots = slots[mask]
+    count = len(slots)
+    if count == 0:
+        return list(texts)
+
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    letters_before = np.concatenate(([0], np.cumsum(mask)))[starts]
+    # Index of each letter within its own text
+    text_of_letter = np.searchsorted(starts, np.flatnonzero(mask), side='right') - 1
+    positions = np.arange(count) - letters_before[text_of_letter]
+
+    shifts = np.array(key_shifts(key, ''.join(tables['upper']), count), dtype=np.int64)
+    indices = (tables['code_index'][slots] + direction * shifts[positions % len(shifts)]) % 26
+
+    result = codes.copy()
+    result[mask] = np.where(tables['code_upper'][slots], tables['upper_codes'][indices], tables['lower_codes'][indices])
+    transformed = result.tobytes().decode('utf-32-le')
+    return [transformed[start:start + length] for start, length in zip(starts.tolist(), lengths.tolist())]
+
+
+def _column_histograms(indices, key_length, mod):
+    # One bincount yields the letter histogram of every key column at once
+    columns = np.arange(len(indices), dtype=np.int64) % key_length
+    return np.bincount(columns * mod + indices, minlength=key_length * mod).reshape(key_length, mod)
+
+def _evaluate_key_length(indices, key_length, expected, max_offset):
+    """
+    Score a candidate key length and solve each of its key columns by chi-squared.
+
+    Parameters:
+    - indices (numpy.ndarray): Alphabet indices of the ciphertext letters.
+    - key_length (int): The candidate key length.
+    - expected (numpy.ndarray): Expected plaintext letter frequencies.
+    - max_offset (int): The largest offset used for the autocorrelation.
+
+    Returns:
+    - dict: 'length', 'ioc' (mean column index of coincidence), 'autocorrelation'
+      (fraction of letters equal to the letter a multiple of 'length' positions later), 'shifts'
+      (best shift of each column) and 'score' (chi-squared of the decrypted text).
+    """
+    mod = len(expected)
+    histograms = _column_histograms(indices, key_length, mod)
+    totals = histograms.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        column_ioc = (histograms * (histograms - 1)).sum(axis=1) / (totals * (totals - 1))
+    ioc = float(np.nanmean(column_ioc)) if np.isfinite(column_ioc).any() else 0.0
+
+    # Kasiski-style autocorrelation, averaged over every multiple of the key length
+    offsets = range(key_length, max(max_offset, key_length) + 1, key_length)
+    matches = [np.mean(indices[:-offset] == indices[offset:]) for offset in offsets if offset < len(indices)]
+    autocorrelation = float(np.mean(matches)) if matches else 0.0
+
+    # shifted[col, s, p] is the count of plaintext index p in column col under shift s
+    shift_table = (np.arange(mod)[:, None] + np.arange(mod)[None, :]) % mod
+    shifted = histograms[:, shift_table]
+    column_scores = chi_squared(shifted, expected)
+    shifts = column_scores.argmin(axis=1)
+
+    plaintext_histogram = shifted[np.arange(key_length), shifts].sum(axis=0)
+    return {
+        'length': key_length,
+        'ioc': ioc,
+        'autocorrelation': autocorrelation,
+        'shifts': shifts.tolist(),
+        'score': float(chi_squared(plaintext_histogram, expected)),
+    }
+
+def _evaluate_key_lengths(args):
+    indices, key_lengths, expected, max_offset = args
+    return [_evaluate_key_length(indices, key_length, expected, max_offset) for key_length in key_lengths]
+
+def _minimal_period(shifts):
+    # A key such as "ABAB" is the shorter key "AB" repeated
+    length = len(shifts)
+    for period in range(1, length + 1):
+        if length % period == 0 and shifts == shifts[:period] * (length // period):
+            return shifts[:period]
+    return shifts
+
+def crack_text(text, alphabet=DEFAULT_ALPHABET, max_key_length=20, top_k=3, preview_length=80, workers=None):
+    """
+    Cracks a Vigenère ciphertext without knowing the key.
+
+    Every key length up to 'max_key_length' is scored with the index of coincidence of
+    its columns and the autocorrelation of the ciphertext at that offset. Each column of
+    a candidate length is then solved independently by picking the shift whose decrypted
+    letter histogram has the lowest chi-squared distance from English. Among lengths whose
+    statistic is closer to English than to random text, the best fitting decryptions are
+    ranked shortest first.
+
+    Parameters:
+    - text (str): The ciphertext to crack.
+    - alphabet (str): The custom alphabet used for encryption (default is "ABCDEFGHIJKLMNOPQRSTUVWXYZ").
+    - max_key_length (int): The longest key length to consider.
+    - top_k (int): The number of key candidates to return.
+    - preview_length (int): The number of ciphertext characters decrypted for each preview.
+    - workers (int): The number of tasks long ciphertexts are split into on the shared process pool
+      (default: parallel_service.pool_size(), 1 disables the pool).
+
+    Returns:
+    - list of dict: The key candidates, best first, each with 'key', 'length', 'ioc',
+      'autocorrelation', 'score' and 'preview'.
+
+    Raises:
+    - ValueError: If the alphabet is invalid or the text contains no alphabet characters.
+    """
+    validate_alphabet(alphabet)
     alphabet = alphabet.upper()
+    indices = text_to_indices(text, alphabet).astype(np.uint8)
+    if len(indices) == 0:
+        raise ValueError("Ciphertext contains no characters from the alphabet.")
 
-    for char in text:
-        if char.upper() in alphabet:  # Decrypt only characters in the alphabet
-            shift = alphabet.index(key[key_index % key_length].upper())
-            index = (alphabet.index(char.upper()) - shift) % len(alphabet)
-            decrypted_char = alphabet[index]
-            decrypted_text.append(decrypted_char if char.isupper() else decrypted_char.lower())
-            key_index += 1
-        else:
-            decrypted_text.append(char)  # Non-alphabetic characters stay unchanged
-
-    return ''.join(decrypted_text)
+    expected = expected_frequencies(alphabet)
+    key_lengths = list(range(1, max(1, min(int(max_key_length), len(indices))) + 1))
+
+    tasks = min(workers or parallel_service.pool_size(), len(key_lengths))
+    if tasks > 1 and len(indices) >= PARALLEL_THRESHOLD:
+        batches = [(indices, key_lengths[i::tasks], expected, key_lengths[-1]) for i in range(tasks)]
+        pool = parallel_service.get_pool()
+        evaluations = [result for batch in pool.map(_evaluate_key_lengths, batches) for result in batch]
+    else:
+        evaluations = _evaluate_key_lengths((indices, key_lengths, expected, key_lengths[-1]))
+
+    english_ioc = float((expected ** 2).sum())
+    threshold = (english_ioc + 1 / len(alphabet)) / 2
+    plausible = [e for e in evaluations if (e['ioc'] + e['autocorrelation']) / 2 >= threshold]
+    best_score = min((e['score'] for e in plausible), default=0.0)
+    # Allow for sampling noise of about twice the chi-squared degrees of freedom
+    tolerance = max(best_score / 2, 2 * (len(alphabet) - 1))
+
+    def rank(evaluation):
+        # Multiples of the true length fit about as well, so near-best fits are ordered shortest first
+        if evaluation in plausible:
+            if evaluation['score'] <= best_score + tolerance:
+                return (0, evaluation['length'])
+            return (1, evaluation['score'])
+        return (2, -(evaluation['ioc'] + evaluation['autocorrelation']))
+
+    candidates = []
+    seen = set()
+    for evaluation in sorted(evaluations, key=rank):
+        key = ''.join(alphabet[shift] for shift in _minimal_period(evaluation['shifts']))
+        if key in seen:
+            continue
+        seen.add(key)
+        candidates.append({
+            'key': key,
+            'length': evaluation['length'],
+            'ioc': evaluation['ioc'],
+            'autocorrelation': evaluation['autocorrelation'],
+            'score': evaluation['score'],
+            'preview': decrypt_text(text[:preview_length], key, alphabet),
+        })
+        if len(candidates) >= max(1, int(top_k)):
+            break
+    return candidates
@@ -0,0 +1,257 @@
+"""
+Throughput benchmarks for the cipher services.
+
+Run from the backend folder root:
+
+    python -m tests.bench --output results.json
+    python -m tests.bench --max-size 1MB --baseline baseline.json --threshold 0.15
+
+Each case is timed over repeated runs, then run once more under tracemalloc to record
+its peak memory. Results are printed (and optionally written) as JSON; with a baseline,
+any case whose p50 latency grew by more than the threshold is reported and the exit
+status is 1.
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+from src.services import affine_service, hill_service, mono_alphabetic_service, playfair_service, vigenere_service
+
+ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# Sample plaintext; one repetition holds 96 letters, a multiple of every Hill block size
+SAMPLE = ("It was the best of times, it was the worst of times; it was the age of wisdom, "
+          "it was the age of foolishness. Go attack at dawn! ")
+
+DEFAULT_SIZES = ['1KB', '64KB', '1MB', '16MB', '100MB']
+DEFAULT_CRACK_LENGTHS = [200, 2000, 20000]
+
+UNITS = {'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3, 'B': 1}
+
+HILL_MATRIX = np.array([[6, 24, 1], [13, 16, 10], [20, 17, 15]])
+MONO_KEY = 'QWERTYUIOPASDFGHJKLZXCVBNM'
+
+
+def parse_size(size):
+    """
+    Convert a size such as '64KB' or '1MB' to bytes.
+    """
+    size = str(size).strip().upper()
+    for unit in sorted(UNITS, key=len, reverse=True):
+        if size.endswith(unit):
+            return int(float(size[:-len(unit)]) * UNITS[unit])
+    return int(size)
+
+def sample_text(size):
+    """
+    Build an ASCII text of about 'size' bytes made of whole SAMPLE repetitions.
+    """
+    return SAMPLE * max(round(size / len(SAMPLE)), 1)
+
+# Encrypt and decrypt cases: name -> (encrypt(text), decrypt(text))
+CIPHER_CASES = {
+    'affine': (
+        lambda text: affine_service.encrypt_text(text, 5, 8, ALPHABET),
+        lambda text: affine_service.decrypt_text(text, 5, 8, ALPHABET),
+    ),
+    'vigenere': (
+        lambda text: vigenere_service.encrypt_text(text, 'LEMON'),
+        lambda text: vigenere_service.decrypt_text(text, 'LEMON'),
+    ),
+    'hill': (
+        lambda text: hill_service.encrypt_text(text, HILL_MATRIX, ALPHABET),
+        lambda text: hill_service.decrypt_text(text, HILL_MATRIX, ALPHABET),
+    ),
+    'playfair': (
+        lambda text: playfair_service.playfair_encryption(text, 'MONARCHY'),
+        lambda text: playfair_service.playfair_decryption(text, 'MONARCHY'),
+    ),
+    'mono_alphabetic': (
+        lambda text: mono_alphabetic_service.encrypt_text(text, MONO_KEY),
+        lambda text: mono_alphabetic_service.decrypt_text(text, MONO_KEY),
+    ),
+}
+
+def crack_cases(length):
+    """
+    Build the crack cases for ciphertexts of about 'length' letters.
+
+    Returns:
+    - dict: name -> function running the crack on a prepared ciphertext.
+    """
+    text = sample_text(length * len(SAMPLE) // 96)
+    affine_ciphertext = affine_service.encrypt_text(text, 5, 8, ALPHABET)
+    vigenere_ciphertext = vigenere_service.encrypt_text(text, 'CRYPTOGRAPHY')
+    hill_ciphertext = hill_service.encrypt_text(text, HILL_MATRIX, ALPHABET)
+    mono_ciphertext = mono_alphabetic_service.encrypt_text(text, MONO_KEY)
+    return {
+        'affine.crack': lambda: affine_service.brute_force(affine_ciphertext, ALPHABET),
+        'vigenere.crack': lambda: vigenere_service.crack_text(vigenere_ciphertext, workers=1),
+        'hill.crack': lambda: hill_service.crack_text(hill_ciphertext, 'ITWASTHEBESTOFTIMES', ALPHABET, size=3),
+        'mono_alphabetic.crack': lambda: mono_alphabetic_service.crack_text(mono_ciphertext, restarts=4, workers=1, seed=0),
+    }
+
+def measure(function, size, min_time=1.0, min_runs=3, max_runs=100):
+    """
+    Time a function over repeated runs and record its peak traced memory.
+
+    Parameters:
+    - function: the callable to benchmark, taking no arguments.
+    - size (int): The input size in bytes, used for the throughput.
+    - min_time (float): Keep running until this many seconds have been spent...
+    - min_runs (int): ...and at least this many runs were made...
+    - max_runs (int): ...but never more than this many.
+
+    Returns:
+    - dict: runs, throughput_mb_s, p50_ms, p99_ms, mean_ms and peak_memory_bytes.
+    """
+    function()  # Warm up caches and compiled keys
+    timings = []
+    start = time.perf_counter()
+    while len(timings) < max_runs and (len(timings) < min_runs or time.perf_counter() - start < min_time):
+        gc.collect()
+        begin = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - begin)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = np.array(timings)
+    p50 = float(np.percentile(timings, 50))
+    return {
+        'runs': len(timings),
+        'throughput_mb_s': size / UNITS['MB'] / p50 if size and p50 else None,
+        'p50_ms': p50 * 1000,
+        'p99_ms': float(np.percentile(timings, 99)) * 1000,
+        'mean_ms': float(timings.mean()) * 1000,
+        'peak_memory_bytes': int(peak),
+    }
+
+def run(sizes, crack_lengths, selected=None, min_time=1.0, log=None):
+    """
+    Run every selected benchmark case.
+
+    Parameters:
+    - sizes (list of int): Input sizes in bytes for the encrypt and decrypt cases.
+    - crack_lengths (list of int): Ciphertext lengths in letters for the crack cases.
+    - selected (str): Only run cases whose name contains this string (optional).
+    - min_time (float): The time spent on each case, in seconds.
+    - log: a file to report progress to (optional).
+
+    Returns:
+    - list of dict: one result per case and size.
+    """
+    results = []
+
+    def record(name, size, function, throughput_size):
+        if selected and selected not in name:
+            return
+        result = {'name': name, 'size': size}
+        result.update(measure(function, throughput_size, min_time=min_time))
+        results.append(result)
+        if log:
+            print(f"{name:28} {size:>11}  p50 {result['p50_ms']:10.3f} ms  "
+                  f"peak {result['peak_memory_bytes'] / UNITS['MB']:9.1f} MB", file=log)
+
+    for size in sizes:
+        text = sample_text(size)
+        for cipher, (encrypt, decrypt) in CIPHER_CASES.items():
+            if selected and selected not in cipher:
+                continue
+            ciphertext = encrypt(text)
+            if isinstance(ciphertext, tuple):
+                ciphertext = ciphertext[0]
+            record(f'{cipher}.encrypt', len(text), lambda: encrypt(text), len(text))
+            record(f'{cipher}.decrypt', len(text), lambda: decrypt(ciphertext), len(text))
+        del text
+
+    for length in crack_lengths:
+        for name, function in crack_cases(length).items():
+            record(name, length, function, 0)
+
+    return results
+
+def compare(results, baseline, threshold):
+    """
+    Compare results against a baseline run.
+
+    Parameters:
+    - results (list of dict): The current results.
+    - baseline (list of dict): The results of the baseline run.
+    - threshold (float): The allowed relative growth of the p50 latency, e.g. 0.1 for 10%.
+
+    Returns:
+    - list of dict: the regressed cases with name, size, baseline_p50_ms, p50_ms and change.
+    """
+    previous = {(result['name'], result['size']): result for result in baseline}
+    regressions = []
+    for result in results:
+        reference = previous.get((result['name'], result['size']))
+        if reference is None or not reference['p50_ms']:
+            continue
+        change = result['p50_ms'] / reference['p50_ms'] - 1
+        if change > threshold:
+            regressions.append({
+                'name': result['name'],
+                'size': result['size'],
+                'baseline_p50_ms': reference['p50_ms'],
+                'p50_ms': result['p50_ms'],
+                'change': change,
+            })
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m tests.bench', description='Benchmark the cipher services.')
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES, help='encrypt/decrypt input sizes, e.g. 1KB 1MB')
+    parser.add_argument('--max-size', help='skip sizes above this one, e.g. 1MB')
+    parser.add_argument('--crack-lengths', nargs='*', type=int, default=DEFAULT_CRACK_LENGTHS,
+                        help='ciphertext lengths in letters for the crack cases')
+    parser.add_argument('--filter', help='only run cases whose name contains this string')
+    parser.add_argument('--min-time', type=float, default=1.0, help='seconds spent timing each case')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against the results in this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.1, help='allowed p50 slowdown (default 0.1 = 10%%)')
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(size) for size in args.sizes]
+    if args.max_size:
+        sizes = [size for size in sizes if size <= parse_size(args.max_size)]
+
+    results = run(sizes, args.crack_lengths, args.filter, args.min_time, log=sys.stderr)
+    report = {
+        'meta': {
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        report['threshold'] = args.threshold
+        report['regressions'] = compare(results, baseline['results'], args.threshold)
+        status = 1 if report['regressions'] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    print(output)
+    return status
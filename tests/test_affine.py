@@ -1,5 +1,5 @@
 import unittest
-from src.services.affine_service import encrypt_text, decrypt_text, crack_text, mod_inverse
+from src.services.affine_service import affine_encrypt_char, affine_decrypt_char, encrypt_text, decrypt_text, crack_text, mod_inverse, compile_key, brute_force, encrypt_bytes, decrypt_bytes
 
 class TestAffineCipher(unittest.TestCase):
     """
@@ -63,5 +63,75 @@ class TestAffineCipher(unittest.TestCase):
         self.assertEqual(a, expected_a)
         self.assertEqual(b, expected_b)
 
+    def test_mixed_case_and_punctuation(self):
+        """
+        Test that lowercase letters are mapped like their uppercase form and
+        non-alphabet characters are retained in place.
+        """
+        alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+        encrypted_text = encrypt_text("Hello, World!", 5, 8, alphabet)
+        self.assertEqual(encrypted_text, "RCLLA, OAPLX!")
+        self.assertEqual(decrypt_text(encrypted_text, 5, 8, alphabet), "HELLO, WORLD!")
+
+    def test_compile_key_cached(self):
+        """
+        Test that a compiled key is reused for repeated (a, b, alphabet) values.
+        """
+        alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+        self.assertIs(compile_key(7, 3, alphabet), compile_key(7, 3, alphabet))
+
+    def test_char_functions(self):
+        """
+        Test that the per-character functions agree with the text functions.
+        """
+        alphabet = "QWERTYUIOPASDFGHJKLZXCVBNM"
+        for char in alphabet + "az":
+            encrypted = affine_encrypt_char(char, 7, 3, alphabet, 26)
+            self.assertEqual(encrypted, encrypt_text(char, 7, 3, alphabet))
+            self.assertEqual(affine_decrypt_char(encrypted, 7, 3, alphabet, 26), char.upper())
+        with self.assertRaises(ValueError):
+            affine_encrypt_char("!", 7, 3, alphabet, 26)
+        with self.assertRaises(ValueError):
+            affine_decrypt_char("A", 2, 3, alphabet, 26)
+
+    def test_brute_force(self):
+        """
+        Test that the ciphertext-only brute force ranks the correct key first.
+        """
+        alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+        plaintext = ("It is a truth universally acknowledged, that a single man in possession "
+                     "of a good fortune, must be in want of a wife.")
+        ciphertext = encrypt_text(plaintext, 7, 3, alphabet)
+        candidates = brute_force(ciphertext, alphabet, top_k=3)
+
+        self.assertEqual(len(candidates), 3)
+        self.assertEqual((candidates[0]['a'], candidates[0]['b']), (7, 3))
+        self.assertTrue(candidates[0]['preview'].startswith("IT IS A TRUTH"))
+        self.assertLessEqual(candidates[0]['score'], candidates[1]['score'])
+
+    def test_brute_force_no_letters(self):
+        """
+        Test that brute force raises a ValueError when the ciphertext has no alphabet characters.
+        """
+        with self.assertRaises(ValueError):
+            brute_force("123 !?", "ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+
+    def test_byte_mode(self):
+        """
+        Test that byte mode maps every byte x to (a*x + b) mod 256 and decrypts back,
+        also when writing into an output buffer.
+        """
+        data = bytes(range(256)) * 3
+        encrypted = encrypt_bytes(data, 5, 8)
+        self.assertEqual(encrypted[:4], bytes([8, 13, 18, 23]))
+        self.assertEqual(decrypt_bytes(encrypted, 5, 8), data)
+
+        out = bytearray(len(data))
+        self.assertIs(encrypt_bytes(memoryview(data), 5, 8, out=out), out)
+        self.assertEqual(bytes(out), encrypted)
+
+        with self.assertRaises(ValueError):
+            encrypt_bytes(data, 4, 1)  # Even multipliers have no inverse modulo 256
+
 if __name__ == "__main__":
     unittest.main()
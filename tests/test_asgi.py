@@ -0,0 +1,93 @@
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+from starlette.testclient import TestClient
+
+# The app imports its controllers and services from the src folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import asgi
+import main
+from services import log_service, metrics_service
+from tests.test_routes import RecordingLogger
+
+AFFINE = {'cipher': 'affine', 'keyString': '5,8', 'alphabet': 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'}
+
+
+class TestAsgiApp(unittest.TestCase):
+    """
+    Tests of the ASGI routes, served with the lifespan so requests can go to the process pool.
+    """
+
+    def setUp(self):
+        main.result_cache.clear()
+        self.logger = RecordingLogger()
+        patcher = patch.object(log_service, '_logger', self.logger)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = TestClient(asgi.create_app(workers=1, offload_bytes=1024))
+        self.client.__enter__()
+        self.addCleanup(self.client.__exit__, None, None, None)
+
+    def test_inline_encrypt(self):
+        response = self.client.post('/encrypt/affine', json={**AFFINE, 'inputText': 'HELLO'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'encrypted_text': 'RCLLA'})
+        # Only the inline path goes through the result cache
+        self.assertEqual(response.headers['X-Cache'], 'MISS')
+
+    def test_large_payload_offloaded(self):
+        text = 'HELLO' * 1000
+        response = self.client.post('/encrypt/affine', json={**AFFINE, 'inputText': text})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'encrypted_text': 'RCLLA' * 1000})
+        self.assertEqual(response.headers['X-Cache'], 'MISS')
+        self.assertEqual([params[:2] for _, params in self.logger.rows], [('encrypt', text)])
+
+        # The repeated request is answered from the cache of the serving process, and logged again
+        response = self.client.post('/encrypt/affine', json={**AFFINE, 'inputText': text})
+        self.assertEqual(response.headers['X-Cache'], 'HIT')
+        self.assertEqual(response.json(), {'encrypted_text': 'RCLLA' * 1000})
+        self.assertEqual(len(self.logger.rows), 2)
+
+    def test_offloaded_stages_recorded(self):
+        # The kernel stage is timed in the worker process
+        sample = 'cipher_request_stage_duration_seconds_count{cipher="affine",route="decrypt",stage="kernel"} '
+
+        def kernel_count():
+            lines = [line for line in self.client.get('/metrics').text.splitlines() if line.startswith(sample)]
+            return int(lines[0][len(sample):]) if lines else 0
+
+        before = kernel_count()
+        with patch.object(metrics_service, 'STAGE_SAMPLE_EVERY', 1):
+            self.client.post('/decrypt/affine', json={**AFFINE, 'inputText': 'RCLLA' * 1000})
+        self.assertEqual(kernel_count(), before + 1)
+
+    def test_offloaded_crack_logs_in_serving_process(self):
+        response = self.client.post('/crack/affine', json={'cipher': 'affine', 'inputText': 'R,C'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('a=', response.json()['encrypted_text'])
+        self.assertEqual(len(self.logger.rows), 1)
+        _, params = self.logger.rows[0]
+        self.assertEqual(params[:2], ('crack', 'R,C'))
+
+    def test_bad_requests(self):
+        for body in (b'', b'not json', b'[1, 2]', b'{}'):
+            response = self.client.post('/encrypt/affine', content=body)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'error': 'Request body must be a JSON object.'})
+        response = self.client.post('/encrypt/caesar', json={**AFFINE, 'inputText': 'HELLO'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.logger.rows, [])
+
+    def test_metrics(self):
+        self.client.post('/encrypt/affine', json={**AFFINE, 'inputText': 'HELLO'})
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('cipher_requests_total{cipher="affine",route="encrypt",status="200"}', response.text)
+
+
+if __name__ == '__main__':
+    unittest.main()
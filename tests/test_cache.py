@@ -0,0 +1,50 @@
+import unittest
+from src.services.cache_service import ResultCache, cache_key, ENTRY_OVERHEAD
+
+class TestResultCache(unittest.TestCase):
+    """
+    Unit tests for the byte-bounded LRU result cache.
+    """
+
+    def test_cache_key(self):
+        self.assertEqual(cache_key('affine', 'encrypt', 'HELLO'), cache_key('affine', 'encrypt', 'HELLO'))
+        self.assertNotEqual(cache_key('ab', 'c'), cache_key('a', 'bc'))
+        self.assertNotEqual(cache_key('5'), cache_key(5))
+        self.assertNotEqual(cache_key(None), cache_key('null'))
+        self.assertEqual(len(cache_key('x' * 1000000)), 16)
+
+    def test_hits_and_misses(self):
+        cache = ResultCache(max_bytes=10000)
+        self.assertIsNone(cache.get(b'a'))
+        self.assertTrue(cache.put(b'a', b'result'))
+        self.assertEqual(cache.get(b'a'), b'result')
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+        self.assertEqual(stats['bytes'], 1 + 6 + ENTRY_OVERHEAD)
+
+    def test_lru_eviction_by_size(self):
+        entry = 1 + 200 + ENTRY_OVERHEAD
+        cache = ResultCache(max_bytes=entry * 4)
+        for key in (b'a', b'b', b'c', b'd'):
+            self.assertTrue(cache.put(key, b'x' * 200))
+        cache.get(b'a')  # 'b' is now the least recently used
+        cache.put(b'e', b'x' * 200)
+        self.assertIsNone(cache.get(b'b'))
+        self.assertIsNotNone(cache.get(b'a'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertLessEqual(cache.stats()['bytes'], cache.max_bytes)
+
+    def test_large_entry_not_cached(self):
+        cache = ResultCache(max_bytes=1000)
+        self.assertFalse(cache.put(b'a', b'x' * 500))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_explicit_size(self):
+        cache = ResultCache(max_bytes=10000)
+        self.assertTrue(cache.put(b'a', (b'result', ['row']), size=500))
+        self.assertEqual(cache.get(b'a'), (b'result', ['row']))
+        self.assertEqual(cache.stats()['bytes'], 1 + 500 + ENTRY_OVERHEAD)
+        self.assertFalse(cache.put(b'b', b'x', size=5000))
+
+if __name__ == '__main__':
+    unittest.main()
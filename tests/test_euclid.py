@@ -1,5 +1,5 @@
 import unittest
-from src.services.euclid_service import modular_inverse, format_table
+from src.services.euclid_service import modular_inverse, format_table, batch_modular_inverse
 
 class TestEuclid(unittest.TestCase):
     """
@@ -8,7 +8,10 @@ class TestEuclid(unittest.TestCase):
     Test Methods:
     - test_modular_inverse_exists: Verifies calculation of modular inverse for valid inputs.
     - test_no_modular_inverse: Checks error handling for inputs with no inverse.
+    - test_negative_value: Checks that a negative value is inverted through its residue.
     - test_table_format: Verifies the format of the Euclidean table.
+    - test_inverse_without_table: Checks the table-free inverse path.
+    - test_batch_modular_inverse: Verifies batch inversion and the reporting of non-invertible values.
     """
     def test_modular_inverse_exists(self):
         a, mod = 3, 11
@@ -42,6 +45,11 @@ class TestEuclid(unittest.TestCase):
         inverse, table = modular_inverse(a, mod) # GCD = 6
         self.assertIsNone(inverse) 
 
+    def test_negative_value(self):
+        inverse, table = modular_inverse(-8, 11)
+        self.assertEqual(inverse, 4)
+        self.assertEqual(table, modular_inverse(3, 11)[1])
+
     def test_table_format(self):
         a, mod = 3, 11
         _, table = modular_inverse(a, mod)
@@ -49,5 +57,25 @@ class TestEuclid(unittest.TestCase):
         self.assertIsInstance(formatted, str)
         self.assertIn("|", formatted)  # Check formatting
 
+    def test_batch_modular_inverse(self):
+        values = [3, 2345, 0, 22, -8, 3 + 11 * 10 ** 30]
+        inverses, non_invertible, tables = batch_modular_inverse(values, 11)
+        self.assertEqual(inverses, [4, modular_inverse(2345 % 11, 11)[0], None, None, 4, 4])
+        self.assertEqual(non_invertible, [2, 3])
+        self.assertIsNone(tables)
+
+        _, _, tables = batch_modular_inverse([3, -8], 11, with_tables=True)
+        self.assertEqual(tables[0], modular_inverse(3, 11)[1])
+        self.assertEqual(tables[1], tables[0])
+
+        big_mod = 2 ** 127 - 1
+        values = list(range(1, 2000, 7))
+        inverses, non_invertible, _ = batch_modular_inverse(values, big_mod)
+        self.assertEqual(non_invertible, [])
+        self.assertTrue(all(value * inverse % big_mod == 1 for value, inverse in zip(values, inverses)))
+
+        with self.assertRaises(ValueError):
+            batch_modular_inverse([1], 1)
+
 if __name__ == '__main__':
     unittest.main()
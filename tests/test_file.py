@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.services.file_service import transform_file, plan_chunks
+from src.cli import main as cli_main
+from src.services import affine_service, hill_service, mono_alphabetic_service, vigenere_service
+
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+TEXT = ("It was the best of times, it was the worst of times; it was the age of wisdom, "
+        "it was the age of foolishness. Go attack at dawn!\n") * 40
+
+class TestFileTransform(unittest.TestCase):
+    """
+    Unit tests for the chunked memory-mapped file transformation.
+
+    Test Methods:
+    - test_plan_chunks: Verifies that the chunks cover the file without gaps.
+    - test_chunks_match_whole_text: Checks each cipher against its text service, with chunks cut mid-block.
+    - test_binary_mode: Verifies the byte modes round trip through files.
+    - test_invalid_hill_length: Checks that a Hill text with an incomplete block is rejected.
+    - test_output_is_input: Checks that writing over the input file is refused before anything is truncated.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_path = self.path('input')
+        with open(self.input_path, 'w', encoding='ascii') as file:
+            file.write(TEXT)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def read(self, name):
+        with open(self.path(name), 'rb') as file:
+            return file.read()
+
+    def test_plan_chunks(self):
+        self.assertEqual(plan_chunks(10, 4), [(0, 4), (4, 8), (8, 10)])
+        self.assertEqual(plan_chunks(0, 4), [])
+
+    def test_chunks_match_whole_text(self):
+        matrix = [[6, 24, 1], [13, 16, 10], [20, 17, 15]]
+        mono_key = "QWERTYUIOPASDFGHJKLZXCVBNM"
+        cases = [
+            ('affine', (5, 8), TEXT.translate(affine_service.compile_key(5, 8, ALPHABET)[0])),
+            ('vigenere', "LEMON", vigenere_service.encrypt_text(TEXT, "LEMON")),
+            ('mono_alphabetic', mono_key, mono_alphabetic_service.encrypt_text(TEXT, mono_key)),
+            ('hill', matrix, hill_service.encrypt_text(TEXT, np.array(matrix), ALPHABET)),
+        ]
+        for cipher, key, expected in cases:
+            with self.subTest(cipher=cipher):
+                # Odd chunk sizes cut through words and Hill blocks
+                stats = transform_file(self.input_path, self.path('encrypted'), cipher, 'encrypt', key, workers=2, chunk_size=1001)
+                self.assertGreater(stats['chunks'], 1)
+                self.assertEqual(self.read('encrypted').decode('ascii'), expected)
+
+                transform_file(self.path('encrypted'), self.path('decrypted'), cipher, 'decrypt', key, workers=1, chunk_size=777)
+                self.assertEqual(self.read('decrypted').decode('ascii').lower(), TEXT.lower())
+
+    def test_binary_mode(self):
+        data = bytes(range(256)) * 100
+        with open(self.input_path, 'wb') as file:
+            file.write(data)
+        for cipher, key in (('affine', (5, 8)), ('vigenere', "secret")):
+            with self.subTest(cipher=cipher):
+                transform_file(self.input_path, self.path('encrypted'), cipher, 'encrypt', key, binary=True, workers=2, chunk_size=999)
+                transform_file(self.path('encrypted'), self.path('decrypted'), cipher, 'decrypt', key, binary=True, chunk_size=4096)
+                self.assertNotEqual(self.read('encrypted'), data)
+                self.assertEqual(self.read('decrypted'), data)
+
+    def test_invalid_hill_length(self):
+        with open(self.input_path, 'w', encoding='ascii') as file:
+            file.write("ABC")
+        with self.assertRaises(ValueError):
+            transform_file(self.input_path, self.path('encrypted'), 'hill', 'encrypt', [[3, 3], [2, 5]])
+
+    def test_output_is_input(self):
+        os.link(self.input_path, self.path('link'))
+        for output_path in (self.input_path, self.path('link'), os.path.join(self.directory.name, '.', 'input')):
+            with self.subTest(output_path=output_path):
+                with self.assertRaises(ValueError):
+                    transform_file(self.input_path, output_path, 'affine', 'encrypt', (5, 8))
+        self.assertEqual(cli_main(['encrypt', 'affine', '--key', '5,8', self.input_path, self.input_path]), 1)
+        self.assertEqual(self.read('input').decode('ascii'), TEXT)
+
+if __name__ == '__main__':
+    unittest.main()
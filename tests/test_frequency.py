@@ -0,0 +1,38 @@
+import unittest
+import numpy as np
+from src.services.frequency_service import text_to_indices, letter_histogram, expected_frequencies, chi_squared
+
+class TestFrequency(unittest.TestCase):
+    """
+    Unit tests for the letter frequency helpers shared by the cipher crackers.
+    """
+
+    def test_text_to_indices(self):
+        """
+        Test that letters are mapped case-insensitively and other characters are dropped.
+        """
+        indices = text_to_indices("Hi, z!", "ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        self.assertEqual(indices.tolist(), [7, 8, 25])
+
+        indices = text_to_indices("cab", "CBA")
+        self.assertEqual(indices.tolist(), [0, 2, 1])
+
+    def test_letter_histogram(self):
+        """
+        Test that the histogram has one count per alphabet symbol.
+        """
+        histogram = letter_histogram(np.array([0, 2, 2]), 4)
+        self.assertEqual(histogram.tolist(), [1, 0, 2, 0])
+
+    def test_chi_squared_prefers_english(self):
+        """
+        Test that English text scores lower than a shifted version of itself.
+        """
+        alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+        expected = expected_frequencies(alphabet)
+        histogram = letter_histogram(text_to_indices("THE QUICK BROWN FOX JUMPS OVER THE LAZY DOG AGAIN AND AGAIN", alphabet), 26)
+        scores = chi_squared(np.stack([histogram, np.roll(histogram, 3)]), expected)
+        self.assertLess(scores[0], scores[1])
+
+if __name__ == '__main__':
+    unittest.main()
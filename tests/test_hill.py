@@ -1,5 +1,5 @@
 import unittest
-from src.services.hill_service import encrypt_text, decrypt_text, mod_inverse_matrix
+from src.services.hill_service import encrypt_text, decrypt_text, mod_inverse_matrix, crack_text, batch_mod_inverse_matrices, transform_many
 import numpy as np
 
 class TestHillCipher(unittest.TestCase):
@@ -137,6 +137,62 @@ class TestHillCipher(unittest.TestCase):
 
         self.assertTrue(np.array_equal(inverse_3x3, expected_inverse_3x3))
 
+    def test_long_text_round_trip(self):
+        """
+        Test that a long mixed-case text with punctuation round-trips and keeps its layout.
+        """
+        matrix = np.array([[6, 24, 1], [13, 16, 10], [20, 17, 15]])
+        alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+        text = "Act now, before it is too late! " * 300  # 21 letters per sentence
+        encrypted = encrypt_text(text, matrix, alphabet)
+        decrypted, _ = decrypt_text(encrypted, matrix, alphabet)
+
+        self.assertEqual(len(encrypted), len(text))
+        self.assertEqual(encrypted[3], ' ')
+        self.assertEqual(decrypted, text.upper())
+
+    def test_transform_many(self):
+        """
+        Test that several texts transformed together match one-by-one results, and that an invalid text fails the group.
+        """
+        matrix = np.array([[3, 3], [2, 5]])
+        alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+        texts = ["Help me!", "", "Attack at dawn", "12 34"]
+        self.assertEqual(transform_many(texts, matrix, alphabet), [encrypt_text(text, matrix, alphabet) for text in texts])
+        self.assertEqual(transform_many(texts, matrix, alphabet, 'decrypt'), [decrypt_text(text, matrix, alphabet)[0] for text in texts])
+        with self.assertRaises(ValueError):
+            transform_many(["abc", "d"], matrix, alphabet)
+
+    def test_batch_mod_inverse_matrices(self):
+        """
+        Test that stacked matrices are inverted like mod_inverse_matrix and singular ones are flagged.
+        """
+        matrices = np.array([[[3, 3], [2, 5]], [[2, 4], [2, 4]]])
+        inverses, invertible = batch_mod_inverse_matrices(matrices, 26)
+
+        self.assertEqual(invertible.tolist(), [True, False])
+        self.assertTrue(np.array_equal(inverses[0], mod_inverse_matrix(matrices[0], 26)))
+
+        matrix_3x3 = np.array([[6, 24, 1], [13, 16, 10], [20, 17, 15]])
+        inverses, invertible = batch_mod_inverse_matrices(matrix_3x3[None], 26)
+        self.assertTrue(invertible[0])
+        self.assertTrue(np.array_equal(inverses[0], mod_inverse_matrix(matrix_3x3, 26)))
+
+    def test_crack_text(self):
+        """
+        Test that the key matrix is recovered from a crib at an unknown position.
+        """
+        alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+        plaintext = ("ITISATRUTHUNIVERSALLYACKNOWLEDGEDTHATASINGLEMANINPOSSESSIONOFAGOODFORTUNE"
+                     "MUSTBEINWANTOFAWIFEHOWEVERLITTLEKNOWNTHEFEELINGSORVIEWSOFSUCHAMANMAYBEX")
+        for matrix in [np.array([[3, 3], [2, 5]]), np.array([[6, 24, 1], [13, 16, 10], [20, 17, 15]])]:
+            encrypted = encrypt_text(plaintext, matrix, alphabet)
+            candidates = crack_text(encrypted, "AGOODFORTUNEMUSTBEINWANT", alphabet, size=matrix.shape[0])
+
+            self.assertEqual(candidates[0]['matrix'], matrix.tolist())
+            self.assertEqual(candidates[0]['offset'], plaintext.index("AGOODFORTUNE"))
+            self.assertTrue(candidates[0]['preview'].startswith("ITISATRUTH"))
+
 
 if __name__ == "__main__":
     unittest.main()
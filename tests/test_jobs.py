@@ -0,0 +1,139 @@
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from src.services.log_service import LOG_TABLES
+from src.services.job_service import JobQueue, QueueFullError
+
+def echo_runner(cipher, payload):
+    time.sleep(payload.get('seconds', 0))
+    if payload.get('fail'):
+        raise ValueError('Search failed.')
+    return json.dumps({'cipher': cipher, 'echo': payload.get('inputText')}), 200, 'application/json', []
+
+class TestJobQueue(unittest.TestCase):
+    """
+    Unit tests for the asynchronous job queue.
+
+    Test Methods:
+    - test_job_result: Verifies that a submitted job runs and its result is stored.
+    - test_failed_job: Checks that a job raising an error is reported as failed.
+    - test_job_cap_and_cancel: Verifies the cap on pending jobs and the cancellation of a queued job.
+    - test_ttl_expiry: Checks that finished jobs are deleted once their TTL has passed.
+    - test_resume_after_restart: Verifies that jobs left pending are run again by a new queue.
+    - test_shared_table_claims: Checks that queues sharing the table run each pending job once,
+      and only take over jobs whose owner's lease has lapsed.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, 'log.db')
+        with sqlite3.connect(self.db_path) as conn:
+            for table in LOG_TABLES.values():
+                conn.execute(f'CREATE TABLE {table} (id INTEGER PRIMARY KEY, operation TEXT, timestamp DATETIME)')
+        conn.close()
+        self.queues = []
+
+    def tearDown(self):
+        for jobs in self.queues:
+            jobs.shutdown()
+        self.directory.cleanup()
+
+    def make_queue(self, **options):
+        jobs = JobQueue(echo_runner, db_path=self.db_path, workers=1, **options)
+        self.queues.append(jobs)
+        return jobs
+
+    def wait(self, jobs, job_id, timeout=30):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = jobs.get(job_id)
+            if job is None or job['status'] in ('done', 'failed', 'cancelled'):
+                return job
+            time.sleep(0.05)
+        self.fail(f'Job {job_id} did not finish.')
+
+    def test_job_result(self):
+        jobs = self.make_queue()
+        job_id = jobs.submit('affine', {'inputText': 'HELLO'})
+        self.assertIn(jobs.get(job_id)['status'], ('queued', 'running', 'done'))
+        job = self.wait(jobs, job_id)
+        self.assertEqual(job['status'], 'done')
+        self.assertGreater(job['expiresAt'], job['finishedAt'])
+        status, body, status_code, mimetype = jobs.result(job_id)
+        self.assertEqual((status, status_code, mimetype), ('done', 200, 'application/json'))
+        self.assertEqual(json.loads(body), {'cipher': 'affine', 'echo': 'HELLO'})
+        self.assertIsNone(jobs.get('unknown'))
+
+    def test_failed_job(self):
+        jobs = self.make_queue()
+        job_id = jobs.submit('affine', {'fail': True})
+        self.assertEqual(self.wait(jobs, job_id)['status'], 'failed')
+        _, body, status_code, _ = jobs.result(job_id)
+        self.assertEqual(status_code, 500)
+        self.assertEqual(json.loads(body), {'error': 'Search failed.'})
+
+    def test_job_cap_and_cancel(self):
+        jobs = self.make_queue(max_jobs=2)
+        running = jobs.submit('affine', {'seconds': 1})
+        queued = jobs.submit('affine', {'inputText': 'LATER'})
+        with self.assertRaises(QueueFullError):
+            jobs.submit('affine', {})
+
+        self.assertTrue(jobs.cancel(queued))
+        self.assertEqual(jobs.get(queued)['status'], 'cancelled')
+        self.assertFalse(jobs.cancel(queued))
+        self.assertEqual(self.wait(jobs, running)['status'], 'done')
+        self.assertFalse(jobs.cancel(running))
+        self.assertEqual(jobs.pending(), 0)
+
+    def test_ttl_expiry(self):
+        jobs = self.make_queue(ttl=0)
+        job_id = jobs.submit('affine', {})
+        self.wait(jobs, job_id)
+        time.sleep(0.01)
+        self.assertEqual(jobs.expire(force=True), 1)
+        self.assertIsNone(jobs.get(job_id))
+        self.assertIsNone(jobs.result(job_id))
+
+    def test_resume_after_restart(self):
+        jobs = self.make_queue()
+        jobs.start()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, cipher, status, payload, created_at) VALUES ('left', 'hill', 'queued', ?, ?)",
+                (json.dumps({'inputText': 'AGAIN'}), time.time()),
+            )
+        conn.close()
+
+        restarted = self.make_queue()
+        job = self.wait(restarted, 'left')
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(json.loads(restarted.result('left')[1])['echo'], 'AGAIN')
+
+    def test_shared_table_claims(self):
+        self.make_queue().expire(force=True)  # Creates the jobs table
+        now = time.time()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                "INSERT INTO jobs (id, cipher, status, payload, created_at, owner, lease_expires) VALUES (?, 'hill', 'queued', ?, ?, ?, ?)",
+                [
+                    ('free', json.dumps({'seconds': 1}), now, None, None),
+                    ('lapsed', json.dumps({'seconds': 1}), now, 'dead', now - 1),
+                    ('leased', json.dumps({}), now, 'alive', now + 60),
+                ],
+            )
+        conn.close()
+
+        first, second = self.make_queue(), self.make_queue()
+        first.start()
+        second.start()
+        self.assertEqual((first.pending(), second.pending()), (2, 0))
+        self.assertEqual(self.wait(first, 'free')['status'], 'done')
+        self.assertEqual(self.wait(first, 'lapsed')['status'], 'done')
+        self.assertEqual(first.get('leased')['status'], 'queued')
+
+if __name__ == '__main__':
+    unittest.main()
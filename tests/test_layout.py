@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+from src.services.layout_service import scan
+from src.services import affine_service, hill_service, playfair_service
+
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+class TestLayout(unittest.TestCase):
+    """
+    Unit tests for the shared format-preserving layout.
+
+    Test Methods:
+    - test_scan: Verifies the letter positions, case mask and letter stream of a scan.
+    - test_render_modes: Checks each output mode against the original text.
+    - test_strict_alphabet: Checks that strict scans reject characters the alphabet does not fit.
+    - test_cipher_output_modes: Verifies the output modes of the Affine, Hill and Playfair services.
+    """
+
+    def test_scan(self):
+        layout = scan("Hi, yo!")
+        self.assertEqual(len(layout), 4)
+        self.assertEqual(layout.positions.tolist(), [0, 1, 4, 5])
+        self.assertEqual(layout.lowercase.tolist(), [False, True, True, True])
+        self.assertEqual(layout.letters(), "HIYO")
+        self.assertIsNone(layout.indices)
+
+        layout = scan("Café 😀 x", "ABCDEFGHIJKLMNOPQRSTUVWXYZÉ")
+        self.assertEqual(layout.letters(), "CAFÉX")
+        self.assertEqual(layout.indices.tolist(), [2, 0, 5, 26, 23])
+
+    def test_render_modes(self):
+        text = "Attack at dawn, Ünïcode!"
+        layout = scan(text)
+        stream = layout.letters()
+        self.assertEqual(layout.render(stream), text.upper())
+        self.assertEqual(layout.render(stream, 'preserve_case'), text)
+        self.assertEqual(layout.render(stream, 'strip'), "ATTACKATDAWNÜNÏCODE")
+        self.assertEqual(layout.render(stream, 'blocks'), "ATTAC KATDA WNÜNÏ CODE")
+        with self.assertRaises(ValueError):
+            layout.render(stream[1:])
+        with self.assertRaises(ValueError):
+            layout.render(stream, 'columns')
+
+    def test_strict_alphabet(self):
+        with self.assertRaises(ValueError):
+            scan("café", ALPHABET, strict=True)
+        with self.assertRaises(ValueError):
+            scan("AB 1", ALPHABET + "1", strict=True)
+        self.assertEqual(len(scan("café", ALPHABET)), 3)
+
+    def test_cipher_output_modes(self):
+        text = "Attack at dawn, said Julia."
+        encrypted = affine_service.encrypt_text(text, 5, 8, ALPHABET)
+        self.assertEqual(affine_service.encrypt_text(text, 5, 8, ALPHABET, 'strip'), ''.join(filter(str.isalpha, encrypted)))
+        self.assertEqual(affine_service.decrypt_text(encrypted, 5, 8, ALPHABET, 'blocks'), "ATTAC KATDA WNSAI DJULI A")
+
+        matrix = np.array([[3, 3], [2, 5]])
+        encrypted = hill_service.encrypt_text(text + "x", matrix, ALPHABET, 'preserve_case')
+        self.assertEqual(encrypted.upper(), hill_service.encrypt_text(text + "x", matrix, ALPHABET))
+        self.assertEqual(hill_service.decrypt_text(encrypted, matrix, ALPHABET, 'preserve_case')[0], text + "x")
+
+        # Stripped Playfair pairs the letters across words, as in the classical cipher
+        encrypted = playfair_service.playfair_encryption("Hide the gold in the tree stump", "PLAYFAIREXAMPLE", 'blocks')
+        self.assertEqual(encrypted, "BMODZ BXDNA BEKUD MUIXM MOUVI F")
+        self.assertEqual(playfair_service.playfair_decryption(encrypted, "PLAYFAIREXAMPLE", 'strip'), "HIDETHEGOLDINTHETREESTUMP")
+        with self.assertRaises(ValueError):
+            playfair_service.playfair_encryption("Hide", "PLAYFAIREXAMPLE", 'preserve_case')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+import json
+from unittest.mock import patch
+from src.services import log_service
+from src.services.log_service import AuditLogger, LOG_TABLES, query_logs, stream_logs, log_operation, log_transaction
+
+INSERT = "INSERT INTO affine_log (operation, input_text, output_text, a, b, alphabet) VALUES (?, ?, ?, ?, ?, ?)"
+
+class TestAuditLogger(unittest.TestCase):
+    """
+    Unit tests for the batched background audit logger.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, 'log.db')
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE affine_log (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    operation TEXT CHECK(operation IN ('encrypt', 'decrypt', 'crack')),
+                    input_text TEXT, output_text TEXT, a INTEGER, b INTEGER, alphabet TEXT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            for table in set(LOG_TABLES.values()) - {'affine_log'}:
+                conn.execute(f'CREATE TABLE {table} (id INTEGER PRIMARY KEY, operation TEXT, timestamp DATETIME)')
+        conn.close()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def count_rows(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute('SELECT COUNT(*) FROM affine_log').fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_rows_written_on_flush(self):
+        logger = AuditLogger(self.db_path, batch_size=1000, flush_interval=60)
+        for i in range(50):
+            self.assertTrue(logger.log(INSERT, ('encrypt', 'HELLO', 'RCLLA', 5, 8, 'ABC')))
+        self.assertTrue(logger.flush(timeout=5))
+        self.assertEqual(self.count_rows(), 50)
+        logger.close()
+
+    def test_bad_row_does_not_lose_batch(self):
+        logger = AuditLogger(self.db_path, batch_size=1000, flush_interval=60)
+        logger.log(INSERT, ('encrypt', 'A', 'B', 1, 2, 'ABC'))
+        logger.log(INSERT, ('invalid', 'A', 'B', 1, 2, 'ABC'))  # Rejected by the CHECK constraint
+        logger.log(INSERT, ('decrypt', 'A', 'B', 1, 2, 'ABC'))
+        logger.close()
+        self.assertEqual(self.count_rows(), 2)
+
+    def test_drop_policy_when_full(self):
+        logger = AuditLogger(self.db_path, max_queue=1, policy='drop')
+        logger.start = lambda: None  # No writer, so the queue stays full
+        self.assertTrue(logger.log(INSERT, ('encrypt', 'A', 'B', 1, 2, 'ABC')))
+        self.assertFalse(logger.log(INSERT, ('encrypt', 'A', 'B', 1, 2, 'ABC')))
+        self.assertEqual(logger.dropped, 1)
+
+    def test_close_flushes(self):
+        logger = AuditLogger(self.db_path, batch_size=1000, flush_interval=60)
+        logger.log_many(INSERT, [('crack', 'A', 'B', 1, 2, 'ABC')] * 10)
+        logger.close()
+        self.assertEqual(self.count_rows(), 10)
+
+    def test_log_transaction(self):
+        logger = AuditLogger(self.db_path, batch_size=1, flush_interval=60)
+        with patch.object(log_service, 'get_logger', return_value=logger):
+            with log_transaction():
+                for i in range(5):
+                    log_operation(INSERT, ('encrypt', 'A', 'B', 1, 2, 'ABC'))
+                self.assertEqual(logger._queue.qsize(), 0)  # Nothing is queued before the block ends
+        logger.close()
+        self.assertEqual(self.count_rows(), 5)
+
+    def test_query_logs_pagination(self):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                'INSERT INTO affine_log (operation, input_text, timestamp) VALUES (?, ?, ?)',
+                [('encrypt' if i % 2 else 'decrypt', str(i), f'2024-01-01 00:00:{i:02d}') for i in range(10)],
+            )
+        conn.close()
+
+        page = list(query_logs('affine', limit=4, db_path=self.db_path))
+        self.assertEqual([row['input_text'] for row in page], ['0', '1', '2', '3'])
+        page = list(query_logs('affine', limit=4, after=page[-1]['cursor'], db_path=self.db_path))
+        self.assertEqual([row['input_text'] for row in page], ['4', '5', '6', '7'])
+
+        rows = list(query_logs('affine', operation='encrypt', since='2024-01-01T00:00:03',
+                               until='2024-01-01 00:00:08', db_path=self.db_path))
+        self.assertEqual([row['input_text'] for row in rows], ['3', '5', '7'])
+
+    def test_query_logs_uses_index(self):
+        list(query_logs('affine', db_path=self.db_path))
+        conn = sqlite3.connect(self.db_path)
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM affine_log WHERE (timestamp, id) > ('x', 1) ORDER BY timestamp, id LIMIT 10").fetchall()
+        conn.close()
+        self.assertIn('idx_affine_log_timestamp_id', str(plan))
+
+    def test_stream_logs(self):
+        lines = list(stream_logs(iter([{'id': 1, 'cursor': 'a|1'}, {'id': 2, 'cursor': 'b|2'}]), 2))
+        self.assertEqual(json.loads(lines[-1]), {'next_cursor': 'b|2'})
+        lines = list(stream_logs(iter([{'id': 1, 'cursor': 'a|1'}]), 2))
+        self.assertEqual(json.loads(lines[-1]), {'next_cursor': None})
+
+    def test_query_logs_invalid(self):
+        with self.assertRaises(ValueError):
+            query_logs('euclid', db_path=self.db_path)
+        with self.assertRaises(ValueError):
+            query_logs('affine', limit=0, db_path=self.db_path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import patch
+from src.services import metrics_service
+from src.services.metrics_service import (
+    Counter, Histogram, begin_request, end_request, stage_start, stage_end, record_request, render, STAGES, STAGE_LATENCY, KERNEL,
+)
+
+class TestMetrics(unittest.TestCase):
+    """
+    Unit tests for the request latency metrics.
+
+    Test Methods:
+    - test_histogram_exposition: Verifies cumulative buckets, sum and count in the text format.
+    - test_counter_exposition: Verifies counter samples and label escaping.
+    - test_stage_timing: Checks that stages are only timed inside a sampled request.
+    - test_stage_sampling: Verifies that one request in STAGE_SAMPLE_EVERY is sampled.
+    - test_record_request: Verifies that a finished request shows up in the rendered metrics.
+    - test_pending_requests_bounded: Checks that requests fold a batch once too many are waiting.
+    """
+    def test_histogram_exposition(self):
+        histogram = Histogram('test_seconds', 'Test histogram.', ('route',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(('encrypt',), value)
+        lines = histogram.collect()
+        self.assertEqual(lines[:2], ['# HELP test_seconds Test histogram.', '# TYPE test_seconds histogram'])
+        self.assertIn('test_seconds_bucket{route="encrypt",le="0.1"} 2', lines)
+        self.assertIn('test_seconds_bucket{route="encrypt",le="1.0"} 3', lines)
+        self.assertIn('test_seconds_bucket{route="encrypt",le="+Inf"} 4', lines)
+        self.assertIn('test_seconds_sum{route="encrypt"} 2.65', lines)
+        self.assertIn('test_seconds_count{route="encrypt"} 4', lines)
+
+    def test_counter_exposition(self):
+        counter = Counter('test_total', 'Test counter.', ('cipher',))
+        counter.inc(('a"b',))
+        counter.inc(('a"b',), 2)
+        self.assertIn('test_total{cipher="a\\"b"} 3', counter.collect())
+
+    def test_stage_timing(self):
+        # Outside a request: nothing is recorded and nothing fails
+        start = stage_start()
+        self.assertEqual(start, 0)
+        stage_end(KERNEL, start)
+
+        stages = begin_request(sampled=True)
+        try:
+            for _ in range(2):
+                start = stage_start()
+                stage_end(KERNEL, start)
+        finally:
+            end_request()
+        self.assertEqual(len(stages), len(STAGES))
+        self.assertGreater(stages[KERNEL], 0)
+        self.assertEqual(sum(stages) - stages[KERNEL], 0)
+
+        self.assertIsNone(begin_request(sampled=False))
+        try:
+            self.assertEqual(stage_start(), 0)
+        finally:
+            end_request()
+
+    def test_stage_sampling(self):
+        with patch.object(metrics_service, 'STAGE_SAMPLE_EVERY', 4):
+            sampled = 0
+            for _ in range(8):
+                sampled += begin_request() is not None
+                end_request()
+        self.assertEqual(sampled, 2)
+
+    def test_record_request(self):
+        stages = [0] * len(STAGES)
+        stages[KERNEL] = 1000000
+        record_request('testcipher', 'encrypt', 200, 0.002, stages)
+        text = render()
+        self.assertTrue(text.endswith('\n'))
+        self.assertIn('cipher_request_duration_seconds_count{cipher="testcipher",route="encrypt"} 1', text)
+        self.assertIn('cipher_requests_total{cipher="testcipher",route="encrypt",status="200"} 1', text)
+        self.assertIn(f'{STAGE_LATENCY.name}_count{{cipher="testcipher",route="encrypt",stage="kernel"}} 1', text)
+
+    def test_pending_requests_bounded(self):
+        metrics_service.fold()
+        with patch.object(metrics_service, 'MAX_PENDING', 10), patch.object(metrics_service, 'FOLD_BATCH', 4):
+            for _ in range(100):
+                record_request('boundedcipher', 'encrypt', 200, 0.001, None)
+            self.assertLessEqual(len(metrics_service._pending), 10)
+        self.assertIn('cipher_requests_total{cipher="boundedcipher",route="encrypt",status="200"} 100', render())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from unittest.mock import patch
+from src.services.modmath import gcd_table, unit_group, inverse_table, mod_inverse, batch_inverse, is_unit, extended_gcd, TABLE_LIMIT
+
+class TestModMath(unittest.TestCase):
+    """
+    Unit tests for the shared modular arithmetic kernel.
+    """
+
+    def test_tables(self):
+        self.assertEqual(gcd_table(12).tolist(), [12, 1, 2, 3, 4, 1, 6, 1, 4, 3, 2, 1])
+        self.assertEqual(unit_group(26).tolist(), [1, 3, 5, 7, 9, 11, 15, 17, 19, 21, 23, 25])
+        self.assertIs(inverse_table(26), inverse_table(26))
+        for mod in (26, 29, 36, 97, 256):
+            table = inverse_table(mod)
+            for a in range(mod):
+                expected = pow(a, -1, mod) if is_unit(a, mod) else 0
+                self.assertEqual(table[a], expected)
+
+    def test_mod_inverse(self):
+        self.assertEqual(mod_inverse(5, 26), 21)
+        self.assertEqual(mod_inverse(-5, 26), 5)
+        big_mod = TABLE_LIMIT * 1000 + 7
+        self.assertEqual(mod_inverse(123457, big_mod) * 123457 % big_mod, 1)
+        for a, mod in ((13, 26), (0, 7), (3, 1), (6, TABLE_LIMIT * 6)):
+            with self.assertRaises(ValueError):
+                mod_inverse(a, mod)
+
+    def test_large_modulus_not_cached(self):
+        cached = inverse_table.cache_info().currsize
+        self.assertEqual(mod_inverse(3, TABLE_LIMIT + 1) * 3 % (TABLE_LIMIT + 1), 1)
+        self.assertTrue(is_unit(3, TABLE_LIMIT + 1))
+        self.assertEqual(inverse_table.cache_info().currsize, cached)
+
+    def test_extended_gcd(self):
+        g, x, y = extended_gcd(240, 46)
+        self.assertEqual(g, 2)
+        self.assertEqual(240 * x + 46 * y, 2)
+
+    def test_batch_inverse(self):
+        inverses, non_invertible = batch_inverse([3, 13, 5, 0, 27], 26)
+        self.assertEqual(inverses, [9, None, 21, None, 1])
+        self.assertEqual(non_invertible, [1, 3])
+        self.assertEqual(batch_inverse([], 26), ([], []))
+        # All units: the single gcd of the product decides, with no per-value check
+        with patch('src.services.modmath.gcd', side_effect=AssertionError):
+            self.assertEqual(batch_inverse([3, 5, -7], 26), ([9, 21, 11], []))
+
+        steps = []
+        self.assertEqual(extended_gcd(11, 3, steps), (1, -1, 4))
+        self.assertEqual(steps[-1], [2, -1, 4, 1, 3, -11, 0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
 import unittest
-from src.services.mono_alphabetic_service import encrypt_text, decrypt_text
+import numpy as np
+from src.services.mono_alphabetic_service import encrypt_text, decrypt_text, crack_text, QuadgramState
+from src.services.ngram_service import load_quadgrams
 
 class TestMonoAlphabeticCipher(unittest.TestCase):
     """
@@ -35,5 +37,33 @@ class TestMonoAlphabeticCipher(unittest.TestCase):
         decrypted_text = decrypt_text(text2, key2)
         self.assertEqual(decrypted_text, "a long time ago, in a galaxy far, far away... it is a dark time for the rebellion. although the death star has been destroyed, imperial troops have driven the rebel forces from their hidden base and pursued them across the galaxy. evading the dreaded imperial starfleet, a group of freedom fighters led by luke skywalker has established a new secret base on the remote ice world of hoth. the evil lord darth vader, obsessed with finding young skywalker, has dispatched thousands of remote probes into the far reaches of space…")
 
+    def test_incremental_score(self):
+        # A swap updated incrementally must match the score of the swapped mapping computed from scratch
+        indices = np.array([ord(char) - ord('a') for char in "thequickbrownfoxjumpsoverthelazydog"])
+        quadgrams = load_quadgrams()
+        state = QuadgramState(indices, np.arange(26), quadgrams)
+        delta, affected, values = state.swap_delta(4, 19)
+        state.apply_swap(4, 19, affected, values, delta)
+
+        mapping = np.arange(26)
+        mapping[4], mapping[19] = 19, 4
+        self.assertAlmostEqual(state.score, QuadgramState(indices, mapping, quadgrams).score)
+
+    def test_crack_text(self):
+        text = "A long time ago, in a galaxy far, far away... It is a dark time for the Rebellion. Although the Death Star has been destroyed, Imperial troops have driven the Rebel forces from their hidden base and pursued them across the galaxy."
+        key = "MXEKQSCWGFYBJITRVDNZHUOPAL"
+        result = crack_text(encrypt_text(text, key), restarts=40, workers=1, seed=455)
+        self.assertEqual(len(result['key']), 26)
+        self.assertEqual(result['decrypted_text'], text.lower())
+        self.assertGreater(result['confidence'], 0.5)
+
+    def test_crack_parallel(self):
+        # The restarts are split into two tasks on the shared process pool
+        text = "It is a period of civil war. Rebel spaceships, striking from a hidden base, have won their first victory against the evil Galactic Empire."
+        key = "MXEKQSCWGFYBJITRVDNZHUOPAL"
+        result = crack_text(encrypt_text(text, key), restarts=4, workers=2, seed=455)
+        self.assertEqual(len(result['key']), 26)
+        self.assertEqual(len(result['decrypted_text']), len(text))
+
 if __name__ == '__main__':
     unittest.main()
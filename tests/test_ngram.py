@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+from src.services.ngram_service import load_quadgrams, load_ngrams, quadgram_code, quadgram_codes, quadgram_score, ngram_codes, text_indices, score_batch
+
+class TestNgram(unittest.TestCase):
+    """
+    Unit tests for the English quadgram model used to score candidate plaintexts.
+    """
+
+    def test_quadgram_code(self):
+        self.assertEqual(quadgram_code("AAAA"), 0)
+        self.assertEqual(quadgram_code("AAAB"), 1)
+        self.assertEqual(quadgram_code("ZZZZ"), 26 ** 4 - 1)
+        self.assertEqual(quadgram_codes(np.array([0, 0, 0, 1, 2])).tolist(), [1, 28])
+
+    def test_load_quadgrams(self):
+        quadgrams = load_quadgrams()
+        self.assertEqual(quadgrams.shape, (26 ** 4,))
+        self.assertGreater(quadgrams[quadgram_code("TION")], quadgrams[quadgram_code("QZXJ")])
+
+    def test_english_scores_higher(self):
+        english = np.array([ord(c) - ord('A') for c in "THEQUICKBROWNFOXJUMPSOVERTHELAZYDOG"])
+        shuffled = np.random.default_rng(0).permutation(english)
+        self.assertGreater(quadgram_score(english), quadgram_score(shuffled))
+
+    def test_load_ngrams(self):
+        tables = load_ngrams()
+        for n in range(1, 5):
+            self.assertEqual(tables[n].shape, (26 ** n,))
+            self.assertAlmostEqual(float((10 ** tables[n].astype(np.float64)).sum()), 1.0, places=2)
+        self.assertIsInstance(tables[4], np.memmap)
+        self.assertEqual(int(tables[1].argmax()), ord('E') - ord('A'))
+
+    def test_ngram_codes(self):
+        indices = np.array([0, 0, 0, 1, 2])
+        self.assertEqual(ngram_codes(indices, 4).tolist(), quadgram_codes(indices).tolist())
+        self.assertEqual(ngram_codes(indices, 2).tolist(), [0, 0, 1, 28])
+        self.assertEqual(ngram_codes(indices[:2], 3).tolist(), [])
+
+    def test_score_batch(self):
+        texts = ["The quick brown fox", "", "Attack at dawn!", "ab"]
+        scores, counts = score_batch(texts)
+        self.assertEqual(counts.tolist(), [13, 0, 9, 0])
+        for text, score in zip(texts, scores):
+            self.assertAlmostEqual(score, quadgram_score(text_indices(text)), places=6)
+
+        rows = np.array([text_indices("ATTACKATDAWN"), text_indices("QXZJQXZJQXZJ")])
+        scores, counts = score_batch(rows, n=2)
+        self.assertGreater(scores[0], scores[1])
+        self.assertEqual(counts.tolist(), [11, 11])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src.services.parallel_service import transform, split_segments, align_segments, get_pool, init_worker, pool_size
+from src.services import affine_service, hill_service, mono_alphabetic_service, vigenere_service
+
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+TEXT = ("It was the best of times, it was the worst of times; it was the age of wisdom, "
+        "it was the age of foolishness. Go attack at dawn!\n") * 40
+
+def worker_state():
+    # Runs in a worker process: reports whether it could start a pool of its own
+    try:
+        get_pool()
+        nested = True
+    except RuntimeError:
+        nested = False
+    return pool_size(), nested, transform('vigenere', 'encrypt', TEXT, "KEY", threshold=0, segments=4)
+
+class TestParallelTransform(unittest.TestCase):
+    """
+    Unit tests for the segmented request path on the shared process pool.
+
+    Test Methods:
+    - test_split_segments: Verifies that the segments cover the text without gaps.
+    - test_align_segments: Checks that Hill segment boundaries fall between blocks.
+    - test_segments_match_services: Checks each cipher against its text service, with segments cut mid-block.
+    - test_non_ascii_text: Verifies texts outside ASCII are segmented correctly.
+    - test_invalid_hill_length: Checks that a Hill text with an incomplete block is rejected.
+    - test_no_pool_in_workers: Checks that work running in a worker process does not nest pools.
+    """
+
+    def test_split_segments(self):
+        self.assertEqual(split_segments(10, 3), [(0, 3), (3, 6), (6, 10)])
+        self.assertEqual(split_segments(2, 4), [(0, 1), (1, 2)])
+
+    def test_align_segments(self):
+        text = "AB CD EF"
+        ranges = split_segments(len(text), 2)
+        counts = [sum(c.isalpha() for c in text[start:stop]) for start, stop in ranges]
+        self.assertEqual(align_segments(text, ranges, counts, 3), [(0, 4), (4, 8)])
+        self.assertEqual(align_segments(text, ranges, counts, 2), [(0, 5), (5, 8)])
+
+    def test_segments_match_services(self):
+        matrix = [[6, 24, 1], [13, 16, 10], [20, 17, 15]]
+        mono_key = "QWERTYUIOPASDFGHJKLZXCVBNM"
+        cases = [
+            ('affine', (5, 8), affine_service.encrypt_text(TEXT, 5, 8, ALPHABET)),
+            ('vigenere', "LEMON", vigenere_service.encrypt_text(TEXT, "LEMON")),
+            ('mono_alphabetic', mono_key, mono_alphabetic_service.encrypt_text(TEXT, mono_key)),
+            ('hill', matrix, hill_service.encrypt_text(TEXT, np.array(matrix), ALPHABET)),
+        ]
+        for cipher, key, expected in cases:
+            with self.subTest(cipher=cipher):
+                encrypted = transform(cipher, 'encrypt', TEXT, key, ALPHABET, threshold=0, segments=5)
+                self.assertEqual(encrypted, expected)
+                decrypted = transform(cipher, 'decrypt', encrypted, key, ALPHABET, threshold=0, segments=3)
+                self.assertEqual(decrypted.lower(), TEXT.strip().lower() if cipher == 'affine' else TEXT.lower())
+
+    def test_non_ascii_text(self):
+        text = "Café naïve — Ünïcode İstanbul, déjà vu. " * 30
+        self.assertEqual(transform('vigenere', 'encrypt', text, "KEY", threshold=0, segments=4),
+                         vigenere_service.encrypt_text(text, "KEY"))
+
+    def test_invalid_hill_length(self):
+        with self.assertRaises(ValueError):
+            transform('hill', 'encrypt', TEXT + "A", [[3, 3], [2, 5]], ALPHABET, threshold=0, segments=3)
+
+    def test_no_pool_in_workers(self):
+        with ProcessPoolExecutor(max_workers=1, initializer=init_worker) as executor:
+            size, nested, encrypted = executor.submit(worker_state).result()
+        self.assertEqual((size, nested), (1, False))
+        self.assertEqual(encrypted, vigenere_service.encrypt_text(TEXT, "KEY"))
+
+if __name__ == '__main__':
+    unittest.main()
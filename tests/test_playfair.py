@@ -1,5 +1,6 @@
 import unittest
-from src.services.playfair_service import playfair_encryption, playfair_decryption, create_playfair_key_matrix
+import numpy as np
+from src.services.playfair_service import playfair_encryption, playfair_decryption, create_playfair_key_matrix, compile_key, decryption_digram_table, crack_playfair, alphabet
 
 class TestPlayFairCipher(unittest.TestCase):
   '''Applying some testcases to check functionality'''
@@ -18,5 +19,38 @@ class TestPlayFairCipher(unittest.TestCase):
     decrypted_text = playfair_decryption(ciphertext,key)
     self.assertIsInstance(decrypted_text,str)
     self.assertEqual(plaintext,decrypted_text)
+  def test_digram_tables(self):
+    '''Checking that compiled keys are cached and that the encryption and decryption tables are inverse'''
+    key = "PROBLEMS"
+    positions, encryption_table, decryption_table = compile_key(key)
+    self.assertIs(compile_key(key), compile_key(key))
+    self.assertEqual(positions['P'], (0, 0))
+    self.assertEqual(len(encryption_table), 625)
+    for pair, encrypted_pair in encryption_table.items():
+      if pair[0] != pair[1]:
+        self.assertEqual(decryption_table[encrypted_pair], pair)
+  def test_decryption_digram_table(self):
+    '''Checking that the array digram table of a key square agrees with the compiled decryption table'''
+    key_matrix = create_playfair_key_matrix("PROBLEMS")
+    square = np.array([alphabet.index(c) for row in key_matrix for c in row])
+    _, _, decryption_table = compile_key("PROBLEMS")
+    table = decryption_digram_table(square)
+    for pair, decrypted_pair in decryption_table.items():
+      first, second = table[alphabet.index(pair[0]) * 25 + alphabet.index(pair[1])]
+      self.assertEqual(alphabet[first] + alphabet[second], decrypted_pair)
+  def test_crack(self):
+    '''Running one annealing pass with a fixed seed and checking it recovers the plaintext'''
+    plaintext = ("It is a truth universally acknowledged, that a single man in possession of a good fortune, must be in want of a wife. "
+                 "However little known the feelings or views of such a man may be on his first entering a neighbourhood, this truth is so well "
+                 "fixed in the minds of the surrounding families, that he is considered the rightful property of some one or other of their daughters. "
+                 "My dear Mr. Bennet, said his lady to him one day, have you heard that Netherfield Park is let at last? "
+                 "Mr. Bennet replied that he had not. But it is, returned she; for Mrs. Long has just been here, and she told me all about it. "
+                 "Mr. Bennet made no answer. Do you not want to know who has taken it? cried his wife impatiently. "
+                 "You want to tell me, and I have no objection to hearing it. This was invitation enough. "
+                 "Why, my dear, you must know, Mrs. Long says that Netherfield is taken by a young man of large fortune from the north of England.")
+    ciphertext = playfair_encryption(''.join(c for c in plaintext if c.isalpha())[:600], "MONARCHY")
+    result = crack_playfair(ciphertext, time_budget=300, workers=1, seed=2, iterations=1000, restarts=1)
+    self.assertEqual(result['plaintext'], playfair_decryption(ciphertext, "MONARCHY"))
+    self.assertLess(result['score'], 0)
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,148 @@
+import json
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# The app imports its controllers and services from the src folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import main
+from controllers import stream_controller
+from services import log_service, stream_service
+
+
+class RecordingLogger:
+    """
+    Stands in for the audit logger, keeping the queued rows in memory.
+    """
+
+    def __init__(self):
+        self.rows = []
+
+    def log(self, sql, params):
+        self.rows.append((sql, params))
+        return True
+
+    def log_batch(self, entries):
+        self.rows.extend(entries)
+        return True
+
+    def flush(self, timeout=None):
+        return True
+
+
+class TestCachedRoutes(unittest.TestCase):
+    """
+    Tests of the encrypt and decrypt routes through the result cache.
+    """
+
+    def setUp(self):
+        main.result_cache.clear()
+        self.logger = RecordingLogger()
+        patcher = patch.object(log_service, '_logger', self.logger)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = main.app.test_client()
+
+    def encrypt(self, **fields):
+        payload = {'cipher': 'affine', 'inputText': 'Hello, World', 'keyString': '5,8',
+                   'alphabet': 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', **fields}
+        return self.client.post('/encrypt/affine', json=payload)
+
+    def test_repeated_request_hits(self):
+        first = self.encrypt()
+        second = self.encrypt()
+        self.assertEqual(first.headers['X-Cache'], 'MISS')
+        self.assertEqual(second.headers['X-Cache'], 'HIT')
+        self.assertEqual(first.get_json(), second.get_json())
+        self.assertNotIn('X-Cache', self.encrypt(noCache=True).headers)
+
+    def test_no_cache_flag(self):
+        self.encrypt()
+        for flag in (True, 'true', '1', 'yes'):
+            self.assertNotIn('X-Cache', self.encrypt(noCache=flag).headers)
+        for flag in (False, 'false', '0', 'no'):
+            self.assertEqual(self.encrypt(noCache=flag).headers['X-Cache'], 'HIT')
+        self.assertEqual(self.encrypt(noCache='maybe').status_code, 400)
+
+    def test_output_field_is_part_of_the_key(self):
+        preserve = self.encrypt()
+        blocks = self.encrypt(output='blocks')
+        self.assertEqual(blocks.headers['X-Cache'], 'MISS')
+        self.assertEqual(preserve.get_json()['encrypted_text'], 'RCLLA, OAPLX')
+        self.assertEqual(blocks.get_json()['encrypted_text'], 'RCLLA OAPLX')
+
+    def test_cached_results_are_logged(self):
+        first = self.encrypt()
+        second = self.encrypt()
+        self.assertEqual(second.headers['X-Cache'], 'HIT')
+        self.assertEqual(len(self.logger.rows), 2)
+        self.assertEqual(self.logger.rows[0], self.logger.rows[1])
+        _, params = self.logger.rows[1]
+        self.assertEqual(params[:3], ('encrypt', 'Hello, World', first.get_json()['encrypted_text']))
+
+
+class TestStreamRoute(unittest.TestCase):
+    """
+    Tests of the error handling and logging of the streaming route.
+    """
+
+    def setUp(self):
+        self.logger = RecordingLogger()
+        patcher = patch.object(log_service, '_logger', self.logger)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = main.app.test_client()
+
+    def stream(self, cipher, body, key_string):
+        return self.client.post(f'/stream/encrypt/{cipher}', query_string={'keyString': key_string}, data=body)
+
+    def test_stream_is_logged(self):
+        response = self.stream('affine', 'Hello, World', '5,8')
+        self.assertEqual(response.get_data(as_text=True), 'RCLLA, OAPLX')
+        self.assertEqual(len(self.logger.rows), 1)
+        _, params = self.logger.rows[0]
+        self.assertEqual(params[:3], ('encrypt', '<12 characters>', '<12 characters>'))
+
+    def test_error_before_first_chunk(self):
+        response = self.stream('hill', 'HELLé', '3,3,2,5')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.get_json())
+        self.assertEqual(self.stream('hill', 'H', '3,3,2,5').status_code, 400)
+        self.assertEqual(self.stream('affine', 'A\x1eB', '5,8').status_code, 400)
+        self.assertEqual(self.logger.rows, [])
+
+    def test_error_record_mid_stream(self):
+        # The first chunk is valid and sent with a 200 status; the 'é' in the second one is not
+        body = 'AB' * stream_service.CHUNK_SIZE + 'é'
+        response = self.stream('hill', body, '3,3,2,5')
+        self.assertEqual(response.status_code, 200)
+        text, _, record = response.get_data(as_text=True).partition(stream_controller.RECORD_SEPARATOR)
+        self.assertTrue(text)
+        self.assertTrue(json.loads(record)['error'].startswith('Invalid input'))
+        self.assertEqual(self.logger.rows, [])
+
+
+class TestEuclidRoute(unittest.TestCase):
+    """
+    Tests of the batch inversion parameters of the Euclid route.
+    """
+
+    def setUp(self):
+        self.client = main.app.test_client()
+
+    def invert(self, table):
+        return self.client.post('/encrypt/euclid', json={'cipher': 'euclid', 'values': [3, 5], 'mod': 11, 'table': table})
+
+    def test_table_flag(self):
+        for table in (False, 'false', '0', 'no'):
+            response = self.invert(table)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('tables', response.get_json())
+        for table in (True, 'true', '1', 'Yes'):
+            self.assertEqual(len(self.invert(table).get_json()['tables']), 2)
+        self.assertEqual(self.invert('maybe').status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import io
+import unittest
+import numpy as np
+from src.services import affine_service, hill_service, playfair_service, vigenere_service
+from src.services.stream_service import (
+    AffineStage, VigenereStage, HillStage, PlayfairStage, decode_chunks, transform_stream,
+)
+
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+def split(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+class TestStream(unittest.TestCase):
+    """
+    Unit tests for the streaming cipher stages, which must give the same result as the
+    whole-text functions however the input is split into chunks.
+    """
+
+    text = "  Meet me at the  BALLOON, jolly good show!\nAttack at dawn.  "
+
+    def stream(self, stage, size):
+        return ''.join(transform_stream(stage, split(self.text, size)))
+
+    def test_affine(self):
+        expected = affine_service.encrypt_text(self.text, 5, 8, ALPHABET)
+        for size in (1, 2, 7, 100):
+            self.assertEqual(self.stream(AffineStage(5, 8, ALPHABET), size), expected)
+
+    def test_vigenere(self):
+        expected = vigenere_service.encrypt_text(self.text, "LEMON")
+        for size in (1, 3, 7, 100):
+            self.assertEqual(self.stream(VigenereStage("LEMON"), size), expected)
+        self.assertEqual(vigenere_service.rotate_key("LEMON", 7), "MONLE")
+        self.assertEqual(vigenere_service.count_letters("Hi, you!"), 5)
+
+    def test_hill(self):
+        matrix = np.array([[3, 3], [2, 5]])
+        text = self.text + "x"
+        expected = hill_service.encrypt_text(text, matrix, ALPHABET)
+        for size in (1, 3, 7, 100):
+            self.assertEqual(''.join(transform_stream(HillStage(matrix, ALPHABET), split(text, size))), expected)
+        with self.assertRaises(ValueError):
+            list(transform_stream(HillStage(matrix, ALPHABET), split(self.text, 5)))
+
+        # A block split by a long run of punctuation is only transformed once it is complete
+        stage = HillStage(matrix, ALPHABET)
+        chunks = ["HI, T"] + [", "] * 1000 + ["HEM"]
+        output = [stage.feed(chunk) for chunk in chunks]
+        self.assertEqual(stage.carry_letters, 0)
+        self.assertTrue(all(piece == '' for piece in output[1:-1]))
+        self.assertEqual(''.join(output) + stage.finish(), hill_service.encrypt_text(''.join(chunks), matrix, ALPHABET))
+
+    def test_playfair(self):
+        ciphertext = playfair_service.playfair_encryption(self.text, "MONARCHY")
+        expected = playfair_service.playfair_decryption(ciphertext, "MONARCHY")
+        for size in (1, 2, 5, 100):
+            stage = PlayfairStage("MONARCHY", 'decrypt')
+            self.assertEqual(''.join(transform_stream(stage, split(ciphertext, size))), expected)
+            stage = PlayfairStage("MONARCHY")
+            self.assertEqual(self.stream(stage, size), ciphertext)
+
+    def test_decode_chunks(self):
+        body = "héllo wörld ✓".encode('utf-8')
+        self.assertEqual(''.join(decode_chunks(io.BytesIO(body), chunk_size=1)), "héllo wörld ✓")
+
+if __name__ == '__main__':
+    unittest.main()
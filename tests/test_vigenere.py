@@ -1,5 +1,7 @@
 import unittest
-from src.services.vigenere_service import encrypt_text, decrypt_text
+from unittest.mock import patch
+from src.services import vigenere_service
+from src.services.vigenere_service import encrypt_text, decrypt_text, crack_text, transform_many, encrypt_bytes, decrypt_bytes
 
 class TestVigenereCipher(unittest.TestCase):
     """
@@ -68,5 +70,92 @@ class TestVigenereCipher(unittest.TestCase):
         self.assertEqual(encrypt_text(plaintext, key), expected_encryption)
         self.assertEqual(decrypt_text(expected_encryption, key), plaintext)
 
+    def test_vectorized_matches_scalar(self):
+        # Large texts take the NumPy path and must match the scalar path exactly
+        plaintext = "Hello, World! Attack at dawn; the quick brown fox. " * 200
+        key = "LEMON"
+        alphabet = "QWERTYUIOPASDFGHJKLZXCVBNM"
+        self.assertGreaterEqual(len(plaintext), vigenere_service.VECTORIZE_THRESHOLD)
+        encrypted_text = encrypt_text(plaintext, key, alphabet)
+        with patch.object(vigenere_service, 'VECTORIZE_THRESHOLD', len(plaintext) + 1):
+            self.assertEqual(encrypted_text, encrypt_text(plaintext, key, alphabet))
+        self.assertEqual(decrypt_text(encrypted_text, key, alphabet), plaintext)
+
+    def test_special_case_mappings(self):
+        # Characters whose uppercase form is in the alphabet are shifted, as char.upper() in alphabet decides:
+        # 'ı' -> 'I' and 'ſ' -> 'S' (lowercase output), 'ﬆ' -> 'ST' (shifted from 'S'); 'ß' -> 'SS' is not
+        def reference(text, key, alphabet, direction):
+            result, key_index = [], 0
+            for char in text:
+                if char.upper() in alphabet:
+                    shift = alphabet.index(key[key_index % len(key)].upper())
+                    letter = alphabet[(alphabet.index(char.upper()) + direction * shift) % 26]
+                    result.append(letter if char.isupper() else letter.lower())
+                    key_index += 1
+                else:
+                    result.append(char)
+            return ''.join(result)
+
+        alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+        text = "Kısa ſtory: the ﬆar in Straße, İstanbul. "
+        for repeat in (1, 200):  # Scalar and vectorized paths
+            with self.subTest(length=len(text) * repeat):
+                self.assertEqual(encrypt_text(text * repeat, "LEMON"), reference(text * repeat, "LEMON", alphabet, 1))
+                self.assertEqual(decrypt_text(text * repeat, "LEMON"), reference(text * repeat, "LEMON", alphabet, -1))
+        self.assertEqual(vigenere_service.count_letters(text), sum(char.upper() in alphabet for char in text))
+
+    def test_transform_many(self):
+        # The key restarts at each text, in both the scalar and the vectorized path
+        texts = ["Attack at dawn!", "", "Hello, World", "x" * 5000, "no key use: 123"]
+        for mode, transform in (('encrypt', encrypt_text), ('decrypt', decrypt_text)):
+            expected = [transform(text, "LEMON") for text in texts]
+            self.assertEqual(transform_many(texts, "LEMON", mode=mode), expected)
+            self.assertEqual(transform_many(texts[:3], "LEMON", mode=mode), expected[:3])
+
+    def test_crack(self):
+        plaintext = ("It is a truth universally acknowledged, that a single man in possession of a good fortune, "
+                     "must be in want of a wife. However little known the feelings or views of such a man may be "
+                     "on his first entering a neighbourhood, this truth is so well fixed in the minds of the "
+                     "surrounding families, that he is considered the rightful property of some one or other "
+                     "of their daughters.")
+        encrypted_text = encrypt_text(plaintext, "LEMON")
+        candidates = crack_text(encrypted_text, top_k=2)
+        self.assertEqual(candidates[0]['key'], "LEMON")
+        self.assertTrue(candidates[0]['preview'].startswith("It is a truth"))
+        self.assertEqual(len(candidates), 2)
+
+    def test_crack_parallel(self):
+        # Force the process pool path on a short ciphertext
+        plaintext = "Attack the northern gate at dawn and hold the bridge until the main army arrives. " * 20
+        encrypted_text = encrypt_text(plaintext, "KEY")
+        with patch.object(vigenere_service, 'PARALLEL_THRESHOLD', 0):
+            candidates = crack_text(encrypted_text, workers=2)
+        self.assertEqual(candidates[0]['key'], "KEY")
+
+    def test_crack_no_letters(self):
+        with self.assertRaises(ValueError):
+            crack_text("1234 !!")
+
+    def test_byte_mode(self):
+        data = bytes(range(256)) * 700  # Longer than one key block
+        key = b"\xffKEY"
+        encrypted = encrypt_bytes(data, key)
+        # The output buffer is returned as is, without a copy to bytes
+        self.assertIsInstance(encrypted, bytearray)
+        expected = bytes((byte + key[i % len(key)]) % 256 for i, byte in enumerate(data))
+        self.assertEqual(encrypted, expected)
+        self.assertEqual(decrypt_bytes(encrypted, key), data)
+
+        # Pieces encrypted with the offset of the bytes before them join up
+        pieces = encrypt_bytes(data[:1001], key) + encrypt_bytes(data[1001:], key, offset=1001)
+        self.assertEqual(pieces, encrypted)
+
+        out = bytearray(len(data))
+        self.assertIs(decrypt_bytes(encrypted, key, out=out), out)
+        self.assertEqual(bytes(out), data)
+
+        with self.assertRaises(ValueError):
+            encrypt_bytes(data, "")
+
 if __name__ == '__main__':
     unittest.main()